@@ -0,0 +1,65 @@
+"""
+Compare the memory usage and the runtime of typical groupby operations between the event log with default dtypes (object strings) and the event log with the compact dtypes of `event_log_dtypes`
+(`create_event_log(..., optimize_dtypes=True)`).
+
+Run from the root directory of the project:
+    python -m benchmarks.dtype_benchmark --num-events 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.event_log_benchmark import get_synthetic_parsed_logs
+from vsim.utils.data import create_log_frames, create_event_log_from_frames
+
+groupby_operations = {
+    "case durations": lambda df: df.groupby("case_id", observed=True)["timestamp"].agg(["min", "max"]),
+    "events per vehicle": lambda df: df.groupby("org:resource", observed=True).size(),
+    "events per location and activity": lambda df: df.groupby(["location", "activity"], observed=True).size(),
+    "lifecycle per case and activity": lambda df: df.groupby(["case_id", "activity"], observed=True)["lifecycle:transition"].last()
+}
+
+
+def time_operation(operation, df: pd.DataFrame, repeat: int):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = operation(df)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    return result, elapsed
+
+
+def run_benchmark(num_events: int, repeat: int = 3):
+    log_dfs = create_log_frames(get_synthetic_parsed_logs(num_events=num_events))
+    event_logs = {
+        "default": create_event_log_from_frames(log_dfs),
+        "optimized": create_event_log_from_frames(log_dfs, optimize_dtypes=True)
+    }
+    print(f"{len(event_logs['default']):,} events")
+
+    results = []
+    for name, event_log_df in event_logs.items():
+        results.append({"dtypes": name, "operation": "memory (MB)", "value": event_log_df.memory_usage(deep=True).sum() / 1024 ** 2})
+    for operation_name, operation in groupby_operations.items():
+        default_result, default_time = time_operation(operation, event_logs["default"], repeat=repeat)
+        optimized_result, optimized_time = time_operation(operation, event_logs["optimized"], repeat=repeat)
+        pd.testing.assert_series_equal(
+            pd.DataFrame(default_result).stack().astype(str), pd.DataFrame(optimized_result).stack().astype(str), check_index_type=False, check_names=False, check_categorical=False
+        )
+        results.append({"dtypes": "default", "operation": f"{operation_name} (s)", "value": default_time})
+        results.append({"dtypes": "optimized", "operation": f"{operation_name} (s)", "value": optimized_time})
+
+    results_df = pd.DataFrame(results).pivot(index="operation", columns="dtypes", values="value")
+    results_df["improvement"] = results_df["default"] / results_df["optimized"]
+    print(results_df.to_string(float_format=lambda value: f"{value:.3f}"))
+    return results_df
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--num-events", type=int, default=1_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    run_benchmark(num_events=args.num_events, repeat=args.repeat)
@@ -0,0 +1,66 @@
+"""
+Compare the runtime of the construction of the event log (`create_event_log`) at increasing numbers of events between
+    - original: iterative construction with a per-group lambda to propagate vehicles (the implementation before the columnar path)
+    - iterative: iterative construction with a vectorized group fill
+    - columnar: construction with whole-DataFrame operations per log pattern, including the split of parsed logs into DataFrames
+    - frames: columnar construction from DataFrames of parsed logs per pattern (e.g. loaded through `VSCache.get_parsed_log_frames`)
+
+Run from the root directory of the project:
+    python -m benchmarks.event_log_benchmark --num-events 10000 100000 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_synthetic_log_lines
+from vsim.utils.data import create_event_log, create_event_log_from_frames, create_event_records, create_log_frames, format_event_log
+from vsim.utils.log_parser import parse_log_line
+
+# Each synthetic container yields ~16 log lines and ~12 events on average
+EVENTS_PER_LINE = 0.75
+
+
+def get_synthetic_parsed_logs(num_events: int) -> list[tuple[str, dict]]:
+    parsed_logs = [parse_log_line(line.strip()) for line in generate_synthetic_log_lines(num_lines=int(num_events / EVENTS_PER_LINE))]
+    return [(pattern, log_data) for pattern, log_data in parsed_logs if pattern]
+
+
+def create_event_log_original(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
+    event_log_df = pd.DataFrame(create_event_records(parsed_logs))
+    event_log_df["vehicle_id"] = event_log_df.groupby("co_id")["vehicle_id"].transform(lambda x: x.bfill().ffill())
+    return format_event_log(event_log_df)
+
+
+def run_benchmark(num_events_list: list[int]):
+    results = []
+    for num_events in num_events_list:
+        parsed_logs = get_synthetic_parsed_logs(num_events=num_events)
+
+        timings = {}
+        event_logs = {}
+        build_fns = [
+            ("original", create_event_log_original),
+            ("iterative", lambda logs: create_event_log(logs, columnar=False)),
+            ("columnar", lambda logs: create_event_log(logs, columnar=True))
+        ]
+        log_dfs = create_log_frames(parsed_logs)
+        build_fns.append(("frames", lambda _: create_event_log_from_frames(log_dfs)))
+        for name, build_fn in build_fns:
+            start = time.perf_counter()
+            event_logs[name] = build_fn(parsed_logs)
+            timings[name] = time.perf_counter() - start
+
+        for name in ["iterative", "columnar", "frames"]:
+            pd.testing.assert_frame_equal(event_logs["original"], event_logs[name])
+        results.append({"num_events": len(event_logs["columnar"]), **timings, "speedup": timings["original"] / timings["iterative"]})
+        print(f"{len(event_logs['columnar']):>10,} events: " + ", ".join(f"{name} {timing:.3f} s" for name, timing in timings.items()) + f" ({results[-1]['speedup']:.2f}x speedup over original)")
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--num-events", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = arg_parser.parse_args()
+    run_benchmark(num_events_list=args.num_events)
@@ -0,0 +1,75 @@
+"""
+Measure the parsing throughput (lines per second) of the log parser on a synthetic simulator log, and compare it with the legacy regex-trial parser (`parse_log` + `postprocess_parsed_log`).
+
+Run from the root directory of the project:
+    python -m benchmarks.log_parser_benchmark --num-lines 200000
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_synthetic_log_lines
+from vsim.utils import count_event, profiled
+from vsim.utils.log_parser import get_parsed_logs, parse_log, parse_log_line, postprocess_parsed_log, read_log_file, to_id_pattern, co_id_pattern, action_pattern
+
+
+@profiled("get_parsed_logs_legacy", count_items=len)
+def get_parsed_logs_legacy(log_file_path: str):
+    """
+    Parsing loop of `get_parsed_logs` before the single-pass engine, kept as the baseline of the benchmark
+    """
+    parsed_logs = []
+    log_lines = read_log_file(log_file_path=log_file_path)
+    count_event("legacy_log_lines", len(log_lines))
+    for log_line in log_lines:
+        log_line = log_line.strip()
+        pattern, extracted_data = parse_log(log_line)
+        if pattern:
+            extracted_data = postprocess_parsed_log(extracted_data)
+            if pattern == "init_scheduling":
+                schedules = re.findall(rf"\d:(?P<to_id>{to_id_pattern})#(?P<co_id>{co_id_pattern})#(?P<action>{action_pattern})", log_line)
+                extracted_data = {**extracted_data, "schedules": schedules}
+            parsed_logs.append((pattern, extracted_data))
+
+    return parsed_logs
+
+
+def run_benchmark(num_lines: int, repeat: int = 3, num_workers: int = 1):
+    log_lines = generate_synthetic_log_lines(num_lines=num_lines)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file_path = os.path.join(tmp_dir, "synthetic.log")
+        with open(log_file_path, "w") as log_fp:
+            log_fp.writelines(log_lines)
+
+        _, parsed_logs = get_parsed_logs(log_file_path)
+        assert parsed_logs == get_parsed_logs_legacy(log_file_path), "Parsed logs differ from the legacy parser"
+        if num_workers > 1:
+            assert get_parsed_logs(log_file_path, num_workers=num_workers)[1] == parsed_logs, "Parallel parsing differs from the serial path"
+        assert all(parse_log_line(line.strip()) == (None, None) for line in log_lines if "optimizer run took" in line)
+
+        results = {}
+        parse_fns = [("legacy", get_parsed_logs_legacy), ("single-pass", get_parsed_logs)]
+        if num_workers > 1:
+            parse_fns.append((f"{num_workers} workers", lambda path: get_parsed_logs(path, num_workers=num_workers)))
+        for name, parse_fn in parse_fns:
+            elapsed = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parse_fn(log_file_path)
+                elapsed = min(elapsed, time.perf_counter() - start)
+            results[name] = num_lines / elapsed
+            print(f"{name:>12}: {results[name]:>12,.0f} lines/s ({elapsed:.3f} s for {num_lines:,} lines)")
+
+    print(f"{'speedup':>12}: {results['single-pass'] / results['legacy']:.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--num-lines", type=int, default=200_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--num-workers", type=int, default=1)
+    args = arg_parser.parse_args()
+    run_benchmark(num_lines=args.num_lines, repeat=args.repeat, num_workers=args.num_workers)
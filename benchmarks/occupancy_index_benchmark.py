@@ -0,0 +1,65 @@
+"""
+Compare the lane-occupancy lookups at a single busy location between the list-based `get_overlapping_processes` + `estimate_start_time` and the `VSOccupancyIndex`.
+The list-based lookups are only timed on a sample of arrivals, and extrapolated to the whole shift.
+
+Run from the root directory of the project:
+    python -m benchmarks.occupancy_index_benchmark --num-intervals 100000
+"""
+import argparse
+import random
+import time
+
+from vsim.utils.general import VSOccupancyIndex, estimate_start_time, get_overlapping_processes
+
+
+def generate_arrivals(num_intervals: int, seed: int = 0) -> list[float]:
+    rng = random.Random(seed)
+    arrival_time = 0.0
+    arrival_times = []
+    for _ in range(num_intervals):
+        arrival_time += rng.expovariate(1 / 20)
+        arrival_times.append(arrival_time)
+
+    return arrival_times
+
+
+def run_benchmark(num_intervals: int, capacity: int = 3, action_duration: float = 60.0, num_sampled_arrivals: int = 200, seed: int = 0):
+    arrival_times = generate_arrivals(num_intervals=num_intervals, seed=seed)
+
+    # Whole shift with the occupancy index
+    occupancy_index = VSOccupancyIndex()
+    start = time.perf_counter()
+    intervals = []
+    for arrival_time in arrival_times:
+        start_time = estimate_start_time(arrival_time, overlapping_intervals=occupancy_index, loc_capacity=capacity)
+        occupancy_index.insert(start_time, start_time + action_duration)
+        intervals.append((start_time, start_time + action_duration))
+    index_time = time.perf_counter() - start
+
+    # Sample of arrivals for the list-based lookups, checked against the index
+    sampled_arrivals = random.Random(seed).sample(arrival_times, k=min(num_sampled_arrivals, num_intervals))
+    start = time.perf_counter()
+    list_start_times = []
+    for arrival_time in sampled_arrivals:
+        overlapping_intervals = get_overlapping_processes(arrival_time, prev_process_intervals=intervals)
+        list_start_times.append(estimate_start_time(arrival_time, overlapping_intervals=overlapping_intervals, loc_capacity=capacity))
+    list_time_per_arrival = (time.perf_counter() - start) / len(sampled_arrivals)
+    assert list_start_times == [estimate_start_time(arrival_time, overlapping_intervals=occupancy_index, loc_capacity=capacity) for arrival_time in sampled_arrivals]
+
+    # Against all intervals, whereas a shift scans half of them on average
+    list_time = list_time_per_arrival * num_intervals / 2
+    index_time_per_arrival = index_time / num_intervals
+    print(f"{num_intervals:,} intervals, capacity {capacity}")
+    print(f"{'list':>8}: {list_time_per_arrival * 1e6:>10.1f} us per arrival, ~{list_time:.1f} s per shift (extrapolated)")
+    print(f"{'index':>8}: {index_time_per_arrival * 1e6:>10.1f} us per arrival (lookup and insert), {index_time:.2f} s per shift")
+    print(f"{'speedup':>8}: {list_time / index_time:.0f}x")
+    return {"num_intervals": num_intervals, "list_time": list_time, "index_time": index_time}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--num-intervals", type=int, default=100_000)
+    arg_parser.add_argument("--capacity", type=int, default=3)
+    arg_parser.add_argument("--num-sampled-arrivals", type=int, default=200)
+    args = arg_parser.parse_args()
+    run_benchmark(num_intervals=args.num_intervals, capacity=args.capacity, num_sampled_arrivals=args.num_sampled_arrivals)
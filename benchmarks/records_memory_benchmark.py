@@ -0,0 +1,78 @@
+"""
+Compare the memory per parsed log between the parsed logs as dictionaries (`get_parsed_logs`) and the compact records (`parse_log_records`), along with the time to parse a synthetic log and to
+create the DataFrame of the driving logs from each representation.
+
+Memory is measured with `tracemalloc` as the size of all objects kept alive by the result (excluding the caches of the parser).
+
+Run from the root directory of the project:
+    python -m benchmarks.records_memory_benchmark --num-lines 200000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_log
+from vsim.utils.data import create_travel_info_df
+from vsim.utils.log_parser import get_parsed_logs, to_naive_datetime
+from vsim.utils.records import parse_log_records, to_epoch_seconds
+
+
+def measure(build_fn):
+    """
+    Retained memory in bytes and runtime of building a result
+    """
+    to_naive_datetime.cache_clear()
+    to_epoch_seconds.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build_fn()
+    elapsed = time.perf_counter() - start
+    to_naive_datetime.cache_clear()
+    to_epoch_seconds.cache_clear()
+    gc.collect()
+    retained_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained_bytes, elapsed
+
+
+def run_benchmark(num_lines: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file_path = os.path.join(tmp_dir, "synthetic.log")
+        write_synthetic_log(log_file_path, num_lines=num_lines)
+
+        (logs_by_pattern, parsed_logs), dict_bytes, dict_time = measure(lambda: get_parsed_logs(log_file_path))
+        num_records = len(parsed_logs)
+        start = time.perf_counter()
+        dict_driving_df = create_travel_info_df(logs_by_pattern["driving"])
+        dict_frame_time = time.perf_counter() - start
+        del logs_by_pattern, parsed_logs
+
+        log_records, record_bytes, record_time = measure(lambda: parse_log_records(log_file_path))
+        assert len(log_records) == num_records
+        start = time.perf_counter()
+        record_driving_df = create_travel_info_df(log_records.to_frame("driving"))
+        record_frame_time = time.perf_counter() - start
+        pd.testing.assert_frame_equal(dict_driving_df, record_driving_df)
+
+    results = pd.DataFrame([
+        {"representation": "dictionaries", "bytes_per_record": dict_bytes / num_records, "parse_time": dict_time, "driving_frame_time": dict_frame_time},
+        {"representation": "compact records", "bytes_per_record": record_bytes / num_records, "parse_time": record_time, "driving_frame_time": record_frame_time}
+    ])
+    print(f"{num_records:,} parsed logs")
+    for result in results.itertuples():
+        print(f"{result.representation:>16}: {result.bytes_per_record:>7.1f} bytes per record, parsed in {result.parse_time:.2f} s, driving DataFrame in {result.driving_frame_time:.3f} s")
+    print(f"{'reduction':>16}: {results['bytes_per_record'].iloc[0] / results['bytes_per_record'].iloc[1]:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--num-lines", type=int, default=200_000)
+    args = arg_parser.parse_args()
+    run_benchmark(num_lines=args.num_lines)
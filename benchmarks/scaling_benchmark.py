@@ -0,0 +1,156 @@
+"""
+Measure how the pipeline scales with the size of the simulator log (number of log lines), on a synthetic terminal and a matching log (see `benchmarks.synthetic`) per size:
+    - parse: parsing the log into compact records (`parse_log_records`)
+    - event_log: construction of the event log from the records (`create_event_log_from_frames`)
+    - occupancy: running and waiting cases of all locations over time (`analyze_all_locations_occupancy`)
+    - distance_matrix: distance matrix of the terminal (`VSDataCenter`)
+    - solver: one optimization round over all orders (`VSSolver.optimize`)
+The terminal grows with the log: one container order per 19 lines, one location per 200 lines (20 to 1000) and one vehicle per 2000 lines (10 to 200).
+
+Results are appended to a JSON lines file (one row per size and stage), so that runs can be compared over time with `--compare`.
+
+Run from the root directory of the project:
+    python -m benchmarks.scaling_benchmark --sizes 1000 10000 100000 1000000
+    python -m benchmarks.scaling_benchmark --sizes 10000000 --backend flow --num-candidates 500
+    python -m benchmarks.scaling_benchmark --compare
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+from benchmarks.synthetic import get_num_orders_for_log, write_synthetic_log, write_synthetic_terminal
+from vsim.analysis import analyze_all_locations_occupancy
+from vsim.optimization.data_center import VSDataCenter
+from vsim.optimization.solver import VSSolver
+from vsim.utils import create_event_log_from_frames, parse_log_records, profile_pipeline
+
+RESULTS_FILE_PATH = os.path.join("benchmarks", "results", "scaling_benchmark.jsonl")
+# Profiler stage of each benchmarked stage
+BENCHMARK_STAGES = {
+    "parse": "parse_log_records",
+    "event_log": "create_event_log_from_frames",
+    "occupancy": "analyze_all_locations_occupancy",
+    "distance_matrix": "data_center.distance_matrix",
+    "solver": "solver.optimize"
+}
+
+
+def get_terminal_size(num_lines: int) -> dict:
+    return {
+        "num_locations": min(max(num_lines // 200, 20), 1000),
+        "num_vehicles": min(max(num_lines // 2000, 10), 200),
+        "num_orders": get_num_orders_for_log(num_lines)
+    }
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(num_lines: int, data_dir: str, backend: str = "flow", num_candidates: Optional[int] = None, seed: int = 0) -> dict:
+    """
+    Generate the terminal and log of one size, and run all stages with the profiler enabled
+    :return: Report of the profiler (see `VSProfiler.get_report`) along with the size of the terminal
+    """
+    terminal_size = get_terminal_size(num_lines)
+    terminal_file_path = os.path.join(data_dir, f"terminal_{num_lines}.xlsx")
+    log_file_path = os.path.join(data_dir, f"log_{num_lines}.log")
+
+    start = time.perf_counter()
+    terminal = write_synthetic_terminal(terminal_file_path, **terminal_size, seed=seed, order_time_span=terminal_size["num_orders"] * 2)
+    num_written_lines = write_synthetic_log(log_file_path, num_lines=num_lines, seed=seed, terminal=terminal)
+    print(f"{num_lines:,} lines: generated {num_written_lines:,} lines, {terminal_size} in {time.perf_counter() - start:.1f} s")
+
+    with profile_pipeline() as profiler:
+        log_records = parse_log_records(log_file_path)
+        event_log_df = create_event_log_from_frames(log_records.to_frames(), optimize_dtypes=True)
+        del log_records
+        analyze_all_locations_occupancy(event_log_df)
+        del event_log_df
+
+        data_center = VSDataCenter(terminal_file_path)
+        VSSolver(data_center, backend=backend, num_candidates=num_candidates).optimize()
+
+    return {**terminal_size, **profiler.get_report()}
+
+
+def run_benchmark(sizes: list[int], backend: str = "flow", num_candidates: Optional[int] = None, results_file_path: str = RESULTS_FILE_PATH, data_dir: Optional[str] = None, seed: int = 0):
+    run_info = {
+        "run_id": datetime.now().isoformat(timespec="seconds"),
+        "commit": get_git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "backend": backend,
+        "num_candidates": num_candidates
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if data_dir is not None:
+            os.makedirs(data_dir, exist_ok=True)
+
+        results = []
+        for num_lines in sizes:
+            report = run_size(num_lines, data_dir=tmp_dir if data_dir is None else data_dir, backend=backend, num_candidates=num_candidates, seed=seed)
+            size_info = {"num_lines": num_lines, **{key: report[key] for key in ["num_locations", "num_vehicles", "num_orders"]}}
+            # Keep all stages of the profiler (including nested ones, e.g. the phases of the solver), and name the benchmarked ones
+            stage_names = {profiler_stage: stage for stage, profiler_stage in BENCHMARK_STAGES.items()}
+            for profiler_stage, stage_stats in report["stages"].items():
+                results.append({**run_info, **size_info, "stage": stage_names.get(profiler_stage, profiler_stage), **stage_stats})
+
+            for stage, profiler_stage in BENCHMARK_STAGES.items():
+                stage_stats = report["stages"][profiler_stage]
+                print(f"{stage:>16}: {stage_stats['wall_time']:>9.3f} s wall, {stage_stats['cpu_time']:>9.3f} s CPU, process peak RSS at stage end {(stage_stats['process_peak_rss_bytes'] or 0) / 1024 ** 2:>8.0f} MB")
+
+    os.makedirs(os.path.dirname(results_file_path) or ".", exist_ok=True)
+    with open(results_file_path, "a") as results_fp:
+        for result in results:
+            results_fp.write(json.dumps(result) + "\n")
+    print(f"Appended {len(results)} results of run {run_info['run_id']} to {results_file_path}")
+
+    return pd.DataFrame(results)
+
+
+def compare_runs(results_file_path: str = RESULTS_FILE_PATH, run_ids: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Compare the wall time of the benchmarked stages between runs (by default the last two), by size and stage
+    :return: A DataFrame with the wall time of each run, along with the ratio of the last to the first run
+    """
+    results_df = pd.read_json(results_file_path, lines=True, dtype={"run_id": str, "commit": str})
+    if run_ids is None:
+        run_ids = list(results_df["run_id"].drop_duplicates())[-2:]
+
+    results_df = results_df[results_df["run_id"].isin(run_ids) & results_df["stage"].isin(list(BENCHMARK_STAGES))]
+    comparison_df = results_df.pivot_table(index=["num_lines", "stage"], columns="run_id", values="wall_time", sort=False)[run_ids]
+    if len(run_ids) > 1:
+        comparison_df["ratio"] = comparison_df[run_ids[-1]] / comparison_df[run_ids[0]]
+
+    return comparison_df
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000], help="Numbers of log lines")
+    arg_parser.add_argument("--backend", default="flow", help="Solver backend of the optimization round")
+    arg_parser.add_argument("--num-candidates", type=int, default=None, help="Number of candidate orders per vehicle of the optimization round (all orders if not given)")
+    arg_parser.add_argument("--results-file", default=RESULTS_FILE_PATH)
+    arg_parser.add_argument("--data-dir", default=None, help="Directory to keep the generated terminals and logs in (a temporary directory if not given)")
+    arg_parser.add_argument("--compare", nargs="*", metavar="RUN_ID", default=None, help="Compare the results of runs (the last two if no run ID is given) instead of running the benchmark")
+    args = arg_parser.parse_args()
+
+    if args.compare is not None:
+        print(compare_runs(args.results_file, run_ids=args.compare or None).to_string(float_format="{:.3f}".format))
+    else:
+        run_benchmark(sizes=args.sizes, backend=args.backend, num_candidates=args.num_candidates, results_file_path=args.results_file, data_dir=args.data_dir)
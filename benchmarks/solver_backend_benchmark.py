@@ -0,0 +1,87 @@
+"""
+Compare the solver backends of `VSSolver` on synthetic terminals of increasing size, running the optimization rounds until all orders are assigned:
+    - mip: mixed-integer program solved by SCIP
+    - flow: min-cost flow through the relaxed location capacities (same optimal objective as the MIP)
+    - assignment: Hungarian algorithm on the cost matrix, ignoring the location capacities
+
+Optionally, each round is restricted to a rolling-horizon window of candidate orders (`--num-candidates`, `--time-horizon-minutes`).
+For each backend, the total objective over all rounds, the number of assignments exceeding the (unrelaxed) location capacities and the runtime are reported.
+
+Run from the root directory of the project:
+    python -m benchmarks.solver_backend_benchmark --sizes 30,10,60 100,20,300 300,50,2000
+    python -m benchmarks.solver_backend_benchmark --sizes 300,80,5000 --backends flow --num-candidates 5
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_terminal
+from vsim.optimization.data_center import VSDataCenter
+from vsim.optimization.solver import SOLVER_BACKENDS, VSSolver
+
+
+def count_capacity_violations(data_center: VSDataCenter, opt_x: list[tuple[str, str]]) -> int:
+    """
+    Number of assignments exceeding the capacity of the origin or destination location of their order
+    """
+    orders = data_center.get_remaining_orders()
+    location_counts = Counter()
+    for _, o in opt_x:
+        location_counts[orders[o]["origin"]] += 1
+        location_counts[orders[o]["dest"]] += 1
+
+    return int(sum(max(count - data_center.locations[location]["capacity"], 0) for location, count in location_counts.items()))
+
+
+def run_backend(terminal_file_path: str, backend: str, max_rounds: int = None, **solver_kwargs) -> dict:
+    data_center = VSDataCenter(terminal_file_path)
+    solver = VSSolver(data_center, backend=backend, **solver_kwargs)
+    num_rounds, total_obj, capacity_violations = 0, 0.0, 0
+    start = time.perf_counter()
+    while data_center.get_num_remaining_orders() > 0 and (max_rounds is None or num_rounds < max_rounds):
+        solver.optimize()
+        capacity_violations += count_capacity_violations(data_center, solver.opt_x)
+        for v, o in solver.opt_x:
+            data_center.update_vehicle_location(v, data_center.container_orders[o]["dest"])
+            data_center.toggle_order_status(o)
+        total_obj += solver.opt_obj
+        num_rounds += 1
+
+    return {"backend": backend, "rounds": num_rounds, "objective": total_obj, "capacity_violations": capacity_violations, "runtime": time.perf_counter() - start}
+
+
+def run_benchmark(sizes: list[tuple[int, int, int]], backends: list[str], max_rounds: int = None, seed: int = 0, **solver_kwargs):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_locations, num_vehicles, num_orders in sizes:
+            terminal_file_path = os.path.join(tmp_dir, f"terminal_{num_locations}_{num_vehicles}_{num_orders}.xlsx")
+            write_synthetic_terminal(terminal_file_path, num_locations=num_locations, num_vehicles=num_vehicles, num_orders=num_orders, seed=seed)
+            for backend in backends:
+                result = {"locations": num_locations, "vehicles": num_vehicles, "orders": num_orders, **run_backend(terminal_file_path, backend=backend, max_rounds=max_rounds, **solver_kwargs)}
+                results.append(result)
+                print(
+                    f"{num_locations:>5} locations, {num_vehicles:>4} vehicles, {num_orders:>6} orders | {backend:>10}: objective {result['objective']:>14,.0f}, "
+                    f"{result['capacity_violations']:>4} capacity violations, {result['rounds']:>4} rounds in {result['runtime']:.3f} s"
+                )
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", nargs="+", default=["30,10,60", "100,20,300", "300,50,2000"], help="Terminal sizes as <locations>,<vehicles>,<orders>")
+    arg_parser.add_argument("--backends", nargs="+", default=SOLVER_BACKENDS, choices=SOLVER_BACKENDS)
+    arg_parser.add_argument("--max-rounds", type=int, default=None, help="Limit the number of optimization rounds per terminal")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--num-candidates", type=int, default=None, help="Restrict each round to the K nearest orders per vehicle")
+    arg_parser.add_argument("--time-horizon-minutes", type=float, default=None, help="Restrict each round to orders first known within this horizon")
+    args = arg_parser.parse_args()
+    time_horizon = None if args.time_horizon_minutes is None else pd.Timedelta(minutes=args.time_horizon_minutes)
+    run_benchmark(
+        sizes=[tuple(int(n) for n in size.split(",")) for size in args.sizes], backends=args.backends, max_rounds=args.max_rounds, seed=args.seed,
+        num_candidates=args.num_candidates, time_horizon=time_horizon
+    )
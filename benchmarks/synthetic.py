@@ -0,0 +1,203 @@
+"""
+Synthetic simulator logs and terminals used by the benchmarks
+"""
+import heapq
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+LOCATIONS = ["QC001", "QC002", "YARD001.01", "YARD002.02", "RAIL001.01", "RAIL002.101", "WS001.01"]
+# Capacity of each location type as (min, max) number of straddle carriers, or None for no capacity limitation
+LOCATION_CAPACITIES = {"QC": (1, 3), "YARD": None, "RAIL": None, "WS": (1, 3)}
+LOCATION_FORMATS = {"QC": "QC{:03d}", "YARD": "YARD{:03d}.01", "RAIL": "RAIL{:03d}.01", "WS": "WS{:03d}.01"}
+# Speed of straddle carriers in mm/s, used to derive driving times from the distances within a synthetic terminal
+VEHICLE_SPEED = 5545
+
+
+def iter_synthetic_log_lines(seed: int = 0, num_vehicles: int = 20, terminal: Optional[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]] = None) -> Iterator[str]:
+    """
+    Generate log lines in all formats covered by `log_patterns` (plus some unrelated lines), where each container is submitted, scheduled, and then picked up and dropped by a vehicle.
+    Without a terminal, lines are generated endlessly between the fixed `LOCATIONS`, otherwise until all container orders of the terminal (see `generate_synthetic_terminal`) are handled
+    """
+    rng = random.Random(seed)
+    log_time = datetime(2024, 11, 14, 10, 0, 0)
+    fmt = lambda t: t.strftime("%Y-%m-%d %H:%M:%S")
+    tz_fmt = lambda t: fmt(t) + "+01:00"
+
+    if terminal is not None:
+        locations_df, vehicles_df, container_orders_df = terminal
+        coordinates = dict(zip(locations_df["Location Name"], zip(locations_df["X-Coordinate [mm]"].tolist(), locations_df["Y-Coordinate [mm]"].tolist())))
+        vehicle_ids = vehicles_df["ID"].tolist()
+        vehicle_locations = dict(zip(vehicle_ids, vehicles_df["StartLocation"]))
+        # Time each vehicle is free again along with its position in the fleet (to break ties), as a min-heap
+        vehicle_free_times = [(datetime.min, vehicle_idx) for vehicle_idx in range(len(vehicle_ids))]
+        container_orders_df = container_orders_df.sort_values("Time first known", kind="stable")
+        container_orders = zip(
+            container_orders_df["ContainerOrderId"], container_orders_df["OriginLocation"], container_orders_df["DestinationLocation"], container_orders_df["Time first known"].to_numpy().astype("datetime64[us]").tolist()
+        )
+        log_time = None
+
+    container_idx = 0
+    while True:
+        if terminal is None:
+            container_idx += 1
+            log_time += timedelta(seconds=rng.randint(0, 3))
+            co_id = f"CO_TFTU{container_idx:06d}"
+            vehicle_id = f"SC{rng.randint(1, num_vehicles):03d}"
+            routes = [("PICK", None), ("DROP", None)]
+        else:
+            container_order = next(container_orders, None)
+            if container_order is None:
+                return
+            co_id, origin, dest, time_first_known = container_order
+            log_time = time_first_known if log_time is None else max(log_time, time_first_known)
+            vehicle_free_time, vehicle_idx = heapq.heappop(vehicle_free_times)
+            vehicle_id = vehicle_ids[vehicle_idx]
+            routes = [("PICK", origin), ("DROP", dest)]
+        to_id = f"TO_{co_id}"
+        # Without a terminal, containers are scheduled right away regardless of the vehicle
+        schedule_time = log_time if terminal is None else max(log_time, vehicle_free_time)
+        lines = [
+            f"{fmt(log_time)} INFO adding TO {to_id}, EMT {tz_fmt(log_time - timedelta(seconds=2))}",
+            f"{fmt(schedule_time)} INFO {vehicle_id} schedule 1:{to_id}#{co_id}#PICK,2:{to_id}#{co_id}#DROP",
+        ]
+
+        event_time = schedule_time
+        for action, location in routes:
+            if terminal is None:
+                location = rng.choice(LOCATIONS)
+                driving_time = rng.randint(5, 200)
+                distance = driving_time * VEHICLE_SPEED
+            else:
+                position = coordinates[location]
+                vehicle_position = coordinates[vehicle_locations[vehicle_id]]
+                distance = abs(position[0] - vehicle_position[0]) + abs(position[1] - vehicle_position[1])
+                driving_time = max(round(distance / VEHICLE_SPEED), 1)
+                vehicle_locations[vehicle_id] = location
+            waiting_time = rng.choice([0, 0, 0, rng.randint(1, 120)])
+            travel_end = event_time + timedelta(seconds=driving_time)
+            lines.extend([
+                f"{fmt(event_time)} INFO {vehicle_id} starting {to_id}#{co_id}#{action}: travel {tz_fmt(event_time)} - {tz_fmt(travel_end)}, "
+                f"action {tz_fmt(travel_end)} - {tz_fmt(travel_end + timedelta(seconds=60))}",
+                f"{fmt(event_time)} INFO {vehicle_id} (TO: {to_id}, CO: {co_id}, {action}) driving to {location}; {driving_time + rng.randint(0, 2)} s; {distance} mm",
+            ])
+            if terminal is None:
+                position = (rng.randint(0, 900000), rng.randint(0, 900000))
+            lines.append(f"{fmt(travel_end)} INFO {vehicle_id} now at position ({position[0]}, {position[1]})")
+            if waiting_time:
+                lines.append(f"{fmt(travel_end + timedelta(seconds=waiting_time))} INFO {vehicle_id} (TO: {to_id}, CO: {co_id}, {action}) waited at {location}; {waiting_time} s")
+
+            action_start = travel_end + timedelta(seconds=waiting_time)
+            action_end = action_start + timedelta(seconds=60)
+            lane = rng.randint(0, 3)
+            lines.extend([
+                f"{fmt(action_start)} DEBUG location {location}: using lane {lane} for CO {co_id}",
+                f"{fmt(action_start)} INFO {vehicle_id} (TO: {to_id}, CO: {co_id}, {action}) working at {location}; 60 s",
+                f"{fmt(action_end)} DEBUG location {location}: freeing lane {lane} for CO {co_id}",
+                f"{fmt(action_end)} INFO {vehicle_id} (TO: {to_id}, CO: {co_id}, {action}) finished at {location}",
+                f"{fmt(action_end)} DEBUG finished expected schedule_element {to_id}#{co_id}#{action}",
+            ])
+            event_time = action_end
+
+        if terminal is not None:
+            heapq.heappush(vehicle_free_times, (event_time, vehicle_idx))
+        lines.append(f"{fmt(log_time)} DEBUG optimizer run took {rng.randint(1, 500)} ms")
+        for line in lines:
+            yield line + "\n"
+
+
+def generate_synthetic_log_lines(num_lines: int, seed: int = 0, num_vehicles: int = 20, terminal: Optional[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]] = None) -> list[str]:
+    """
+    The first `num_lines` lines of `iter_synthetic_log_lines` (fewer if the orders of the terminal are handled before)
+    """
+    return list(islice(iter_synthetic_log_lines(seed=seed, num_vehicles=num_vehicles, terminal=terminal), num_lines))
+
+
+def write_synthetic_log(log_file_path: str, num_lines: int, seed: int = 0, terminal: Optional[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]] = None) -> int:
+    """
+    Write the lines of `iter_synthetic_log_lines` to a file while they are generated, so that logs of any size can be written
+    :return: Number of written lines
+    """
+    num_written_lines = 0
+    with open(log_file_path, "w") as log_fp:
+        for line in islice(iter_synthetic_log_lines(seed=seed, terminal=terminal), num_lines):
+            log_fp.write(line)
+            num_written_lines += 1
+
+    return num_written_lines
+
+
+def get_num_orders_for_log(num_lines: int) -> int:
+    """
+    Number of container orders of a terminal for which `iter_synthetic_log_lines` generates at least `num_lines` lines (each container takes 19 to 21 lines)
+    """
+    return num_lines // 19 + 1
+
+
+def generate_synthetic_terminal(num_locations: int, num_vehicles: int, num_orders: int, seed: int = 0, location_capacities: Optional[dict] = None, order_time_span: int = 3600):
+    """
+    Generate a terminal as the Locations, Vehicles and ContainerOrders sheets expected by `VSDataCenter`, with random location coordinates, vehicle start locations and order routes
+    :param location_capacities: Capacity of each location type as (min, max) number of straddle carriers, drawn per location, or None for no capacity limitation (see `LOCATION_CAPACITIES`)
+    :param order_time_span: Orders are first known at random points in time within this number of seconds
+    :return: (locations_df, vehicles_df, container_orders_df) with the columns of the sheets
+    """
+    # Location names of the logs have three digits
+    if num_locations > 1000:
+        raise ValueError(f"At most 1000 locations are supported, got {num_locations}")
+    if location_capacities is None:
+        location_capacities = LOCATION_CAPACITIES
+
+    rng = np.random.default_rng(seed)
+    location_types = list(LOCATION_FORMATS)
+    location_names = [LOCATION_FORMATS[location_types[loc_idx % len(location_types)]].format(loc_idx) for loc_idx in range(num_locations)]
+    capacities = []
+    for loc_idx in range(num_locations):
+        capacity_range = location_capacities.get(location_types[loc_idx % len(location_types)])
+        capacities.append(None if capacity_range is None else float(rng.integers(capacity_range[0], capacity_range[1] + 1)))
+    locations_df = pd.DataFrame({
+        "Location Name": location_names,
+        "X-Coordinate [mm]": rng.integers(0, 900000, num_locations),
+        "Y-Coordinate [mm]": rng.integers(0, 300000, num_locations),
+        "Capacity limitation (# SC)": capacities
+    })
+
+    start_time = pd.Timestamp("2024-11-14 10:00")
+    vehicles_df = pd.DataFrame({
+        "ID": [f"SC{vehicle_idx + 1:03d}" for vehicle_idx in range(num_vehicles)],
+        "StartLocation": rng.choice(location_names, num_vehicles),
+        "LogOn": start_time,
+        "LogOff": pd.NaT
+    })
+
+    co_ids = [f"CO_TFTU{order_idx + 1:06d}" for order_idx in range(num_orders)]
+    container_orders_df = pd.DataFrame({
+        "TractorOrderId": [f"TO_{co_id}" for co_id in co_ids],
+        "ContainerOrderId": co_ids,
+        "ContainerName": [f"TFTU{order_idx + 1:06d}" for order_idx in range(num_orders)],
+        "Length": 40,
+        "OriginLocation": rng.choice(location_names, num_orders),
+        "DestinationLocation": rng.choice(location_names, num_orders),
+        "Time first known": start_time + pd.to_timedelta(rng.integers(0, order_time_span, num_orders), unit="s")
+    })
+
+    return locations_df, vehicles_df, container_orders_df
+
+
+def write_synthetic_terminal(terminal_file_path: str, num_locations: int, num_vehicles: int, num_orders: int, seed: int = 0, location_capacities: Optional[dict] = None, order_time_span: int = 3600):
+    """
+    Write a terminal of `generate_synthetic_terminal` to an Excel file as expected by `VSDataCenter`. By default, quay cranes and workshops are limited to 1-3 straddle carriers, the other locations have no
+    capacity limitation.
+    :return: (locations_df, vehicles_df, container_orders_df) of the terminal, e.g. to generate matching logs with `write_synthetic_log`
+    """
+    terminal = generate_synthetic_terminal(
+        num_locations=num_locations, num_vehicles=num_vehicles, num_orders=num_orders, seed=seed, location_capacities=location_capacities, order_time_span=order_time_span
+    )
+    with pd.ExcelWriter(terminal_file_path) as writer:
+        for sheet_name, sheet_df in zip(["Locations", "Vehicles", "ContainerOrders"], terminal):
+            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    return terminal
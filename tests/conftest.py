@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from benchmarks.synthetic import generate_synthetic_log_lines, generate_synthetic_terminal, write_synthetic_terminal
+from vsim.utils import get_parsed_logs
+from vsim.utils.log_parser import action_pattern, co_id_pattern, log_patterns, parse_log, postprocess_parsed_log, read_log_file, to_id_pattern
+
+TERMINAL_SIZE = {"num_locations": 20, "num_vehicles": 5, "num_orders": 60}
+
+
+def get_baseline_parsed_logs(log_file_path: str):
+    """
+    Parsed logs as extracted by the original line-by-line parser, i.e. `parse_log` followed by `postprocess_parsed_log`
+    """
+    logs_by_pattern = {log_pattern: [] for log_pattern in log_patterns}
+    parsed_logs = []
+    for log_line in read_log_file(log_file_path=log_file_path):
+        log_line = log_line.strip()
+        pattern, extracted_data = parse_log(log_line)
+        if pattern:
+            extracted_data = postprocess_parsed_log(extracted_data)
+            if pattern == "init_scheduling":
+                extracted_data["schedules"] = re.findall(rf"\d:(?P<to_id>{to_id_pattern})#(?P<co_id>{co_id_pattern})#(?P<action>{action_pattern})", log_line)
+            logs_by_pattern[pattern].append(extracted_data)
+            parsed_logs.append((pattern, extracted_data))
+
+    return logs_by_pattern, parsed_logs
+
+
+@pytest.fixture(scope="session")
+def log_file_path(tmp_path_factory) -> str:
+    log_file_path = tmp_path_factory.mktemp("logs") / "synthetic.log"
+    log_file_path.write_text("".join(generate_synthetic_log_lines(num_lines=4000)))
+    return str(log_file_path)
+
+
+@pytest.fixture(scope="session")
+def parsed_logs(log_file_path) -> list[tuple[str, dict]]:
+    return get_parsed_logs(log_file_path)[1]
+
+
+@pytest.fixture(scope="session")
+def baseline_parsed_logs(log_file_path) -> tuple[dict[str, list[dict]], list[tuple[str, dict]]]:
+    return get_baseline_parsed_logs(log_file_path)
+
+
+@pytest.fixture(scope="session")
+def terminal_file_path(tmp_path_factory) -> str:
+    terminal_file_path = tmp_path_factory.mktemp("terminals") / "terminal.xlsx"
+    write_synthetic_terminal(str(terminal_file_path), **TERMINAL_SIZE, seed=0)
+    return str(terminal_file_path)
+
+
+@pytest.fixture(scope="session")
+def terminal_log_file_path(tmp_path_factory) -> str:
+    """
+    Log of handling all orders of the terminal of `terminal_file_path`
+    """
+    terminal_log_file_path = tmp_path_factory.mktemp("logs") / "terminal.log"
+    terminal = generate_synthetic_terminal(**TERMINAL_SIZE, seed=0)
+    terminal_log_file_path.write_text("".join(generate_synthetic_log_lines(num_lines=10 ** 6, terminal=terminal)))
+    return str(terminal_log_file_path)
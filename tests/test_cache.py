@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+
+from vsim.utils import VSCache, get_processed_metadata
+
+
+def test_cached_logs_match_baseline_parser(tmp_path, log_file_path, baseline_parsed_logs):
+    cache = VSCache(cache_dir=str(tmp_path / "cache"))
+    # First call parses the file (miss), the second one loads the entry (hit)
+    assert cache.get_parsed_logs(log_file_path) == baseline_parsed_logs
+    assert cache.get_parsed_logs(log_file_path) == baseline_parsed_logs
+
+    log_dfs = cache.get_parsed_log_frames(log_file_path)
+    for pattern, records in baseline_parsed_logs[0].items():
+        assert len(log_dfs[pattern]) == len(records)
+
+
+def test_cached_metadata_matches_processed_metadata(tmp_path, terminal_file_path):
+    cache = VSCache(cache_dir=str(tmp_path / "cache"))
+    for _ in range(2):
+        for cached_df, metadata_df in zip(cache.get_processed_metadata(terminal_file_path), get_processed_metadata(meta_file_path=terminal_file_path)):
+            pd.testing.assert_frame_equal(cached_df, metadata_df)
+
+
+def test_unparsable_entry_meta_is_a_miss(tmp_path, log_file_path, baseline_parsed_logs):
+    cache_dir = tmp_path / "cache"
+    cache = VSCache(cache_dir=str(cache_dir))
+    cache.get_parsed_logs(log_file_path)
+    (entry_dir,) = cache_dir.iterdir()
+
+    for corrupt_meta in ['{"source_path": ', "{}", "[]"]:
+        (entry_dir / "meta.json").write_text(corrupt_meta)
+        assert cache.get_cache_size() == 0
+        assert cache.get_parsed_logs(log_file_path) == baseline_parsed_logs
+        assert cache.get_cache_size() > 0
+
+
+def test_entry_meta_is_replaced_on_hit(tmp_path, log_file_path):
+    cache_dir = tmp_path / "cache"
+    cache = VSCache(cache_dir=str(cache_dir))
+    cache.get_parsed_logs(log_file_path)
+    (entry_dir,) = cache_dir.iterdir()
+    meta_inode = os.stat(entry_dir / "meta.json").st_ino
+
+    cache.get_parsed_logs(log_file_path)
+    # The metadata is written into a new file which replaces the old one, without leaving temporary files behind
+    assert os.stat(entry_dir / "meta.json").st_ino != meta_inode
+    assert not [file_name for file_name in os.listdir(entry_dir) if file_name.endswith(".tmp")]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vsim.utils import create_event_log, create_position_tracking_df, get_parsed_logs, get_processed_metadata
+from vsim.utils.data import apply_dtype_schema, create_event_log_from_frames, create_log_frames, create_vehicle_routes, metadata_dtypes
+
+
+def create_baseline_position_tracking_df(position_tracking_logs: list[dict], vehicles_meta_df: pd.DataFrame, locations_meta_df: pd.DataFrame):
+    """
+    Routes of the vehicles as created by the original row-wise implementation of `create_position_tracking_df`
+    """
+    vehicle_location_df = vehicles_meta_df.merge(locations_meta_df, how="left", left_on="start_location", right_on="location_name")
+
+    def add_initial_location(row):
+        vehicle_rec = vehicle_location_df[vehicle_location_df["id"] == row["vehicle_id"]]
+        row["x"].insert(0, vehicle_rec["x"].iloc[0])
+        row["y"].insert(0, vehicle_rec["y"].iloc[0])
+        return row
+
+    position_tracking_df = pd.DataFrame(position_tracking_logs)
+    position_tracking_df = position_tracking_df.merge(locations_meta_df, how="left", on=["x", "y"])
+    position_tracking_df = position_tracking_df.groupby("vehicle_id", as_index=False).agg({"x": lambda x: list(x), "y": lambda y: list(y)})
+    position_tracking_df.apply(lambda row: add_initial_location(row), axis=1)
+
+    return position_tracking_df
+
+
+def test_event_log_from_frames_matches_event_log(parsed_logs):
+    pd.testing.assert_frame_equal(create_event_log_from_frames(create_log_frames(parsed_logs)), create_event_log(parsed_logs))
+
+
+def test_event_log_from_frames_without_schedules(parsed_logs):
+    log_dfs = create_log_frames(parsed_logs)
+    del log_dfs["travel_action_schedule"]
+
+    with pytest.raises(KeyError, match="No preceding optimizer schedule"):
+        create_event_log_from_frames(log_dfs)
+
+
+def test_dtype_schema_with_missing_values():
+    co_meta_df = pd.DataFrame({"co_id": ["CO_TFTU000001", "CO_TFTU000002", "CO_TFTU000003"], "length": [20, np.nan, 40]})
+    locations_meta_df = pd.DataFrame({"location_name": ["QC001", "YARD001.01"], "x": [1000.0, np.nan], "y": [2000, 3000]})
+
+    co_meta_df = apply_dtype_schema(co_meta_df, metadata_dtypes)
+    locations_meta_df = apply_dtype_schema(locations_meta_df, metadata_dtypes)
+    assert (str(co_meta_df["length"].dtype), str(locations_meta_df["x"].dtype), str(locations_meta_df["y"].dtype)) == ("Int8", "Int32", "int32")
+    assert co_meta_df["length"].tolist() == [20, pd.NA, 40]
+
+
+def test_optimized_metadata_dtypes(terminal_file_path):
+    for optimized_df, metadata_df in zip(get_processed_metadata(terminal_file_path, optimize_dtypes=True), get_processed_metadata(terminal_file_path)):
+        pd.testing.assert_frame_equal(optimized_df, metadata_df, check_dtype=False, check_categorical=False)
+
+
+def test_vehicle_routes_match_baseline(terminal_file_path, terminal_log_file_path):
+    logs_by_pattern, _ = get_parsed_logs(terminal_log_file_path)
+    locations_meta_df, vehicles_meta_df, _ = get_processed_metadata(terminal_file_path)
+    position_tracking_logs = logs_by_pattern["position_tracking"]
+    assert position_tracking_logs
+
+    position_tracking_df = create_position_tracking_df(position_tracking_logs, vehicles_meta_df=vehicles_meta_df, locations_meta_df=locations_meta_df)
+    baseline_position_tracking_df = create_baseline_position_tracking_df(position_tracking_logs, vehicles_meta_df=vehicles_meta_df, locations_meta_df=locations_meta_df)
+    assert position_tracking_df.to_dict("records") == baseline_position_tracking_df.to_dict("records")
+
+    vehicle_routes = create_vehicle_routes(pd.DataFrame(position_tracking_logs), vehicles_meta_df=vehicles_meta_df, locations_meta_df=locations_meta_df)
+    for route in baseline_position_tracking_df.itertuples():
+        assert vehicle_routes.get_route(route.vehicle_id).tolist() == [list(point) for point in zip(route.x, route.y)]
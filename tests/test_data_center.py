@@ -0,0 +1,27 @@
+import pickle
+
+from vsim.optimization.data_center import VSDataCenter
+from vsim.optimization.solver import VSSolver
+
+
+def test_remaining_orders_are_a_snapshot(terminal_file_path):
+    data_center = VSDataCenter(terminal_file_path)
+    remaining_orders = data_center.get_remaining_orders()
+    num_orders = len(remaining_orders)
+    for order_id in remaining_orders:
+        data_center.toggle_order_status(order_id)
+
+    assert len(remaining_orders) == num_orders
+    assert data_center.get_num_remaining_orders() == 0
+    assert pickle.loads(pickle.dumps(remaining_orders)) == remaining_orders
+
+
+def test_candidate_orders_survive_update_environment(terminal_file_path):
+    data_center = VSDataCenter(terminal_file_path)
+    solver = VSSolver(data_center, backend="flow")
+    solver.optimize()
+    candidate_order_ids = list(solver.candidate_orders)
+    solver.update_environment()
+
+    assert candidate_order_ids == list(solver.candidate_orders)
+    assert len(candidate_order_ids) == data_center.get_num_remaining_orders() + len(solver.opt_x)
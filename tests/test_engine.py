@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+
+from vsim.optimization.data_center import VSDataCenter
+from vsim.optimization.solver import VSSolver
+from vsim.simulation import simulate_timeline
+from vsim.simulation.engine import VSEventSimulator
+
+PROCESS_START_TIME = datetime(2025, 2, 17, 8)
+
+
+def test_location_without_lanes_raises(terminal_file_path):
+    data_center = VSDataCenter(terminal_file_path)
+    location = next(location for location, loc_data in data_center.locations.items() if loc_data['capacity'] != float("inf"))
+    data_center.locations[location]['capacity'] = 0
+    simulator = VSEventSimulator(data_center, process_start_time=PROCESS_START_TIME)
+
+    with pytest.raises(ValueError, match=location):
+        simulator._request_lane(location, PROCESS_START_TIME)
+
+
+@pytest.mark.parametrize("factor", [0, -1])
+def test_non_positive_capacity_factor_raises(terminal_file_path, factor):
+    with pytest.raises(ValueError):
+        VSDataCenter(terminal_file_path).scale_location_capacities(factor)
+
+
+def test_timeline_respects_location_capacities(terminal_file_path):
+    data_center = VSDataCenter(terminal_file_path)
+    tracking_records = simulate_timeline(data_center, VSSolver(data_center, backend="flow"), process_start_time=PROCESS_START_TIME)
+
+    assert len(tracking_records) == len(data_center.container_orders)
+    for location, loc_data in data_center.locations.items():
+        intervals = [(record["pickup_start_time"], record["pickup_end_time"]) for record in tracking_records if record["origin"] == location]
+        intervals += [(record["drop_start_time"], record["drop_end_time"]) for record in tracking_records if record["dest"] == location]
+        for start, _ in intervals:
+            assert sum(1 for other_start, other_end in intervals if other_start <= start < other_end) <= loc_data['capacity']
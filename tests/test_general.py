@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from vsim.utils.general import VSOccupancyIndex, estimate_start_time, get_overlapping_processes
+
+
+def create_random_intervals(rng: random.Random, num_intervals: int) -> list[tuple[int, int]]:
+    # Small integer range, so that starts and ends coincide with each other and with the arrival times
+    intervals = []
+    for _ in range(num_intervals):
+        start = rng.randint(0, 50)
+        intervals.append((start, start + rng.choice([0, 0, rng.randint(1, 10)])))
+    return intervals
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_occupancy_index_matches_list_scan(seed):
+    rng = random.Random(seed)
+    intervals = create_random_intervals(rng, rng.randint(0, 60))
+    occupancy_index = VSOccupancyIndex(intervals)
+
+    for t in range(-1, 62):
+        overlapping_intervals = get_overlapping_processes(t, prev_process_intervals=intervals)
+        assert sorted(get_overlapping_processes(t, prev_process_intervals=occupancy_index)) == sorted(overlapping_intervals)
+        assert occupancy_index.count_active(t) == len(overlapping_intervals)
+        for capacity in [1, 2, 5]:
+            assert estimate_start_time(t, occupancy_index, loc_capacity=capacity) == estimate_start_time(t, overlapping_intervals, loc_capacity=capacity)
+
+
+def test_occupancy_index_ties_at_arrival_time():
+    # Zero-length interval and intervals ending or starting exactly at the arrival time are active
+    intervals = [(5, 5), (1, 5), (5, 9), (6, 7), (0, 4)]
+    occupancy_index = VSOccupancyIndex(intervals)
+
+    assert sorted(occupancy_index.get_active_intervals(5)) == sorted(get_overlapping_processes(5, intervals)) == [(1, 5), (5, 5), (5, 9)]
+    assert estimate_start_time(5, occupancy_index, loc_capacity=3) == estimate_start_time(5, get_overlapping_processes(5, intervals), loc_capacity=3) == 5
+    assert occupancy_index.get_earliest_start_time(5, capacity=4) == 5
+
+
+def test_occupancy_index_incremental_inserts():
+    rng = random.Random(0)
+    intervals = []
+    occupancy_index = VSOccupancyIndex()
+    for start, end in create_random_intervals(rng, 200):
+        intervals.append((start, end))
+        occupancy_index.insert(start, end)
+        t = rng.randint(0, 60)
+        assert estimate_start_time(t, occupancy_index, loc_capacity=3) == estimate_start_time(t, get_overlapping_processes(t, intervals), loc_capacity=3)
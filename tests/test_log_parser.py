@@ -0,0 +1,35 @@
+import pytest
+
+from vsim.utils import get_parsed_logs, iter_parsed_logs, profile_pipeline
+
+
+def test_streamed_logs_match_baseline_parser(log_file_path, baseline_parsed_logs):
+    assert list(iter_parsed_logs(log_file_path)) == baseline_parsed_logs[1]
+
+
+def test_streamed_logs_of_selected_patterns(log_file_path, baseline_parsed_logs):
+    patterns = ["driving", "action"]
+    expected_logs = [(pattern, log_data) for pattern, log_data in baseline_parsed_logs[1] if pattern in patterns]
+    assert list(iter_parsed_logs(log_file_path, patterns=patterns)) == expected_logs
+
+    with pytest.raises(ValueError):
+        next(iter_parsed_logs(log_file_path, patterns=["unknown"]))
+
+
+def test_parallel_parsing_matches_baseline_parser(log_file_path, baseline_parsed_logs):
+    assert get_parsed_logs(log_file_path, num_workers=1) == baseline_parsed_logs
+    assert get_parsed_logs(log_file_path, num_workers=3) == baseline_parsed_logs
+
+
+def test_parallel_parsing_merges_worker_counters(log_file_path):
+    with profile_pipeline() as profiler:
+        get_parsed_logs(log_file_path, num_workers=1)
+    with profile_pipeline() as parallel_profiler:
+        get_parsed_logs(log_file_path, num_workers=3)
+
+    with open(log_file_path) as log_fp:
+        num_lines = sum(1 for _ in log_fp)
+    assert parallel_profiler.counters["log_lines"] == profiler.counters["log_lines"] == num_lines
+    assert parallel_profiler.parse_counters == profiler.parse_counters
+    assert sum(parallel_profiler.parse_counters.values()) >= num_lines
+    assert parallel_profiler.stages["parse_log_chunk"].items == num_lines
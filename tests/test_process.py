@@ -0,0 +1,39 @@
+import numpy as np
+
+from vsim.analysis.process import analyze_running_cases, create_case_summary_df
+from vsim.utils import create_event_log
+
+
+def test_case_distances_of_parsed_event_log(parsed_logs):
+    case_summary_df = create_case_summary_df(create_event_log(parsed_logs))
+
+    driving_distances = {}
+    for pattern, log_data in parsed_logs:
+        if pattern == "driving":
+            driving_distances[log_data["co_id"]] = driving_distances.get(log_data["co_id"], 0) + log_data["distance_in_mm"]
+    case_distances = case_summary_df.set_index("case_id")["distance"]
+    assert case_distances[list(driving_distances)].tolist() == list(driving_distances.values())
+    assert case_distances.sum() > 0
+
+
+def test_case_distances_without_distance_column(parsed_logs):
+    case_summary_df = create_case_summary_df(create_event_log(parsed_logs).drop(columns="distance"))
+    assert np.isnan(case_summary_df["distance"]).all()
+
+
+def test_running_cases_with_truncated_cases(parsed_logs):
+    event_log_df = create_event_log(parsed_logs)
+    case_ids = event_log_df["case:concept:name"].unique()
+    # Cut the first cases off after their drop was scheduled, so that they end with "schedule drop by optimizer"
+    truncated_case_ids = case_ids[:10]
+    is_drop_event = event_log_df["concept:name"].isin(["dispatch vehicle to drop container", "wait for free lane to drop", "drop container"])
+    event_log_df = event_log_df[~(event_log_df["case:concept:name"].isin(truncated_case_ids) & is_drop_event)]
+    ended_case_ids = event_log_df.loc[(event_log_df["concept:name"] == "drop container") & (event_log_df["lifecycle:transition"] == "complete"), "case:concept:name"].unique()
+
+    running_cases, timestamps = analyze_running_cases(event_log_df)
+    assert min(running_cases) >= 0
+    assert running_cases[-1] == len(case_ids) - len(ended_case_ids)
+    assert len(running_cases) == len(timestamps) == len(event_log_df)
+
+    running_on_grid, _ = analyze_running_cases(event_log_df, freq="1min")
+    assert min(running_on_grid) >= 0 and running_on_grid[-1] == running_cases[-1]
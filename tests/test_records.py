@@ -0,0 +1,20 @@
+import pandas as pd
+
+from vsim.utils import create_event_log
+from vsim.utils.data import create_event_log_from_frames
+from vsim.utils.records import parse_log_records
+
+
+def test_record_frames_match_baseline_parser(log_file_path, baseline_parsed_logs):
+    logs_by_pattern, parsed_logs = baseline_parsed_logs
+    log_records = parse_log_records(log_file_path)
+
+    assert len(log_records) == len(parsed_logs)
+    for pattern, logs in logs_by_pattern.items():
+        if logs:
+            pd.testing.assert_frame_equal(log_records.to_frame(pattern), pd.DataFrame(logs), check_like=True)
+
+
+def test_event_log_from_records_matches_baseline_parser(log_file_path, baseline_parsed_logs):
+    event_log_df = create_event_log_from_frames(parse_log_records(log_file_path).to_frames())
+    pd.testing.assert_frame_equal(event_log_df, create_event_log(baseline_parsed_logs[1]))
@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+from vsim.analysis.statistics import VSKpiStatistics
+from vsim.utils import create_action_df, create_event_log
+
+
+def create_event_log_df(events: list[tuple[str, str, str, str]]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "case:concept:name": [case_id for case_id, _, _, _ in events],
+        "concept:name": [activity for _, activity, _, _ in events],
+        "time:timestamp": pd.to_datetime([timestamp for _, _, timestamp, _ in events], utc=True),
+        "lifecycle:transition": "complete",
+        "org:resource": [vehicle for _, _, _, vehicle in events]
+    })
+
+
+EVENTS = [
+    ("c1", "submit", "2025-02-17 08:00:00", "SC001"),
+    ("c2", "submit", "2025-02-17 08:00:30", "SC002"),
+    ("c1", "pick container", "2025-02-17 08:01:00", "SC001"),
+    ("c2", "pick container", "2025-02-17 08:02:00", "SC002"),
+    ("c1", "drop container", "2025-02-17 08:03:00", "SC001"),
+    ("c2", "drop container", "2025-02-17 08:05:30", "SC002")
+]
+
+
+def get_case_durations(kpi_statistics: VSKpiStatistics) -> dict:
+    return {vehicle: kpi_statistics.get_accumulator("case_duration", "vehicle", vehicle).stats.mean for vehicle in ["SC001", "SC002"]}
+
+
+@pytest.mark.parametrize("split", range(1, len(EVENTS)))
+def test_case_durations_across_batches(split):
+    event_log_df = create_event_log_df(EVENTS)
+    kpi_statistics = VSKpiStatistics()
+    kpi_statistics.add_events(event_log_df.iloc[:split])
+    kpi_statistics.add_events(event_log_df.iloc[split:])
+
+    assert get_case_durations(kpi_statistics) == {"SC001": 180, "SC002": 300}
+    assert kpi_statistics.get_accumulator("case_duration").stats.count == 2
+    assert kpi_statistics.num_running_cases == 0
+
+
+def test_repeated_case_end_events():
+    # All events of the log appended a second time, within one batch and in a later batch
+    event_log_df = create_event_log_df(EVENTS + EVENTS)
+    kpi_statistics = VSKpiStatistics()
+    kpi_statistics.add_events(event_log_df)
+    kpi_statistics.add_events(create_event_log_df(EVENTS))
+
+    assert get_case_durations(kpi_statistics) == {"SC001": 180, "SC002": 300}
+    assert kpi_statistics.get_accumulator("case_duration").stats.count == 2
+    assert kpi_statistics.num_running_cases == 0
+
+
+def test_add_event_matches_add_events():
+    event_log_df = create_event_log_df(EVENTS + EVENTS)
+    kpi_statistics = VSKpiStatistics()
+    for event in event_log_df.to_dict("records"):
+        kpi_statistics.add_event(event)
+
+    assert get_case_durations(kpi_statistics) == {"SC001": 180, "SC002": 300}
+    assert kpi_statistics.get_accumulator("case_duration").stats.count == 2
+
+
+def test_parsed_event_log_matches_action_df(parsed_logs):
+    event_log_df = create_event_log(parsed_logs)
+    kpi_statistics = VSKpiStatistics()
+    for start in range(0, len(event_log_df), 501):
+        kpi_statistics.add_events(event_log_df.iloc[start:start + 501])
+    action_statistics = VSKpiStatistics()
+    action_statistics.add_action_df(create_action_df([log_data for pattern, log_data in parsed_logs if pattern == "action"]))
+
+    # The event log only has waiting events for actions which waited
+    action_waiting_stats = action_statistics.get_accumulator("waiting_time", "activity", "PICK").stats
+    waiting_stats = kpi_statistics.get_accumulator("waiting_time", "activity", "PICK").stats
+    assert waiting_stats.count > 0
+    assert waiting_stats.mean * waiting_stats.count == pytest.approx(action_waiting_stats.mean * action_waiting_stats.count)
+    for action in ["PICK", "DROP"]:
+        processing_stats = kpi_statistics.get_accumulator("processing_time", "activity", action).stats
+        action_processing_stats = action_statistics.get_accumulator("processing_time", "activity", action).stats
+        assert (processing_stats.count, processing_stats.mean) == (action_processing_stats.count, pytest.approx(action_processing_stats.mean))
+
+
+def test_parsed_event_log_driving_times(parsed_logs):
+    event_log_df = create_event_log(parsed_logs)
+    kpi_statistics = VSKpiStatistics()
+    kpi_statistics.add_events(event_log_df)
+    streamed_statistics = VSKpiStatistics()
+    for event in event_log_df.to_dict("records"):
+        streamed_statistics.add_event(event)
+
+    dispatch_df = event_log_df[event_log_df["concept:name"] == "dispatch vehicle to drop container"]
+    dispatch_times = dispatch_df.pivot(index="case:concept:name", columns="lifecycle:transition", values="time:timestamp")
+    driving_times = (dispatch_times["complete"] - dispatch_times["start"]).dt.total_seconds()
+    for statistics in [kpi_statistics, streamed_statistics]:
+        driving_stats = statistics.get_accumulator("driving_time", "activity", "DROP").stats
+        assert (driving_stats.count, driving_stats.mean) == (len(driving_times), pytest.approx(driving_times.mean()))
+        assert statistics.get_accumulator("distance", "activity", "DROP").stats.count == len(driving_times)
@@ -1,48 +1,127 @@
+from typing import Iterable, Optional
+
 import numpy as np
 import pandas as pd
-import pm4py
+
+from ..utils.profiling import profiled
 
 
-def analyze_case_durations(event_log_df: pd.DataFrame, bin_size: int = 500):
+@profiled("create_case_summary_df", count_items=len)
+def create_case_summary_df(event_log_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarize each case (container) of the event log in one pass over the events sorted by case and time
+    :param event_log_df: Event log (e.g. from `create_event_log` or `create_simulated_event_log`)
+    :return: A DataFrame with one row per case: case_id, vehicle_id, submission_time, first_dispatch_time, pick/drop start and end times, waiting_time, driving_time, distance and duration (in seconds)
+    """
+    time_sorted_df = event_log_df.sort_values(by=['case:concept:name', 'time:timestamp'], kind="stable", ignore_index=True)
+    # Compare the distinct activities only, instead of the activity of each event
+    activity_codes, activities = pd.factorize(time_sorted_df['concept:name'])
+    activities = pd.Index(activities.astype(str))
+    timestamps = time_sorted_df['time:timestamp']
+    is_start = (time_sorted_df['lifecycle:transition'] == "start").to_numpy()
+    is_complete = (time_sorted_df['lifecycle:transition'] == "complete").to_numpy()
+
+    # Signed elapsed seconds of the start (-) and complete (+) events, whose sums per case give the total duration of an activity
+    elapsed_seconds = (timestamps - timestamps.min()).dt.total_seconds().to_numpy()
+    signed_seconds = np.where(is_complete, elapsed_seconds, 0.0) - np.where(is_start, elapsed_seconds, 0.0)
+    is_waiting = activities.str.startswith("wait")[activity_codes]
+    is_driving = activities.str.startswith("dispatch vehicle")[activity_codes]
+    is_pick = (activities == "pick container")[activity_codes]
+    is_drop = (activities == "drop container")[activity_codes]
+    has_distance = 'distance' in time_sorted_df.columns
+    distances = pd.to_numeric(time_sorted_df['distance'], errors="coerce").to_numpy() if has_distance else np.zeros(len(time_sorted_df))
+    vehicles = time_sorted_df['org:resource'].astype(object) if 'org:resource' in time_sorted_df.columns else pd.Series(None, index=time_sorted_df.index, dtype=object)
+
+    # Timestamps of the milestones, where only the events of the milestone activity are kept (others are NaT and skipped by first/last). Columns are kept as pandas
+    # Series, since converting time zone aware timestamps to numpy creates objects
+    milestones = {
+        "submission_time": ("first", (activities == "submit for scheduling")[activity_codes] & is_start),
+        "first_dispatch_time": ("first", is_driving & is_start),
+        "pick_start_time": ("first", is_pick & is_start),
+        "pick_end_time": ("last", is_pick & is_complete),
+        "drop_start_time": ("first", is_drop & is_start),
+        "drop_end_time": ("last", is_drop & is_complete)
+    }
+    case_df = pd.DataFrame({
+        "case_id": time_sorted_df['case:concept:name'],
+        "vehicle_id": vehicles.where(vehicles != ""),
+        "start_time": timestamps,
+        "end_time": timestamps,
+        **{milestone: timestamps.where(mask) for milestone, (_, mask) in milestones.items()},
+        "waiting_time": np.where(is_waiting, signed_seconds, 0.0),
+        "driving_time": np.where(is_driving, signed_seconds, 0.0),
+        "distance": np.where(is_complete, np.nan_to_num(distances), 0.0)
+    })
+
+    case_summary_df = case_df.groupby("case_id", sort=False, observed=True).agg(
+        vehicle_id=("vehicle_id", "first"),
+        start_time=("start_time", "first"),
+        end_time=("end_time", "last"),
+        **{milestone: (milestone, aggregation) for milestone, (aggregation, _) in milestones.items()},
+        waiting_time=("waiting_time", "sum"),
+        driving_time=("driving_time", "sum"),
+        distance=("distance", "sum")
+    )
+    case_summary_df["duration"] = (case_summary_df["end_time"] - case_summary_df["start_time"]).dt.total_seconds()
+    if not has_distance:
+        case_summary_df["distance"] = np.nan
+
+    return case_summary_df.drop(columns=["start_time", "end_time"]).reset_index()
+
+
+@profiled("analyze_case_durations")
+def analyze_case_durations(event_log_df: pd.DataFrame, bin_size: int = 500, case_summary_df: Optional[pd.DataFrame] = None):
     """
     How long does each case (container) in the process take from the tine of submission to the optimizer until it;s dropped at the destination
+    :param event_log_df: Event log
+    :param bin_size: Size of the bins of the case durations in seconds
+    :param case_summary_df: Summary of the cases from `create_case_summary_df`, if already created for the event log
+    :return: (case_durations, bins, binned_values), with the case durations in increasing order
     """
-    case_durations = pm4py.get_all_case_durations(event_log_df)
+    if case_summary_df is None:
+        case_summary_df = create_case_summary_df(event_log_df)
+
+    case_durations = np.sort(case_summary_df["duration"].to_numpy()).tolist()
     bins = list(range(0, int(np.ceil(max(case_durations) / bin_size) + 1) * bin_size, bin_size))
     binned_values = np.digitize(case_durations, bins)
     return case_durations, bins, binned_values
 
 
-def analyze_running_cases(event_log_df: pd.DataFrame):
+@profiled("analyze_running_cases")
+def analyze_running_cases(event_log_df: pd.DataFrame, freq: Optional[str] = None, end_activities: Iterable[str] = ("drop container",)):
     """
-    Determines how many cases are running at every point of time throughout the process
+    Determines how many cases are running at every point of time throughout the process. A case runs from its first event until its last complete event, if the case reached one of the end activities
+    :param event_log_df: Event log
+    :param freq: If given (e.g. "1min"), the number of running cases is sampled on a fixed time grid with this frequency instead of at every event
+    :param end_activities: Activities which finish a case once completed. Cases which never complete one of them (e.g. truncated at the end of the log) stay open
+    :return: (running_cases, timestamps)
     """
+    time_sorted_df = event_log_df.sort_values(by='time:timestamp', kind="stable")
+    case_ids = time_sorted_df['case:concept:name']
+    is_complete = (time_sorted_df['lifecycle:transition'] == "complete").to_numpy()
+    is_end = is_complete & time_sorted_df['concept:name'].isin(list(end_activities)).to_numpy()
+    ended_cases = case_ids[is_end].unique()
 
-    # Note: In our preliminary analysis, we only have one start and one end activity
-    start_activities = pm4py.get_start_activities(event_log_df)
-    end_activities = pm4py.get_end_activities(event_log_df)
-    started_cases = []
-    running_cases = []
-    timestamps = []
+    # +1 at the first event of each case, -1 at the last complete event of each ended case
+    is_case_start = ~case_ids.duplicated().to_numpy()
+    is_last_complete = np.zeros(len(time_sorted_df), dtype=bool)
+    complete_rows = np.flatnonzero(is_complete)
+    is_last_complete[complete_rows] = ~case_ids.iloc[complete_rows].duplicated(keep="last").to_numpy()
+    is_case_end = is_last_complete & case_ids.isin(ended_cases).to_numpy()
+    running_cases = pd.Series(is_case_start.astype(np.int64) - is_case_end.astype(np.int64), index=time_sorted_df.index).cumsum()
+    timestamps = time_sorted_df['time:timestamp']
 
-    time_sorted_df = event_log_df.copy().sort_values(by='time:timestamp')
-    for idx, row in time_sorted_df.iterrows():
-        case_id = row['case:concept:name']
-        activity = row['concept:name']
-        timestamp = row['time:timestamp']
-        lifecycle_transition = row['lifecycle:transition']
-        if activity in start_activities and lifecycle_transition == "start":
-            started_cases.append(case_id)
-        elif activity in end_activities and lifecycle_transition == 'complete':
-            started_cases.remove(case_id)
+    if freq is not None:
+        # Keep the state after the last event at each point of time, and carry it forward to the points of the time grid
+        running_by_time = pd.Series(running_cases.to_numpy(), index=timestamps.to_numpy()).groupby(level=0).last()
+        time_grid = pd.date_range(start=timestamps.min().floor(freq), end=timestamps.max().ceil(freq), freq=freq)
+        running_on_grid = running_by_time.reindex(running_by_time.index.union(time_grid)).ffill().fillna(0).astype(np.int64).loc[time_grid]
+        return running_on_grid.tolist(), time_grid.tolist()
 
-        # Add the number of running cases at each point of observing an event
-        running_cases.append(len(started_cases))
-        timestamps.append(timestamp)
-
-    return running_cases, timestamps
+    return running_cases.tolist(), timestamps.tolist()
 
 
+@profiled("analyze_location_occupancy", count_items=len)
 def analyze_location_occupancy(event_log_df: pd.DataFrame, location: str):
     """
     Analyze the number of running and waiting cases for a location over time. This implies the congestion at a specific location, and a possible room for improvement in the process
@@ -86,3 +165,48 @@ def analyze_location_occupancy(event_log_df: pd.DataFrame, location: str):
     occupancy_df["waiting_count"] = occupancy_df["waiting_cases"].apply(lambda cases: len(cases))
 
     return occupancy_df
+
+
+@profiled("analyze_all_locations_occupancy", count_items=len)
+def analyze_all_locations_occupancy(event_log_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Analyze the number of running and waiting cases for all locations over time in one pass (see `analyze_location_occupancy`)
+    :return: A DataFrame with the number of running and waiting cases at each location after each point of time an event was observed at that location
+    """
+    is_waiting = event_log_df['concept:name'].str.contains("wait", regex=False)
+    is_running = ~is_waiting & event_log_df['concept:name'].isin(["pick container", "drop container"])
+    relevant_df = event_log_df.loc[is_waiting | is_running, ['time:timestamp', 'location', 'lifecycle:transition']]
+
+    delta = np.where(relevant_df['lifecycle:transition'] == "start", 1, -1)
+    occupancy_df = pd.DataFrame({
+        "timestamp": relevant_df['time:timestamp'].to_numpy(),
+        "location": relevant_df['location'].to_numpy(),
+        "running_delta": delta * is_running[relevant_df.index].to_numpy(),
+        "waiting_delta": delta * is_waiting[relevant_df.index].to_numpy()
+    })
+    occupancy_df = occupancy_df.sort_values(["location", "timestamp"], kind="stable", ignore_index=True)
+    occupancy_df["running_count"] = occupancy_df.groupby("location", observed=True)["running_delta"].cumsum()
+    occupancy_df["waiting_count"] = occupancy_df.groupby("location", observed=True)["waiting_delta"].cumsum()
+
+    # Keep the state after the last event at each observation time of each location
+    occupancy_df = occupancy_df.groupby(["location", "timestamp"], as_index=False, sort=False, observed=True)[["running_count", "waiting_count"]].last()
+
+    return occupancy_df[["timestamp", "location", "running_count", "waiting_count"]]
+
+
+def get_location_cases_at(event_log_df: pd.DataFrame, location: str, timestamp) -> tuple[set, set]:
+    """
+    List the cases which are running and waiting at a location at a specific point of time, i.e., the cases behind the counts of `analyze_all_locations_occupancy`
+    :return: (running_cases, waiting_cases)
+    """
+    loc_related_df = event_log_df[(event_log_df['location'] == location) & (event_log_df['time:timestamp'] <= timestamp)]
+    is_waiting = loc_related_df['concept:name'].str.contains("wait", regex=False)
+    is_running = ~is_waiting & loc_related_df['concept:name'].isin(["pick container", "drop container"])
+
+    cases = []
+    for activity_mask in [is_running, is_waiting]:
+        activity_df = loc_related_df[activity_mask].sort_values(by='time:timestamp', kind="stable")
+        last_transitions = activity_df.groupby('case:concept:name', observed=True)['lifecycle:transition'].last()
+        cases.append(set(last_transitions.index[last_transitions == "start"]))
+
+    return cases[0], cases[1]
@@ -0,0 +1,447 @@
+import math
+import re
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Dimensions by which KPIs are accumulated, along with the columns of the event log holding them
+kpi_dimension_columns = {
+    "vehicle": "org:resource",
+    "location": "location",
+    "location_type": "location_type",
+    "activity": "concept:name"
+}
+# Numeric columns of complete events which are accumulated as KPIs
+kpi_metric_columns = ["distance"]
+# KPIs measured as the time between the start and complete event of an activity, by the prefix of the activity name
+kpi_duration_activities = {
+    "wait for free lane": "waiting_time",
+    "dispatch vehicle": "driving_time",
+    "pick container": "processing_time",
+    "drop container": "processing_time"
+}
+
+
+class VSRunningStats:
+    """
+    Mergeable online count, mean, variance (Welford's algorithm, and Chan's formula to combine partial results), min and max
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update_batch(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+
+        batch_mean = float(values.mean())
+        self._combine(len(values), batch_mean, float(((values - batch_mean) ** 2).sum()), float(values.min()), float(values.max()))
+
+    def merge(self, other: "VSRunningStats"):
+        if other.count > 0:
+            self._combine(other.count, other.mean, other._m2, other.min, other.max)
+
+    def _combine(self, count: int, mean: float, m2: float, min_value: float, max_value: float):
+        total_count = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total_count
+        self._m2 += m2 + delta ** 2 * self.count * count / total_count
+        self.count = total_count
+        self.min = min(self.min, min_value)
+        self.max = max(self.max, max_value)
+
+    @property
+    def variance(self) -> float:
+        """
+        Sample variance
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class VSQuantileSketch:
+    """
+    Mergeable quantile sketch following the merging t-digest with the scale function k(q) = compression / (2 pi) * asin(2q - 1)
+    """
+    def __init__(self, compression: float = 200, buffer_size: int = 1000):
+        self._compression = compression
+        self._buffer_size = buffer_size
+        self._means = np.empty(0, dtype=np.float64)
+        self._weights = np.empty(0, dtype=np.float64)
+        self._buffer = []
+        self._min = math.inf
+        self._max = -math.inf
+
+    def update(self, value: float):
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_size:
+            self._flush()
+
+    def update_batch(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) > 0:
+            self._flush()
+            self._compress(values, np.ones(len(values)))
+
+    def merge(self, other: "VSQuantileSketch"):
+        other._flush()
+        self._flush()
+        if len(other._means) > 0:
+            self._compress(other._means, other._weights, min_value=other._min, max_value=other._max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile (0 <= q <= 1) by interpolating between the centers of the centroids, and the min/max at both ends
+        """
+        self._flush()
+        if len(self._means) == 0:
+            return math.nan
+
+        total_weight = self._weights.sum()
+        centers = np.cumsum(self._weights) - self._weights / 2
+        return float(np.interp(q * total_weight, np.concatenate([[0.0], centers, [total_weight]]), np.concatenate([[self._min], self._means, [self._max]])))
+
+    @property
+    def count(self) -> int:
+        return int(self._weights.sum()) + len(self._buffer)
+
+    @property
+    def num_centroids(self) -> int:
+        self._flush()
+        return len(self._means)
+
+    def _flush(self):
+        if self._buffer:
+            values = np.asarray(self._buffer, dtype=np.float64)
+            self._buffer = []
+            self._compress(values, np.ones(len(values)))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray, min_value: Optional[float] = None, max_value: Optional[float] = None):
+        self._min = min(self._min, float(means.min()) if min_value is None else min_value)
+        self._max = max(self._max, float(means.max()) if max_value is None else max_value)
+
+        means = np.concatenate([self._means, means])
+        weights = np.concatenate([self._weights, weights])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        cumulative_weights = np.cumsum(weights)
+        left_quantiles = (cumulative_weights - weights) / cumulative_weights[-1]
+        scale = self._compression / (2 * np.pi) * np.arcsin(2 * left_quantiles - 1)
+        buckets = np.floor(scale - scale[0]).astype(np.int64)
+        bucket_weights = np.bincount(buckets, weights=weights)
+        non_empty = bucket_weights > 0
+        self._means = (np.bincount(buckets, weights=means * weights)[non_empty] / bucket_weights[non_empty])
+        self._weights = bucket_weights[non_empty]
+
+
+class VSMetricAccumulator:
+    """
+    Running statistics along with a quantile sketch of one metric
+    """
+    def __init__(self, compression: float = 200):
+        self._stats = VSRunningStats()
+        self._sketch = VSQuantileSketch(compression=compression)
+
+    def update(self, value: float):
+        self._stats.update(value)
+        self._sketch.update(value)
+
+    def update_batch(self, values: np.ndarray):
+        self._stats.update_batch(values)
+        self._sketch.update_batch(values)
+
+    def merge(self, other: "VSMetricAccumulator"):
+        self._stats.merge(other._stats)
+        self._sketch.merge(other._sketch)
+
+    def summary(self, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> dict:
+        return {
+            "count": self._stats.count,
+            "mean": self._stats.mean if self._stats.count > 0 else math.nan,
+            "std": self._stats.std,
+            "min": self._stats.min,
+            "max": self._stats.max,
+            **{f"p{round(q * 100):g}": self._sketch.quantile(q) for q in quantiles}
+        }
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def sketch(self):
+        return self._sketch
+
+
+class VSKpiStatistics:
+    """
+    Streaming KPI statistics: one `VSMetricAccumulator` per metric and key of each dimension (vehicle, location, location type, activity), plus the overall accumulator of each metric (dimension "all").
+    Instances from separate chunks or processes are combined with `merge`
+    """
+    def __init__(self, compression: float = 200, case_end_activities: Iterable[str] = ("drop container",)):
+        self._compression = compression
+        self._case_end_activities = set(case_end_activities)
+        self._accumulators = {}
+        self._case_starts = {}
+        self._ended_cases = set()
+        self._activity_starts = {}
+
+    def add(self, metric: str, value: float, **dimensions):
+        """
+        Add one observation of a metric, e.g. add("waiting_time", 12, vehicle="SC001", location="QC001")
+        """
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return
+
+        self._get_accumulator(metric, "all", "all").update(value)
+        for dimension, key in dimensions.items():
+            if _is_valid_key(key):
+                self._get_accumulator(metric, dimension, key).update(value)
+
+    def add_batch(self, metric: str, values, dimensions: Optional[dict] = None):
+        """
+        Add a batch of observations of a metric
+        :param metric: Name of the metric
+        :param values: Values of the observations (missing values are skipped)
+        :param dimensions: Key of each observation per dimension, e.g. {"vehicle": vehicle_ids, "location": location_names}
+        """
+        batch_df = pd.DataFrame({"value": pd.to_numeric(pd.Series(np.asarray(values)), errors="coerce")})
+        for dimension, keys in (dimensions or {}).items():
+            batch_df[dimension] = np.asarray(keys, dtype=object)
+        batch_df = batch_df[batch_df["value"].notna()]
+        if batch_df.empty:
+            return
+
+        self._get_accumulator(metric, "all", "all").update_batch(batch_df["value"].to_numpy())
+        for dimension in dimensions or {}:
+            dimension_df = batch_df[batch_df[dimension].map(_is_valid_key)]
+            for key, values_df in dimension_df.groupby(dimension, sort=False)["value"]:
+                self._get_accumulator(metric, dimension, key).update_batch(values_df.to_numpy())
+
+    def add_event(self, event: dict):
+        """
+        Add an event of the event log (a row as dictionary). Durations are recorded on the complete event of an activity, and the duration of a case once its end activity first completes
+        """
+        dimensions = _get_event_dimensions(event)
+        case_id = event.get("case:concept:name", event.get("case_id"))
+        activity = event.get("concept:name", event.get("activity"))
+        timestamp = event.get("time:timestamp", event.get("timestamp"))
+        transition = event.get("lifecycle:transition")
+        is_running_case = case_id is not None and case_id not in self._ended_cases
+        if is_running_case and timestamp is not None:
+            self._case_starts[case_id] = min(self._case_starts.get(case_id, timestamp), timestamp)
+
+        duration_metric = _get_duration_metric(activity)
+        if duration_metric is not None and timestamp is not None:
+            if transition == "start":
+                self._activity_starts[(case_id, activity)] = timestamp
+            elif transition == "complete" and (case_id, activity) in self._activity_starts:
+                activity_duration = (timestamp - self._activity_starts.pop((case_id, activity))).total_seconds()
+                self.add(duration_metric, activity_duration, **dimensions)
+
+        if transition != "complete":
+            return
+        for metric in kpi_metric_columns:
+            if metric in event and event[metric] != "":
+                self.add(metric, event[metric], **dimensions)
+
+        if is_running_case and activity in self._case_end_activities:
+            self._ended_cases.add(case_id)
+            case_duration = (timestamp - self._case_starts.pop(case_id)).total_seconds()
+            self.add("case_duration", case_duration, vehicle=dimensions.get("vehicle"))
+
+    def add_events(self, event_log_df: pd.DataFrame):
+        """
+        Batch version of `add_event`. Events of a case may be spread over several batches, as long as the batches are added in the order of time
+        """
+        dimension_keys = {dimension: event_log_df[column].to_numpy(dtype=object) for dimension, column in kpi_dimension_columns.items() if column in event_log_df.columns}
+        if "location_type" not in dimension_keys and "location" in dimension_keys:
+            dimension_keys["location_type"] = np.array([_get_location_type(location) for location in dimension_keys["location"]], dtype=object)
+        if "activity" in dimension_keys:
+            dimension_keys["activity"] = np.array([_get_action(activity) for activity in dimension_keys["activity"]], dtype=object)
+
+        is_complete = (event_log_df["lifecycle:transition"] == "complete").to_numpy()
+        for metric in kpi_metric_columns:
+            if metric in event_log_df.columns:
+                self.add_batch(metric, event_log_df[metric].to_numpy()[is_complete], {dimension: keys[is_complete] for dimension, keys in dimension_keys.items()})
+
+        case_ids = event_log_df["case:concept:name"].astype(object)
+        timestamps = event_log_df["time:timestamp"]
+        self._add_activity_durations(event_log_df, dimension_keys)
+
+        # Case durations: first timestamp of each case (possibly from an earlier batch) until the first completion of its end activity. Events of already ended cases are skipped
+        is_running_case = ~case_ids.isin(self._ended_cases).to_numpy()
+        for case_id, first_timestamp in timestamps[is_running_case].groupby(case_ids[is_running_case], sort=False).min().items():
+            self._case_starts[case_id] = min(self._case_starts.get(case_id, first_timestamp), first_timestamp)
+
+        is_case_end = is_running_case & is_complete & event_log_df["concept:name"].isin(list(self._case_end_activities)).to_numpy()
+        end_rows = np.flatnonzero(is_case_end)
+        end_rows = end_rows[~case_ids.iloc[end_rows].duplicated().to_numpy()]
+        end_case_ids = case_ids.to_numpy()[end_rows]
+        case_starts = pd.Series([self._case_starts.pop(case_id) for case_id in end_case_ids], dtype=timestamps.dtype)
+        self._ended_cases.update(end_case_ids)
+        case_durations = (timestamps.iloc[end_rows].reset_index(drop=True) - case_starts).dt.total_seconds()
+        self.add_batch("case_duration", case_durations.to_numpy(), {"vehicle": dimension_keys["vehicle"][end_rows]} if "vehicle" in dimension_keys else None)
+
+    def _add_activity_durations(self, event_log_df: pd.DataFrame, dimension_keys: dict):
+        """
+        Add the time between each complete event and the preceding start event of the same case and activity (possibly from an earlier batch)
+        """
+        duration_metrics = event_log_df["concept:name"].map(_get_duration_metric).to_numpy(dtype=object)
+        transitions = event_log_df["lifecycle:transition"].to_numpy(dtype=object)
+        rows = np.flatnonzero(pd.notna(duration_metrics) & np.isin(transitions, ["start", "complete"]))
+        if len(rows) == 0:
+            return
+
+        pair_df = pd.DataFrame({
+            "case_id": event_log_df["case:concept:name"].to_numpy(dtype=object)[rows],
+            "activity": event_log_df["concept:name"].to_numpy(dtype=object)[rows],
+            "timestamp": event_log_df["time:timestamp"].iloc[rows].reset_index(drop=True),
+            "is_start": transitions[rows] == "start",
+            "row": rows
+        })
+        # Start events first among events of the same time
+        pair_df = pair_df.sort_values(["timestamp", "is_start"], ascending=[True, False], kind="stable").reset_index(drop=True)
+        pair_groups = pair_df.groupby(["case_id", "activity"], sort=False)
+        previous_df = pair_groups[["timestamp", "is_start"]].shift(1)
+        start_times = previous_df["timestamp"].where(previous_df["is_start"].eq(True))
+        is_first = ~pair_df.duplicated(["case_id", "activity"]).to_numpy()
+        if self._activity_starts:
+            for idx in np.flatnonzero(is_first):
+                start_time = self._activity_starts.pop((pair_df.at[idx, "case_id"], pair_df.at[idx, "activity"]), None)
+                if start_time is not None and not pair_df.at[idx, "is_start"]:
+                    start_times.iat[idx] = start_time
+        is_last = ~pair_df.duplicated(["case_id", "activity"], keep="last").to_numpy()
+        for idx in np.flatnonzero(is_last & pair_df["is_start"].to_numpy()):
+            self._activity_starts[(pair_df.at[idx, "case_id"], pair_df.at[idx, "activity"])] = pair_df.at[idx, "timestamp"]
+
+        is_paired = (~pair_df["is_start"] & start_times.notna()).to_numpy()
+        pair_df = pair_df[is_paired]
+        durations = pd.Series((pair_df["timestamp"] - start_times[is_paired]).dt.total_seconds().to_numpy())
+        metrics = duration_metrics[pair_df["row"].to_numpy()]
+        for metric in pd.unique(metrics):
+            is_metric = metrics == metric
+            metric_rows = pair_df["row"].to_numpy()[is_metric]
+            self.add_batch(metric, durations.to_numpy()[is_metric], {dimension: keys[metric_rows] for dimension, keys in dimension_keys.items()})
+
+    def add_travel_info_df(self, driving_df: pd.DataFrame):
+        """
+        Add the driving time, distance and speed of the driving logs (see `create_travel_info_df`) by vehicle, destination location and activity (PICK/DROP)
+        """
+        dimensions = {
+            "vehicle": driving_df["vehicle_id"],
+            "location": driving_df["location_name"],
+            "location_type": driving_df["location_name"].map(_get_location_type),
+            "activity": driving_df["action"]
+        }
+        for metric, column in [("driving_time", "driving_time"), ("distance", "distance_in_mm"), ("speed", "speed")]:
+            self.add_batch(metric, driving_df[column], dimensions)
+
+    def add_action_df(self, action_df: pd.DataFrame):
+        """
+        Add the waiting and processing times of the actions (see `create_action_df`) by vehicle, location and activity (PICK/DROP)
+        """
+        dimensions = {
+            "vehicle": action_df["vehicle_id"],
+            "location": action_df["location_name"],
+            "location_type": action_df["location_name"].map(_get_location_type),
+            "activity": action_df["action"]
+        }
+        for metric in ["waiting_time", "processing_time"]:
+            self.add_batch(metric, action_df[metric], dimensions)
+
+    def merge(self, other: "VSKpiStatistics"):
+        """
+        Merge the accumulators and the state of running cases of another instance, e.g. computed on another chunk of the event log or in another process
+        """
+        for accumulator_key, accumulator in other._accumulators.items():
+            if accumulator_key in self._accumulators:
+                self._accumulators[accumulator_key].merge(accumulator)
+            else:
+                self._get_accumulator(*accumulator_key).merge(accumulator)
+        self._ended_cases.update(other._ended_cases)
+        for case_id, case_start in other._case_starts.items():
+            if case_id not in self._ended_cases:
+                self._case_starts[case_id] = min(self._case_starts.get(case_id, case_start), case_start)
+        for case_id in other._ended_cases:
+            self._case_starts.pop(case_id, None)
+        for activity_key, activity_start in other._activity_starts.items():
+            self._activity_starts[activity_key] = max(self._activity_starts.get(activity_key, activity_start), activity_start)
+
+    def get_accumulator(self, metric: str, dimension: str = "all", key="all") -> Optional[VSMetricAccumulator]:
+        return self._accumulators.get((metric, dimension, key))
+
+    def get_summary(self, metric: str, dimension: str = "all", quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> pd.DataFrame:
+        """
+        Summary (count, mean, std, min, max and quantiles) of a metric for each key of a dimension
+        """
+        summaries = [
+            {dimension: key, **accumulator.summary(quantiles=quantiles)}
+            for (acc_metric, acc_dimension, key), accumulator in self._accumulators.items()
+            if acc_metric == metric and acc_dimension == dimension
+        ]
+        return pd.DataFrame(summaries, columns=[dimension, "count", "mean", "std", "min", "max", *(f"p{round(q * 100):g}" for q in quantiles)])
+
+    @property
+    def metrics(self) -> list[str]:
+        return sorted({metric for metric, _, _ in self._accumulators})
+
+    @property
+    def num_running_cases(self) -> int:
+        return len(self._case_starts)
+
+    def _get_accumulator(self, metric: str, dimension: str, key) -> VSMetricAccumulator:
+        accumulator = self._accumulators.get((metric, dimension, key))
+        if accumulator is None:
+            accumulator = VSMetricAccumulator(compression=self._compression)
+            self._accumulators[(metric, dimension, key)] = accumulator
+        return accumulator
+
+
+def _is_valid_key(key) -> bool:
+    return key is not None and key == key and key != ""
+
+
+def _get_location_type(location) -> Optional[str]:
+    match = re.match(r"[A-Z]+", location) if isinstance(location, str) else None
+    return match[0] if match else None
+
+
+def _get_action(activity) -> Optional[str]:
+    """
+    Container action (PICK/DROP) of an activity of the event log, as in `create_action_df` and `create_travel_info_df`
+    """
+    match = re.search(r"\b(pick|drop)\b", activity) if isinstance(activity, str) else None
+    return match[1].upper() if match else None
+
+
+def _get_duration_metric(activity) -> Optional[str]:
+    if not isinstance(activity, str):
+        return None
+    return next((metric for prefix, metric in kpi_duration_activities.items() if activity.startswith(prefix)), None)
+
+
+def _get_event_dimensions(event: dict) -> dict:
+    dimensions = {dimension: event.get(column) for dimension, column in kpi_dimension_columns.items()}
+    if not _is_valid_key(dimensions["location_type"]):
+        dimensions["location_type"] = _get_location_type(dimensions["location"])
+    dimensions["activity"] = _get_action(dimensions["activity"] if _is_valid_key(dimensions["activity"]) else event.get("activity"))
+    return dimensions
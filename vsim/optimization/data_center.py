@@ -1,7 +1,10 @@
-from itertools import product
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from types import MappingProxyType
+
 import numpy as np
 
-from ..utils import get_processed_metadata, manhattan_distance
+from ..utils import get_processed_metadata, profile_stage
 
 
 class VSDataCenter:
@@ -9,10 +12,22 @@ class VSDataCenter:
         self._locations = {}
         self._vehicles = {}
         self._container_orders = {}
+        self._remaining_orders = {}
+        self._location_index = {}
+        self._order_index = {}
         self._distance_matrix = None
+        # Remaining orders per origin location sorted by route length, and sorted by the time they are first known
+        self._remaining_orders_by_origin = {}
+        self._remaining_orders_by_time = []
+        # Origin location (index) and route length of each container order, by the position of the order
+        self._order_origin_indices = None
+        self._order_route_lengths = None
 
         self._prepare_data(data_file)
-        self._create_distance_matrix()
+        with profile_stage("data_center.distance_matrix", items=len(self._locations) ** 2):
+            self._create_distance_matrix()
+        with profile_stage("data_center.order_indices", items=len(self._remaining_orders)):
+            self._create_order_indices()
 
     def _prepare_data(self, data_file):
         locations_df, vehicles_df, container_orders_df = get_processed_metadata(meta_file_path=data_file)
@@ -22,27 +37,102 @@ class VSDataCenter:
         self._locations = locations_df.set_index("location_name").to_dict("index")
         self._vehicles = vehicles_df.set_index("id").to_dict("index")
         self._container_orders = container_orders_df.set_index("co_id").to_dict("index")
+        # Orders which are not delivered yet, kept up to date on status changes (in the original order of container orders)
+        self._remaining_orders = dict(self._container_orders)
+        # Position of each location within the rows/columns of the distance matrix
+        self._location_index = {location: idx for idx, location in enumerate(self._locations)}
+        # Position of each container order, to keep subsets of orders in their original order
+        self._order_index = {order_id: idx for idx, order_id in enumerate(self._container_orders)}
 
     def _create_distance_matrix(self):
         """
         Calculate distance between each pair of locations
         """
-        num_locations = len(self._locations)
-        distance_matrix = np.zeros((num_locations, num_locations))
-        locations = list(self._locations.values())
-        for i, j in product(range(num_locations), range(num_locations)):
-            x1, y1, x2, y2 = locations[i]['x'], locations[i]['y'], locations[j]['x'], locations[j]['y']
-            distance_matrix[i, j] = manhattan_distance(x1, y1, x2, y2)
+        coordinates = np.array([[loc['x'], loc['y']] for loc in self._locations.values()], dtype=np.float64).reshape(-1, 2)
+        # Manhattan distance of all pairs of locations through broadcasting
+        self._distance_matrix = np.abs(coordinates[:, np.newaxis, :] - coordinates[np.newaxis, :, :]).sum(axis=-1)
 
-        self._distance_matrix = distance_matrix
+    def _create_order_indices(self):
+        """
+        Index remaining orders by origin location (sorted by route length) and by the time they are first known
+        """
+        orders = self._container_orders.values()
+        self._order_origin_indices = self.get_location_indices([o_data['origin'] for o_data in orders])
+        self._order_route_lengths = self._distance_matrix[self._order_origin_indices, self.get_location_indices([o_data['dest'] for o_data in orders])]
+
+        origin_entries = {}
+        time_entries = []
+        for order_id in self._remaining_orders:
+            origin_idx, origin_entry, time_entry = self._get_order_index_entries(order_id)
+            origin_entries.setdefault(origin_idx, []).append(origin_entry)
+            time_entries.append(time_entry)
+        self._remaining_orders_by_origin = {origin_idx: sorted(entries) for origin_idx, entries in origin_entries.items()}
+        self._remaining_orders_by_time = sorted(time_entries)
+
+    def _get_order_index_entries(self, order_id):
+        order_idx = self._order_index[order_id]
+        origin_idx = int(self._order_origin_indices[order_idx])
+        route_length = float(self._order_route_lengths[order_idx])
+        return origin_idx, (route_length, order_idx, order_id), (self._container_orders[order_id]['time_first_known'], order_idx, order_id)
+
+    def _add_to_order_indices(self, order_id):
+        origin_idx, origin_entry, time_entry = self._get_order_index_entries(order_id)
+        insort(self._remaining_orders_by_origin.setdefault(origin_idx, []), origin_entry)
+        insort(self._remaining_orders_by_time, time_entry)
+
+    def _remove_from_order_indices(self, order_id):
+        origin_idx, origin_entry, time_entry = self._get_order_index_entries(order_id)
+        origin_entries = self._remaining_orders_by_origin[origin_idx]
+        del origin_entries[bisect_left(origin_entries, origin_entry)]
+        if not origin_entries:
+            del self._remaining_orders_by_origin[origin_idx]
+        del self._remaining_orders_by_time[bisect_left(self._remaining_orders_by_time, time_entry)]
+
+    def get_location_index(self, location):
+        return self._location_index[location]
+
+    def get_location_indices(self, locations) -> np.ndarray:
+        return np.fromiter((self._location_index[location] for location in locations), dtype=np.int64, count=len(locations))
 
     def get_distance(self, loc_1, loc_2):
-        loc_1_idx = list(self.locations.keys()).index(loc_1)
-        loc_2_idx = list(self.locations.keys()).index(loc_2)
-        return self.distance_matrix[loc_1_idx][loc_2_idx]
+        return self._distance_matrix[self._location_index[loc_1], self._location_index[loc_2]]
+
+    def get_distances(self, origins, destinations) -> np.ndarray:
+        """
+        Element-wise distances between two equally long sequences of locations
+        """
+        return self._distance_matrix[self.get_location_indices(origins), self.get_location_indices(destinations)]
+
+    def get_pairwise_distances(self, origins, destinations) -> np.ndarray:
+        """
+        Distances between all pairs of origins (rows) and destinations (columns)
+        """
+        return self._distance_matrix[np.ix_(self.get_location_indices(origins), self.get_location_indices(destinations))]
 
     def toggle_order_status(self, order_id):
         self._container_orders[order_id]['delivered'] = not self._container_orders[order_id]['delivered']
+        if self._container_orders[order_id]['delivered']:
+            del self._remaining_orders[order_id]
+            self._remove_from_order_indices(order_id)
+        else:
+            # Restore the original order of remaining orders
+            self._remaining_orders = {o_id: o_data for o_id, o_data in self._container_orders.items() if not o_data['delivered']}
+            self._add_to_order_indices(order_id)
+
+    def scale_location_capacities(self, factor):
+        """
+        Scale the capacity of all locations, e.g. to study the impact of additional lanes (locations without capacity limitation stay unlimited)
+        """
+        if not factor > 0:
+            raise ValueError(f"Capacity factor must be positive, got {factor}")
+        for loc_data in self._locations.values():
+            loc_data['capacity'] = loc_data['capacity'] * factor
+
+    def limit_vehicles(self, num_vehicles):
+        """
+        Keep only the first `num_vehicles` vehicles of the fleet
+        """
+        self._vehicles = dict(list(self._vehicles.items())[:num_vehicles])
 
     def update_vehicle_location(self, vehicle_id, location):
         self._vehicles[vehicle_id]['start_location'] = location
@@ -51,24 +141,94 @@ class VSDataCenter:
         return self._container_orders[order_id]['delivered']
 
     def get_remaining_orders(self):
-        remaining_orders = {}
-        for order_id, order_data in self._container_orders.items():
-            if not self.order_already_delivered(order_id):
-                remaining_orders[order_id] = order_data
-        return remaining_orders
+        """
+        Orders which are not delivered yet, as a new dictionary which is not affected by later status changes
+        """
+        return dict(self._remaining_orders)
+
+    def get_num_remaining_orders(self):
+        return len(self._remaining_orders)
+
+    def get_order_index(self, order_id):
+        return self._order_index[order_id]
+
+    def get_nearest_orders(self, location, k, known_before=None) -> list:
+        """
+        The k remaining orders which are the closest to handle from a location, i.e. with the shortest distance to the order origin plus the distance from the origin to the destination
+        :param location: Location to handle the orders from (e.g. the location of a vehicle)
+        :param k: Number of orders
+        :param known_before: If given, only orders first known until this point in time are considered
+        :return: IDs of the orders in the order of increasing distance
+        """
+        loc_idx = self._location_index[location]
+        if known_before is not None:
+            num_known_orders = bisect_right(self._remaining_orders_by_time, (known_before, float("inf")))
+            if num_known_orders < k or 2 * num_known_orders <= len(self._remaining_orders_by_time):
+                return self._get_nearest_known_orders(loc_idx, k, num_known_orders)
+
+        candidates = [
+            (self._distance_matrix[loc_idx, origin_idx] + origin_entries[0][0], origin_idx, 0)
+            for origin_idx, origin_entries in self._remaining_orders_by_origin.items()
+        ]
+        heapq.heapify(candidates)
+
+        nearest_orders = []
+        while candidates and len(nearest_orders) < k:
+            _, origin_idx, entry_idx = heapq.heappop(candidates)
+            origin_entries = self._remaining_orders_by_origin[origin_idx]
+            order_id = origin_entries[entry_idx][2]
+            if known_before is None or self._container_orders[order_id]['time_first_known'] <= known_before:
+                nearest_orders.append(order_id)
+            if entry_idx + 1 < len(origin_entries):
+                heapq.heappush(candidates, (self._distance_matrix[loc_idx, origin_idx] + origin_entries[entry_idx + 1][0], origin_idx, entry_idx + 1))
+
+        return nearest_orders
+
+    def _get_nearest_known_orders(self, loc_idx, k, num_known_orders) -> list:
+        """
+        The k nearest of the first `num_known_orders` remaining orders by the time they are first known, in the same order as `get_nearest_orders`
+        """
+        time_entries = self._remaining_orders_by_time[:num_known_orders]
+        order_indices = np.fromiter((order_idx for _, order_idx, _ in time_entries), dtype=np.int64, count=len(time_entries))
+        origin_indices = self._order_origin_indices[order_indices]
+        route_lengths = self._order_route_lengths[order_indices]
+        distances = self._distance_matrix[loc_idx, origin_indices] + route_lengths
+        # Ties are broken by origin location, then by route length and position of the order within the origin
+        ranking = np.lexsort((order_indices, route_lengths, origin_indices, distances))[:k]
+        return [time_entries[entry_idx][2] for entry_idx in ranking]
+
+    def get_orders_known_before(self, timestamp=None, max_orders=None) -> list:
+        """
+        IDs of the remaining orders first known until a point in time (all remaining orders if not given), sorted by the time they are first known
+        :param timestamp: Point in time
+        :param max_orders: If given, only the earliest known orders up to this number are returned
+        """
+        end_idx = len(self._remaining_orders_by_time) if timestamp is None else bisect_right(self._remaining_orders_by_time, (timestamp, float("inf")))
+        if max_orders is not None:
+            end_idx = min(end_idx, max_orders)
+        return [order_id for _, _, order_id in self._remaining_orders_by_time[:end_idx]]
+
+    def get_earliest_order_time(self):
+        """
+        Earliest time a remaining order is first known
+        """
+        return self._remaining_orders_by_time[0][0] if self._remaining_orders_by_time else None
 
+    # Note: properties provide read-only views instead of copies
     @property
     def locations(self):
-        return self._locations.copy()
+        return MappingProxyType(self._locations)
 
     @property
     def vehicles(self):
-        return self._vehicles.copy()
+        return MappingProxyType(self._vehicles)
 
     @property
     def container_orders(self):
-        return self._container_orders.copy()
+        return MappingProxyType(self._container_orders)
 
     @property
     def distance_matrix(self):
-        return np.copy(self._distance_matrix)
+        distance_matrix = self._distance_matrix.view()
+        distance_matrix.flags.writeable = False
+        return distance_matrix
@@ -1,6 +1,15 @@
+import time
+from typing import Optional
+
+import numpy as np
+from ortools.graph.python import max_flow, min_cost_flow
 from ortools.linear_solver import pywraplp
+from scipy.optimize import linear_sum_assignment
 
 from .data_center import VSDataCenter
+from ..utils.profiling import profile_stage, profiled
+
+SOLVER_BACKENDS = ["mip", "assignment", "flow"]
 
 
 class VSSolver:
@@ -18,43 +27,318 @@ class VSSolver:
             - waiting times
             - vehicles' travelled distances
             - case durations
+    Backends:
+        mip: Mixed-integer program solved by SCIP
+        assignment: Rectangular assignment problem solved by the Hungarian algorithm, which ignores location capacities
+        flow: Min-cost flow through (relaxed) location capacities, with the same optimal objective as the MIP
+    Rolling horizon:
+        By default, each round considers all remaining orders. Otherwise, each round is restricted to a window of candidate orders:
+            - num_candidates: the K nearest orders of each vehicle (union over all vehicles)
+            - time_horizon: orders first known within this horizon (e.g. pd.Timedelta("30min")) after the earliest known remaining order
     """
-    def __init__(self, data_center):
+    def __init__(self, data_center, backend: str = "mip", num_candidates: Optional[int] = None, time_horizon=None):
+        if backend not in SOLVER_BACKENDS:
+            raise ValueError(f"Unknown solver backend '{backend}'. Valid backends: {SOLVER_BACKENDS}")
+        if num_candidates is not None and num_candidates < 1:
+            raise ValueError("The number of candidate orders per vehicle must be at least 1")
+
         self._data_center: VSDataCenter = data_center
+        self._backend = backend
+        self._num_candidates = num_candidates
+        self._time_horizon = time_horizon
 
         self._solver = None
         self._var_x = None
 
+        # Orders considered in the current round (all remaining orders, or the candidate window)
+        self._candidate_orders = None
+        # Snapshot of the vehicles and remaining orders the current model is built for
+        self._vehicle_ids = None
+        self._order_ids = None
+        self._var_matrix = None
+        self._cost_matrix = None
+        self._capacity_constraints = None
+
         self._opt_obj = None
         self._opt_x = None
 
         self._capacity_violation_factor = 1.0
         self._opt_results = []
+        self._opt_profiles = []
 
-    def _build_model(self):
+    def _build_model(self, profile=None):
         self._solver = pywraplp.Solver.CreateSolver('SCIP')
 
-        self._create_variables()
-        self._create_objective()
-        self._create_constraints()
+        vehicles = self._data_center.vehicles
+        orders = self._candidate_orders
+        self._vehicle_ids = list(vehicles)
+        self._order_ids = list(orders)
+
+        with _timed(profile, "variables"):
+            self._create_variables()
+        with _timed(profile, "objective"):
+            self._create_objective()
+        with _timed(profile, "constraints"):
+            self._create_constraints()
 
+    @profiled("solver.optimize")
     def optimize(self):
-        status = None
-        self._capacity_violation_factor = 1.0
+        """
+        Run one round of the optimization with the selected backend, and keep track of the assignment and objective along with a runtime profile of the round
+        """
+        profile = {"candidates": 0.0, "variables": 0.0, "objective": 0.0, "constraints": 0.0, "solve": 0.0, "num_builds": 0, "num_solves": 0}
+        start_time = time.perf_counter()
+
+        with _timed(profile, "candidates"):
+            self._candidate_orders = self._get_candidate_orders()
+        profile["num_candidate_orders"] = len(self._candidate_orders)
+
+        if self._backend == "mip":
+            self._optimize_mip(profile)
+        elif self._backend == "assignment":
+            self._optimize_assignment(profile)
+        else:
+            self._optimize_flow(profile)
 
-        while status != pywraplp.Solver.OPTIMAL:
-            self._build_model()
+        profile["capacity_violation_factor"] = self._capacity_violation_factor
+        profile["wall_time"] = time.perf_counter() - start_time
+        self._opt_results.append((self._opt_x.copy(), self._opt_obj))
+        self._opt_profiles.append(profile)
+
+    def _optimize_mip(self, profile):
+        """
+        Build and solve the MIP with location capacities relaxed by the smallest feasible factor, relaxing them further in place while the solver can't prove optimality
+        """
+        self._capacity_violation_factor = self._get_min_feasible_capacity_factor()
+        self._build_model(profile=profile)
+        profile["num_builds"] += 1
+        self._set_greedy_hint()
+
+        while True:
             self._solver.SetTimeLimit(20000)
-            status = self._solver.Solve()
+            with _timed(profile, "solve"):
+                status = self._solver.Solve()
+            profile["num_solves"] += 1
+            if status == pywraplp.Solver.OPTIMAL:
+                break
+
+            if status == pywraplp.Solver.FEASIBLE:
+                self._solver.SetHint(self._solver.variables(), [var.solution_value() for var in self._solver.variables()])
             # Relax location capacity constraint if optimization is infeasible
-            self._capacity_violation_factor *= 2
+            self._relax_capacity_constraints()
+
         self._opt_obj = self._solver.Objective().Value()
         self._opt_x = []
         for (v, o) in self._var_x:
             if self._var_x[v, o].solution_value() == 1:
                 self._opt_x.append((v, o))
 
-        self._opt_results.append((self._opt_x.copy(), self._opt_obj))
+    def _optimize_assignment(self, profile):
+        vehicles = self._data_center.vehicles
+        orders = self._candidate_orders
+        self._vehicle_ids = list(vehicles)
+        self._order_ids = list(orders)
+        self._capacity_violation_factor = float("inf")
+
+        with _timed(profile, "objective"):
+            self._cost_matrix = self._get_cost_matrix(vehicles, orders)
+        with _timed(profile, "solve"):
+            vehicle_indices, order_indices = linear_sum_assignment(self._cost_matrix)
+        profile["num_solves"] += 1
+
+        self._opt_obj = float(self._cost_matrix[vehicle_indices, order_indices].sum())
+        self._opt_x = [(self._vehicle_ids[v_idx], self._order_ids[o_idx]) for v_idx, o_idx in zip(vehicle_indices.tolist(), order_indices.tolist())]
+
+    def _optimize_flow(self, profile):
+        vehicles = self._data_center.vehicles
+        orders = self._candidate_orders
+        self._vehicle_ids = list(vehicles)
+        self._order_ids = list(orders)
+        self._capacity_violation_factor = self._get_min_feasible_capacity_factor()
+
+        with _timed(profile, "constraints"):
+            locations = self._data_center.locations
+            distance_matrix = np.rint(self._data_center.distance_matrix).astype(np.int64)
+            num_vehicles, num_orders, num_locations = len(self._vehicle_ids), len(self._order_ids), len(locations)
+            num_assignments = min(num_vehicles, num_orders)
+
+            vehicle_loc_indices = self._data_center.get_location_indices([v_data['start_location'] for v_data in vehicles.values()])
+            origin_indices = self._data_center.get_location_indices([o_data['origin'] for o_data in orders.values()])
+            dest_indices = self._data_center.get_location_indices([o_data['dest'] for o_data in orders.values()])
+            order_routes, route_inverse = np.unique(np.stack([origin_indices, dest_indices], axis=1), axis=0, return_inverse=True)
+            route_inverse = route_inverse.ravel()
+            route_counts = np.bincount(route_inverse, minlength=len(order_routes))
+            used_origins = np.unique(origin_indices)
+
+            capacities = np.array([loc_data['capacity'] for loc_data in locations.values()], dtype=np.float64)
+            relaxed_capacities = np.minimum(np.floor(capacities * self._capacity_violation_factor), num_assignments).astype(np.int64)
+
+            # Nodes: source, sink, vehicles, origin locations (in and out, to limit the flow through them), destination locations
+            source, sink = 0, 1
+            vehicle_nodes = 2 + np.arange(num_vehicles)
+            origin_in_nodes = 2 + num_vehicles + np.arange(num_locations)
+            origin_out_nodes = origin_in_nodes + num_locations
+            dest_nodes = origin_out_nodes + num_locations
+
+            flow_network = min_cost_flow.SimpleMinCostFlow()
+            arc_blocks = [
+                (np.full(num_vehicles, source), vehicle_nodes, np.ones(num_vehicles), np.zeros(num_vehicles)),
+                (
+                    np.repeat(vehicle_nodes, len(used_origins)),
+                    np.tile(origin_in_nodes[used_origins], num_vehicles),
+                    np.ones(num_vehicles * len(used_origins)),
+                    distance_matrix[np.ix_(vehicle_loc_indices, used_origins)].ravel()
+                ),
+                (origin_in_nodes[used_origins], origin_out_nodes[used_origins], relaxed_capacities[used_origins], np.zeros(len(used_origins))),
+                (origin_out_nodes[order_routes[:, 0]], dest_nodes[order_routes[:, 1]], route_counts, distance_matrix[order_routes[:, 0], order_routes[:, 1]]),
+                (dest_nodes, np.full(num_locations, sink), relaxed_capacities, np.zeros(num_locations))
+            ]
+            arc_offsets = [0]
+            for tails, heads, arc_capacities, unit_costs in arc_blocks:
+                flow_network.add_arcs_with_capacity_and_unit_cost(
+                    tails.astype(np.int64), heads.astype(np.int64), arc_capacities.astype(np.int64), unit_costs.astype(np.int64)
+                )
+                arc_offsets.append(arc_offsets[-1] + len(tails))
+            flow_network.set_node_supply(source, num_assignments)
+            flow_network.set_node_supply(sink, -num_assignments)
+
+        with _timed(profile, "solve"):
+            status = flow_network.solve()
+        profile["num_solves"] += 1
+        if status != flow_network.OPTIMAL:
+            raise RuntimeError(f"Min-cost flow could not be solved (status: {status})")
+
+        # Vehicles dispatched to each origin location
+        vehicle_origin_flows = flow_network.flows(np.arange(arc_offsets[1], arc_offsets[2])).reshape(num_vehicles, len(used_origins))
+        vehicles_by_origin = {origin: [] for origin in used_origins.tolist()}
+        for v_idx, origin_pos in zip(*np.nonzero(vehicle_origin_flows)):
+            vehicles_by_origin[used_origins[origin_pos]].append(int(v_idx))
+
+        # Orders handled on each route: orders of the same route have equal costs, so the first ones are picked
+        route_flows = flow_network.flows(np.arange(arc_offsets[3], arc_offsets[4]))
+        orders_by_origin = {origin: [] for origin in used_origins.tolist()}
+        for route_idx in np.nonzero(route_flows)[0].tolist():
+            route_order_indices = np.flatnonzero(route_inverse == route_idx)[:route_flows[route_idx]]
+            orders_by_origin[int(order_routes[route_idx, 0])].extend(route_order_indices.tolist())
+
+        assignments = []
+        for origin, origin_vehicles in vehicles_by_origin.items():
+            assignments.extend(zip(origin_vehicles, sorted(orders_by_origin[origin])))
+        assignments.sort()
+
+        self._opt_obj = float(flow_network.optimal_cost())
+        self._opt_x = [(self._vehicle_ids[v_idx], self._order_ids[o_idx]) for v_idx, o_idx in assignments]
+
+    def _get_candidate_orders(self):
+        """
+        Orders considered in the current round: all remaining orders, or the candidate window (in the original order of container orders)
+        """
+        if self._num_candidates is None and self._time_horizon is None:
+            return self._data_center.get_remaining_orders()
+
+        # The window is looked up without copying all remaining orders
+        num_remaining_orders = self._data_center.get_num_remaining_orders()
+        vehicles = self._data_center.vehicles
+        known_before = None
+        if self._time_horizon is not None and num_remaining_orders:
+            known_before = self._data_center.get_earliest_order_time() + self._time_horizon
+
+        if self._num_candidates is None:
+            candidate_ids = set(self._data_center.get_orders_known_before(known_before))
+        else:
+            # Vehicles at the same location share their nearest orders, hence the K nearest orders of each vehicle are looked up once per location
+            num_vehicles_by_loc = {}
+            for v_data in vehicles.values():
+                num_vehicles_by_loc[v_data['start_location']] = num_vehicles_by_loc.get(v_data['start_location'], 0) + 1
+            candidate_ids = set()
+            for location, num_vehicles in num_vehicles_by_loc.items():
+                candidate_ids.update(self._data_center.get_nearest_orders(location, k=self._num_candidates * num_vehicles, known_before=known_before))
+
+        # Fill up the window with the earliest known orders, so that all vehicles can be dispatched
+        num_assignments = min(len(vehicles), num_remaining_orders)
+        if len(candidate_ids) < num_assignments:
+            for order_id in self._data_center.get_orders_known_before(max_orders=num_assignments + len(candidate_ids)):
+                if len(candidate_ids) == num_assignments:
+                    break
+                candidate_ids.add(order_id)
+
+        container_orders = self._data_center.container_orders
+        return {order_id: container_orders[order_id] for order_id in sorted(candidate_ids, key=self._data_center.get_order_index)}
+
+    def _get_min_feasible_capacity_factor(self):
+        """
+        Find the smallest relaxation factor (power of two) of location capacities which allows assigning min(#vehicles, #orders) orders, by a max-flow check
+        """
+        locations = self._data_center.locations
+        orders = self._candidate_orders
+        num_assignments = min(len(self._data_center.vehicles), len(orders))
+        if num_assignments == 0:
+            return 1.0
+
+        # Nodes: 0 = source, 1 = sink, then one node per location on the origin side and on the destination side
+        location_names = list(locations)
+        num_locations = len(location_names)
+        origin_indices = self._data_center.get_location_indices([o_data['origin'] for o_data in orders.values()])
+        dest_indices = self._data_center.get_location_indices([o_data['dest'] for o_data in orders.values()])
+        order_routes, route_counts = np.unique(np.stack([origin_indices, dest_indices], axis=1), axis=0, return_counts=True)
+        capacities = np.array([locations[loc]['capacity'] for loc in location_names], dtype=np.float64)
+
+        capacity_factor = 1.0
+        while True:
+            relaxed_capacities = np.minimum(np.floor(capacities * capacity_factor), num_assignments).astype(np.int64)
+            flow_network = max_flow.SimpleMaxFlow()
+            location_nodes = np.arange(num_locations)
+            flow_network.add_arcs_with_capacity(np.zeros(num_locations, dtype=np.int64), 2 + location_nodes, relaxed_capacities)
+            flow_network.add_arcs_with_capacity(2 + order_routes[:, 0], 2 + num_locations + order_routes[:, 1], route_counts.astype(np.int64))
+            flow_network.add_arcs_with_capacity(2 + num_locations + location_nodes, np.ones(num_locations, dtype=np.int64), relaxed_capacities)
+            flow_network.solve(0, 1)
+            if flow_network.optimal_flow() >= num_assignments:
+                return capacity_factor
+
+            if np.all(relaxed_capacities >= num_assignments):
+                raise ValueError("Location capacities do not allow for any feasible assignment of vehicles to orders")
+            capacity_factor *= 2
+
+    def _relax_capacity_constraints(self):
+        self._capacity_violation_factor *= 2
+        for constraint, capacity in self._capacity_constraints:
+            constraint.SetUb(capacity * self._capacity_violation_factor)
+
+    def _set_greedy_hint(self):
+        """
+        Provide the solver with a greedy assignment (pairs in the order of increasing distance) as a starting solution
+        """
+        locations = self._data_center.locations
+        orders = self._candidate_orders
+        num_assignments = min(len(self._vehicle_ids), len(self._order_ids))
+        order_origins = [o_data['origin'] for o_data in orders.values()]
+        order_dests = [o_data['dest'] for o_data in orders.values()]
+        origin_usage = {}
+        dest_usage = {}
+        assigned_vehicles = set()
+        assigned_orders = set()
+        hint = np.zeros(self._cost_matrix.shape, dtype=np.float64)
+
+        num_orders = len(self._order_ids)
+        for flat_idx in np.argsort(self._cost_matrix, axis=None, kind="stable").tolist():
+            if len(assigned_orders) == num_assignments:
+                break
+            v_idx, o_idx = divmod(flat_idx, num_orders)
+            if v_idx in assigned_vehicles or o_idx in assigned_orders:
+                continue
+            origin, dest = order_origins[o_idx], order_dests[o_idx]
+            if origin_usage.get(origin, 0) + 1 > locations[origin]['capacity'] * self._capacity_violation_factor:
+                continue
+            if dest_usage.get(dest, 0) + 1 > locations[dest]['capacity'] * self._capacity_violation_factor:
+                continue
+
+            hint[v_idx, o_idx] = 1.0
+            assigned_vehicles.add(v_idx)
+            assigned_orders.add(o_idx)
+            origin_usage[origin] = origin_usage.get(origin, 0) + 1
+            dest_usage[dest] = dest_usage.get(dest, 0) + 1
+
+        self._solver.SetHint([var for var_row in self._var_matrix for var in var_row], hint.ravel().tolist())
 
     def update_environment(self):
         """
@@ -70,83 +354,98 @@ class VSSolver:
             self._data_center.update_vehicle_location(v, self._data_center.container_orders[o]['dest'])
 
     def _create_variables(self):
-        vehicles = self._data_center.vehicles
-        orders = self._data_center.get_remaining_orders()
-
         # This will contain all combinations of (vehicle, order) pairs
         # If the assigned value for a pair is 1, that means the vehicle is assigned to that specific order
         # Otherwise, there;s no association between the order and the vehicle
-        self._var_x = {}
-        for v in vehicles:
-            for o in orders:
-                self._var_x[v, o] = self._solver.IntVar(0, 1, f'x[{v},{o}]')
+        self._var_matrix = [
+            [self._solver.IntVar(0, 1, f'x[{v},{o}]') for o in self._order_ids]
+            for v in self._vehicle_ids
+        ]
+        self._var_x = {
+            (v, o): var
+            for v, row in zip(self._vehicle_ids, self._var_matrix)
+            for o, var in zip(self._order_ids, row)
+        }
 
     def _create_objective(self):
         vehicles = self._data_center.vehicles
-        orders = self._data_center.get_remaining_orders()
+        orders = self._candidate_orders
 
-        obj_expr = []
-        for v, v_data in vehicles.items():
-            for o, o_data in orders.items():
-                v_loc = v_data['start_location']
-                o_origin = o_data['origin']
-                o_dest = o_data['dest']
+        self._cost_matrix = self._get_cost_matrix(vehicles, orders)
 
-                v_to_origin = self._data_center.get_distance(v_loc, o_origin)
-                origin_to_dest = self._data_center.get_distance(o_origin, o_dest)
+        # Minimize the total travelled distance for all (order, vehicle) pairs
+        objective = self._solver.Objective()
+        for var_row, cost_row in zip(self._var_matrix, self._cost_matrix.tolist()):
+            for var, cost in zip(var_row, cost_row):
+                objective.SetCoefficient(var, cost)
+        objective.SetMinimization()
 
-                obj_expr.append((v_to_origin + origin_to_dest) * self._var_x[v, o])
+    def _get_cost_matrix(self, vehicles, orders):
+        """
+        Travelled distance of each vehicle (rows) to handle each order (columns): from the vehicle location to the order origin, and from there to the order destination
+        """
+        vehicle_locations = [v_data['start_location'] for v_data in vehicles.values()]
+        order_origins = [o_data['origin'] for o_data in orders.values()]
+        order_dests = [o_data['dest'] for o_data in orders.values()]
 
-        # Minimize the total travelled distance for all (order, vehicle) pairs
-        self._solver.Minimize(self._solver.Sum(obj_expr))
+        vehicle_to_origin = self._data_center.get_pairwise_distances(vehicle_locations, order_origins)
+        origin_to_dest = self._data_center.get_distances(order_origins, order_dests)
+        return vehicle_to_origin + origin_to_dest[np.newaxis, :]
 
     def _create_constraints(self):
         locations = self._data_center.locations
-        vehicles = self._data_center.vehicles
-        orders = self._data_center.get_remaining_orders()
+        orders = self._candidate_orders
+        num_vehicles = len(self._vehicle_ids)
+        num_orders = len(self._order_ids)
 
         # C1: Ensure all resources are associated with an order to increase throughput
-        self._solver.Add(
-            self._solver.Sum(self._var_x[v, o] for v in vehicles for o in orders) == min(len(vehicles), len(orders))
-        )
+        num_assignments = min(num_vehicles, num_orders)
+        c1 = self._solver.Constraint(num_assignments, num_assignments)
+        for var_row in self._var_matrix:
+            for var in var_row:
+                c1.SetCoefficient(var, 1)
 
         # C2: Each order must be assigned to at most one vehicle
-        for o in orders:
-            self._solver.Add(
-                self._solver.Sum(self._var_x[v, o] for v in vehicles) <= 1
-            )
+        for o_idx in range(num_orders):
+            c2 = self._solver.Constraint(-self._solver.infinity(), 1)
+            for var_row in self._var_matrix:
+                c2.SetCoefficient(var_row[o_idx], 1)
 
         # C3: Each vehicle must be assigned to at most one order
-        for v in vehicles:
-            self._solver.Add(
-                self._solver.Sum(self._var_x[v, o] for o in orders) <= 1
-            )
+        for var_row in self._var_matrix:
+            c3 = self._solver.Constraint(-self._solver.infinity(), 1)
+            for var in var_row:
+                c3.SetCoefficient(var, 1)
 
         # C4: Number of vehicles dispatched to a location should not exceed its capacity
-        for loc, loc_data in locations.items():
-            expr_1 = [
-                self._var_x[v, o]
-                for v in vehicles
-                for o in orders
-                if orders[o]['origin'] == loc
-            ]
-            self._solver.Add(
-                self._solver.Sum(expr_1) <= loc_data['capacity'] * self._capacity_violation_factor
-            )
-
-            expr_2 = [
-                self._var_x[v, o]
-                for v in vehicles
-                for o in orders
-                if orders[o]['dest'] == loc
-            ]
-            self._solver.Add(
-                self._solver.Sum(expr_2) <= loc_data['capacity'] * self._capacity_violation_factor
-            )
+        # Orders are grouped by their origin and destination once. Locations without orders or without capacity limitation lead to trivially satisfied constraints, which are skipped
+        # Constraints are kept along with the original capacity to relax them in place
+        self._capacity_constraints = []
+        for location_key in ['origin', 'dest']:
+            order_indices_by_loc = {}
+            for o_idx, o_data in enumerate(orders.values()):
+                order_indices_by_loc.setdefault(o_data[location_key], []).append(o_idx)
+
+            for loc, order_indices in order_indices_by_loc.items():
+                capacity = locations[loc]['capacity'] * self._capacity_violation_factor
+                if np.isinf(capacity):
+                    continue
+                c4 = self._solver.Constraint(-self._solver.infinity(), capacity)
+                for var_row in self._var_matrix:
+                    for o_idx in order_indices:
+                        c4.SetCoefficient(var_row[o_idx], 1)
+                self._capacity_constraints.append((c4, locations[loc]['capacity']))
 
     def opt_ended(self):
-        remaining_orders = self._data_center.get_remaining_orders()
-        return len(remaining_orders) == 0
+        return self._data_center.get_num_remaining_orders() == 0
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def candidate_orders(self):
+        return self._candidate_orders
 
     @property
     def opt_obj(self):
@@ -159,3 +458,31 @@ class VSSolver:
     @property
     def opt_results(self):
         return self._opt_results
+
+    @property
+    def opt_profiles(self):
+        """
+        Wall time (in seconds) of each phase of each run of the optimization, along with the number of model builds and solver calls and the capacity violation factor
+        """
+        return self._opt_profiles
+
+
+class _timed:
+    """
+    Context manager adding the elapsed wall time of its block to an entry of a profile dictionary (if given), and recording it as the stage "solver.<key>"
+    """
+    def __init__(self, profile, key):
+        self._profile = profile
+        self._key = key
+        self._start = None
+        self._stage = profile_stage(f"solver.{key}")
+
+    def __enter__(self):
+        self._stage.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stage.__exit__(exc_type, exc_val, exc_tb)
+        if self._profile is not None:
+            self._profile[self._key] = self._profile.get(self._key, 0.0) + time.perf_counter() - self._start
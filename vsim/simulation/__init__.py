@@ -0,0 +1,3 @@
+from .engine import *
+from .timeline import *
+from .scenarios import *
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+from collections import deque
+from datetime import timedelta
+
+from ..optimization.data_center import VSDataCenter
+
+# Defaults extracted based on the analysis of the provided logs
+VEHICLE_SPEED = 5545  # mm/s
+ACTION_DURATION = 60  # seconds
+
+
+class VSEventSimulator:
+    """
+    Discrete-event simulation of the assignments of vehicles to container orders, where each vehicle handles its assigned orders one after another.
+    Has to be created before the optimization rounds, since the solver moves the vehicles of the data center to the destination of their orders
+    """
+    def __init__(self, data_center: VSDataCenter, process_start_time, vehicle_speed: float = VEHICLE_SPEED, action_duration: float = ACTION_DURATION):
+        self._data_center = data_center
+        self._vehicle_speed = vehicle_speed
+        self._action_duration = timedelta(seconds=action_duration)
+
+        self._vehicle_states = {
+            v: {"location": v_data['start_location'], "available_time": process_start_time, "busy": False}
+            for v, v_data in data_center.vehicles.items()
+        }
+        self._pending_orders = {v: deque() for v in self._vehicle_states}
+        self._lane_pools = {}
+
+        self._event_queue = []
+        self._event_counter = itertools.count()
+        self._tracking_records = []
+
+    def add_assignments(self, assignments: list[tuple[str, str]]):
+        """
+        Queue the (vehicle, order) pairs of an optimization round, e.g. `VSSolver.opt_x`. An idle vehicle is dispatched at the time it became available
+        """
+        for v, o in assignments:
+            self._pending_orders[v].append(o)
+            if not self._vehicle_states[v]["busy"]:
+                self._vehicle_states[v]["busy"] = True
+                self._schedule(self._vehicle_states[v]["available_time"], self._dispatch_to_pick, v)
+
+    def run(self, until=None) -> list[dict]:
+        """
+        Process the queued events in the order of time (up to a point in time, if given)
+        :return: Tracking records of all dispatched orders so far
+        """
+        while self._event_queue and (until is None or self._event_queue[0][0] <= until):
+            event_time, _, handler, payload = heapq.heappop(self._event_queue)
+            handler(event_time, payload)
+
+        return self._tracking_records
+
+    @property
+    def tracking_records(self):
+        return self._tracking_records
+
+    def _schedule(self, event_time, handler, payload):
+        heapq.heappush(self._event_queue, (event_time, next(self._event_counter), handler, payload))
+
+    def _get_driving_time(self, distance):
+        return round(distance / self._vehicle_speed, 0)
+
+    def _request_lane(self, location, arrival_time):
+        """
+        Start time of an action at a location for a vehicle arriving at the given time, reserving the lane released first
+        """
+        capacity = self._data_center.locations[location]['capacity']
+        if capacity == float("inf"):
+            return arrival_time
+        if not capacity > 0:
+            raise ValueError(f"Location {location} has no lane to handle a vehicle (capacity {capacity})")
+
+        lane_releases = self._lane_pools.setdefault(location, [])
+        if len(lane_releases) < capacity:
+            start_time = arrival_time
+            heapq.heappush(lane_releases, start_time + self._action_duration)
+        else:
+            start_time = max(arrival_time, lane_releases[0])
+            heapq.heapreplace(lane_releases, start_time + self._action_duration)
+
+        return start_time
+
+    def _dispatch_to_pick(self, event_time, v):
+        o = self._pending_orders[v].popleft()
+        o_data = self._data_center.container_orders[o]
+        vehicle_loc = self._vehicle_states[v]["location"]
+        dist_vehicle_to_origin = self._data_center.get_distance(vehicle_loc, o_data['origin'])
+        time_to_origin = self._get_driving_time(dist_vehicle_to_origin)
+
+        track_record = {
+            "co_id": o,
+            "v_id": v,
+            "dispatch_to_pick": event_time,
+            "arrival_time_at_origin": event_time + timedelta(seconds=time_to_origin),
+            "vehicle_loc": vehicle_loc,
+            "origin": o_data['origin'],
+            "dest": o_data['dest'],
+            "vehicle_loc_type": self._data_center.locations[vehicle_loc]['location_type'],
+            "origin_type": self._data_center.locations[o_data['origin']]['location_type'],
+            "dest_type": self._data_center.locations[o_data['dest']]['location_type'],
+            "dist_vehicle_to_origin": dist_vehicle_to_origin,
+            "driving_time_to_origin": time_to_origin
+        }
+        self._tracking_records.append(track_record)
+        self._schedule(track_record["arrival_time_at_origin"], self._arrive_at_origin, track_record)
+
+    def _arrive_at_origin(self, event_time, track_record):
+        pickup_start_time = self._request_lane(track_record["origin"], event_time)
+        track_record["pickup_start_time"] = pickup_start_time
+        track_record["pickup_end_time"] = pickup_start_time + self._action_duration
+        self._schedule(track_record["pickup_end_time"], self._dispatch_to_drop, track_record)
+
+    def _dispatch_to_drop(self, event_time, track_record):
+        dist_origin_to_dest = self._data_center.get_distance(track_record["origin"], track_record["dest"])
+        time_to_dest = self._get_driving_time(dist_origin_to_dest)
+        track_record["dispatch_to_drop"] = event_time
+        track_record["arrival_time_at_dest"] = event_time + timedelta(seconds=time_to_dest)
+        track_record["dist_origin_to_dest"] = dist_origin_to_dest
+        track_record["driving_time_to_dest"] = time_to_dest
+        self._schedule(track_record["arrival_time_at_dest"], self._arrive_at_dest, track_record)
+
+    def _arrive_at_dest(self, event_time, track_record):
+        drop_start_time = self._request_lane(track_record["dest"], event_time)
+        track_record["drop_start_time"] = drop_start_time
+        track_record["drop_end_time"] = drop_start_time + self._action_duration
+        self._schedule(track_record["drop_end_time"], self._finish_order, track_record)
+
+    def _finish_order(self, event_time, track_record):
+        v = track_record["v_id"]
+        vehicle_state = self._vehicle_states[v]
+        vehicle_state["location"] = track_record["dest"]
+        vehicle_state["available_time"] = event_time
+        if self._pending_orders[v]:
+            self._dispatch_to_pick(event_time, v)
+        else:
+            vehicle_state["busy"] = False
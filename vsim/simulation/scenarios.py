@@ -0,0 +1,171 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+import traceback
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from typing import Optional
+
+import pandas as pd
+
+from ..optimization.data_center import VSDataCenter
+from ..optimization.solver import VSSolver
+from .engine import ACTION_DURATION, VEHICLE_SPEED
+from .timeline import get_timeline_kpis, simulate_timeline
+
+SCENARIO_PARAMS = ["capacity_factor", "num_vehicles", "vehicle_speed", "action_duration", "backend", "num_candidates", "time_horizon"]
+
+
+def run_scenario(
+    data_file: str,
+    capacity_factor: float = 1.0,
+    num_vehicles: Optional[int] = None,
+    vehicle_speed: float = VEHICLE_SPEED,
+    action_duration: float = ACTION_DURATION,
+    backend: str = "mip",
+    num_candidates: Optional[int] = None,
+    time_horizon=None
+) -> dict:
+    """
+    Run the optimization of a terminal along with the simulation of the timeline for one set of parameters
+    :param data_file: Terminal file (locations, vehicles and container orders)
+    :param capacity_factor: Factor applied to the capacity of all locations
+    :param num_vehicles: Number of vehicles of the fleet (the first ones of the terminal file), all vehicles if not given
+    :param vehicle_speed: Driving speed of vehicles in mm/s
+    :param action_duration: Duration of picking/dropping a container in seconds
+    :param backend: Solver backend
+    :param num_candidates: Number of candidate orders per vehicle in each round (rolling horizon)
+    :param time_horizon: Time horizon of candidate orders in each round (rolling horizon), e.g. pd.Timedelta("30min")
+    :return: KPIs of the scenario
+    """
+    data_center = VSDataCenter(data_file=data_file)
+    data_center.scale_location_capacities(capacity_factor)
+    if num_vehicles is not None:
+        data_center.limit_vehicles(num_vehicles)
+    solver = VSSolver(data_center=data_center, backend=backend, num_candidates=num_candidates, time_horizon=time_horizon)
+
+    process_start_time = min(v_data['log_on'] for v_data in data_center.vehicles.values())
+    tracking_list = simulate_timeline(data_center, solver, process_start_time=process_start_time, vehicle_speed=vehicle_speed, action_duration=action_duration)
+    return {**get_timeline_kpis(tracking_list, process_start_time=process_start_time), "num_rounds": len(solver.opt_results)}
+
+
+def get_scenario_grid(param_grid: dict[str, list]) -> list[dict]:
+    """
+    All combinations of the values of a parameter grid, e.g. {"capacity_factor": [1, 2], "num_vehicles": [10, 20]} leads to 4 scenarios
+    """
+    unknown_params = set(param_grid) - set(SCENARIO_PARAMS)
+    if unknown_params:
+        raise ValueError(f"Unknown scenario parameters: {sorted(unknown_params)}. Valid parameters: {SCENARIO_PARAMS}")
+
+    param_names = list(param_grid)
+    return [dict(zip(param_names, values)) for values in itertools.product(*(param_grid[name] for name in param_names))]
+
+
+def get_scenario_id(data_file: str, scenario: dict) -> str:
+    """
+    Stable identifier of a scenario, used to recognize completed scenarios when resuming a sweep
+    """
+    scenario_key = json.dumps({"data_file": os.path.abspath(data_file), **scenario}, sort_keys=True, default=str)
+    return hashlib.sha256(scenario_key.encode()).hexdigest()[:16]
+
+
+def run_scenarios(
+    data_file: str,
+    param_grid: dict[str, list],
+    results_file_path: str,
+    num_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    retry_failed: bool = False
+) -> pd.DataFrame:
+    """
+    Sweep a grid of scenario parameters, running each scenario (see `run_scenario`) in its own worker process. Scenarios already recorded in the results file are skipped
+    :param data_file: Terminal file (locations, vehicles and container orders)
+    :param param_grid: Values of each scenario parameter (see `SCENARIO_PARAMS`)
+    :param results_file_path: JSON lines file of the results
+    :param num_workers: Number of scenarios run in parallel, defaults to the number of CPUs
+    :param timeout: Maximum runtime of a scenario in seconds, after which its worker is terminated
+    :param retry_failed: Whether scenarios which failed or timed out in a previous run are run again
+    :return: Results table of all scenarios of the grid, with one row per scenario (parameters, status, error, runtime and KPIs)
+    """
+    num_workers = num_workers or os.cpu_count()
+    scenarios = {get_scenario_id(data_file, scenario): scenario for scenario in get_scenario_grid(param_grid)}
+
+    recorded_statuses = {result["scenario_id"]: result["status"] for result in read_scenario_results(results_file_path)}
+    pending = [
+        (scenario_id, scenario) for scenario_id, scenario in scenarios.items()
+        if scenario_id not in recorded_statuses or (retry_failed and recorded_statuses[scenario_id] != "ok")
+    ]
+
+    running = {}
+    while pending or running:
+        while pending and len(running) < num_workers:
+            scenario_id, scenario = pending.pop(0)
+            receiver, sender = Pipe(duplex=False)
+            worker = Process(target=_run_scenario_worker, args=(data_file, scenario, sender), daemon=True)
+            worker.start()
+            sender.close()
+            running[receiver] = (worker, scenario_id, scenario, time.perf_counter())
+
+        wait_timeout = None
+        if timeout is not None:
+            wait_timeout = max(min(start_time + timeout for _, _, _, start_time in running.values()) - time.perf_counter(), 0)
+        ready = wait(list(running), timeout=wait_timeout)
+
+        for receiver in list(running):
+            worker, scenario_id, scenario, start_time = running[receiver]
+            runtime = time.perf_counter() - start_time
+            if receiver in ready:
+                try:
+                    status, kpis, error = receiver.recv()
+                except EOFError:
+                    status, kpis, error = "error", {}, f"Worker exited with code {worker.exitcode}"
+            elif timeout is not None and runtime >= timeout:
+                worker.terminate()
+                status, kpis, error = "timeout", {}, f"Scenario exceeded the timeout of {timeout} s"
+            else:
+                continue
+
+            worker.join()
+            receiver.close()
+            del running[receiver]
+            _append_scenario_result(results_file_path, {"scenario_id": scenario_id, **scenario, "status": status, "error": error, "runtime": runtime, **kpis})
+
+    results_df = pd.DataFrame(read_scenario_results(results_file_path))
+    if results_df.empty:
+        return results_df
+
+    # Keep the latest result of each scenario, in the order of the grid
+    results_df = results_df.drop_duplicates("scenario_id", keep="last").set_index("scenario_id")
+    return results_df.reindex([scenario_id for scenario_id in scenarios if scenario_id in results_df.index]).reset_index()
+
+
+def read_scenario_results(results_file_path: str) -> list[dict]:
+    if not os.path.exists(results_file_path):
+        return []
+
+    results = []
+    with open(results_file_path, "r") as results_fp:
+        for line in results_fp:
+            # A line might be truncated if the sweep was interrupted while writing
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return results
+
+
+def _append_scenario_result(results_file_path: str, result: dict):
+    with open(results_file_path, "a") as results_fp:
+        results_fp.write(json.dumps(result, default=str) + "\n")
+
+
+def _run_scenario_worker(data_file: str, scenario: dict, sender):
+    try:
+        sender.send(("ok", run_scenario(data_file, **scenario), None))
+    except Exception:
+        sender.send(("error", {}, traceback.format_exc()))
+    finally:
+        sender.close()
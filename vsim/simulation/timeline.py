@@ -0,0 +1,87 @@
+import pandas as pd
+import pm4py
+
+from ..optimization.data_center import VSDataCenter
+from ..optimization.solver import VSSolver
+from ..utils.profiling import profiled
+from .engine import ACTION_DURATION, VEHICLE_SPEED, VSEventSimulator
+
+
+@profiled("simulate_timeline", count_items=len)
+def simulate_timeline(data_center: VSDataCenter, solver: VSSolver, process_start_time, vehicle_speed: float = VEHICLE_SPEED, action_duration: float = ACTION_DURATION) -> list[dict]:
+    """
+    Run the optimization rounds until all orders are assigned, and simulate the timeline of each assignment (see `VSEventSimulator`)
+    :param data_center: Data center of the terminal (updated in place by the solver)
+    :param solver: Solver used for the optimization rounds
+    :param process_start_time: Start time of the first dispatch of each vehicle
+    :param vehicle_speed: Driving speed of vehicles in mm/s
+    :param action_duration: Duration of picking/dropping a container in seconds
+    :return: One tracking record per container order
+    """
+    simulator = VSEventSimulator(data_center, process_start_time=process_start_time, vehicle_speed=vehicle_speed, action_duration=action_duration)
+    while not solver.opt_ended():
+        solver.optimize()
+        simulator.add_assignments(solver.opt_x)
+        solver.update_environment()
+
+    return simulator.run()
+
+
+@profiled("create_simulated_event_log", count_items=len)
+def create_simulated_event_log(tracking_list: list[dict]) -> pd.DataFrame:
+    """
+    Create an event log from the tracking records of a simulated timeline, with start/complete events of the dispatch, waiting and pick/drop activities of each container order
+    """
+    event_log = []
+    for record in tracking_list:
+        pick_waiting_time = (record['pickup_start_time'] - record['arrival_time_at_origin']).seconds
+        drop_waiting_time = (record['drop_start_time'] - record['arrival_time_at_dest']).seconds
+        base_event = {"case_id": record['co_id'], "resource": record["v_id"]}
+        event_log.extend([
+            {**base_event, "activity": "dispatch vehicle to pick container", "timestamp": record["dispatch_to_pick"], "lifecycle": "start",
+             "distance": record["dist_vehicle_to_origin"], "driving_time": record["driving_time_to_origin"]},
+            {**base_event, "activity": "dispatch vehicle to pick container", "timestamp": record["arrival_time_at_origin"], "lifecycle": "complete",
+             "distance": record["dist_vehicle_to_origin"], "driving_time": record["driving_time_to_origin"]},
+            {**base_event, "activity": "wait for free lane to pick", "timestamp": record["arrival_time_at_origin"], "lifecycle": "start",
+             "location": record["origin"], "location_type": record["origin_type"], "waiting_time": pick_waiting_time},
+            {**base_event, "activity": "wait for free lane to pick", "timestamp": record["pickup_start_time"], "lifecycle": "complete",
+             "location": record["origin"], "location_type": record["origin_type"], "waiting_time": pick_waiting_time},
+            {**base_event, "activity": "pick container", "timestamp": record["pickup_start_time"], "lifecycle": "start", "location": record["origin"], "location_type": record["origin_type"]},
+            {**base_event, "activity": "pick container", "timestamp": record["pickup_end_time"], "lifecycle": "complete", "location": record["origin"], "location_type": record["origin_type"]},
+            {**base_event, "activity": "dispatch vehicle to drop container", "timestamp": record["dispatch_to_drop"], "lifecycle": "start",
+             "distance": record["dist_origin_to_dest"], "location_type": record["origin_type"], "driving_time": record["driving_time_to_dest"]},
+            {**base_event, "activity": "dispatch vehicle to drop container", "timestamp": record["arrival_time_at_dest"], "lifecycle": "complete",
+             "distance": record["dist_origin_to_dest"], "driving_time": record["driving_time_to_dest"]},
+            {**base_event, "activity": "wait for free lane to drop", "timestamp": record["arrival_time_at_dest"], "lifecycle": "start",
+             "location": record["dest"], "location_type": record["dest_type"], "waiting_time": drop_waiting_time},
+            {**base_event, "activity": "wait for free lane to drop", "timestamp": record["drop_start_time"], "lifecycle": "complete",
+             "location": record["dest"], "location_type": record["dest_type"], "waiting_time": drop_waiting_time},
+            {**base_event, "activity": "drop container", "timestamp": record["drop_start_time"], "lifecycle": "start", "location": record["dest"], "location_type": record["dest_type"]},
+            {**base_event, "activity": "drop container", "timestamp": record["drop_end_time"], "lifecycle": "complete", "location": record["dest"], "location_type": record["dest_type"]},
+        ])
+
+    event_log_df = pd.DataFrame(event_log)
+    event_log_df = pm4py.format_dataframe(event_log_df, case_id="case_id", activity_key="activity", timestamp_key="timestamp")
+    event_log_df = event_log_df.rename(columns={"resource": "org:resource", "lifecycle": "lifecycle:transition"})
+    event_log_df["location"] = event_log_df["location"].fillna(value="")
+    return event_log_df
+
+
+def get_timeline_kpis(tracking_list: list[dict], process_start_time) -> dict:
+    """
+    Key figures of a simulated timeline: total travelled distance (mm), mean waiting time for a free lane per action (s), and makespan (s) from the process start until the last drop
+    """
+    if not tracking_list:
+        return {"num_orders": 0, "total_distance": 0.0, "mean_waiting_time": 0.0, "makespan": 0.0}
+
+    tracking_df = pd.DataFrame(tracking_list)
+    waiting_times = pd.concat([
+        tracking_df["pickup_start_time"] - tracking_df["arrival_time_at_origin"],
+        tracking_df["drop_start_time"] - tracking_df["arrival_time_at_dest"]
+    ]).dt.total_seconds()
+    return {
+        "num_orders": len(tracking_df),
+        "total_distance": float((tracking_df["dist_vehicle_to_origin"] + tracking_df["dist_origin_to_dest"]).sum()),
+        "mean_waiting_time": float(waiting_times.mean()),
+        "makespan": (tracking_df["drop_end_time"].max() - pd.Timestamp(process_start_time)).total_seconds()
+    }
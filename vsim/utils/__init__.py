@@ -1,3 +1,7 @@
 from .data import *
 from .log_parser import *
-from .general import *
\ No newline at end of file
+from .general import *
+from .cache import *
+from .records import *
+from .profiling import *
+from .event_log_io import *
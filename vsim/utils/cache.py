@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .data import get_processed_metadata
+from .log_parser import get_parsed_logs, log_patterns
+
+METADATA_FRAMES = ["locations", "vehicles", "container_orders"]
+ENTRY_META_KEYS = ["source_path", "source_size", "source_mtime_ns", "content_hash", "kind", "size_bytes", "last_access"]
+
+
+class VSCache:
+    """
+    On-disk cache of parsed logs and processed metadata as Arrow IPC (Feather) files, keyed by the path, size, modification time and content hash of the source file.
+    The least recently used entries are evicted once the cache exceeds `max_size_bytes`
+    """
+    def __init__(self, cache_dir: str = ".vsim_cache", max_size_bytes: int = 4 * 1024 ** 3):
+        self._cache_dir = cache_dir
+        self._max_size_bytes = max_size_bytes
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    def get_parsed_logs(self, log_file_path: str, num_workers: Optional[int] = 1):
+        """
+        Cached version of `get_parsed_logs`, returning the same (logs_by_pattern, parsed_logs) tuple
+        """
+        fingerprint = self._get_fingerprint(log_file_path)
+        entry_dir = self._get_entry_dir(fingerprint, kind="logs")
+        if entry_dir is None:
+            logs_by_pattern, parsed_logs = get_parsed_logs(log_file_path=log_file_path, num_workers=num_workers)
+            self._write_entry(fingerprint, kind="logs", write_fn=lambda tmp_dir: self._write_parsed_logs(tmp_dir, logs_by_pattern, parsed_logs))
+            return logs_by_pattern, parsed_logs
+
+        return self._read_parsed_logs(entry_dir)
+
+    def get_parsed_log_frames(self, log_file_path: str, num_workers: Optional[int] = 1) -> dict[str, pd.DataFrame]:
+        """
+        Load the parsed logs of each pattern as a typed DataFrame with the position of each log among all parsed logs (see `create_event_log_from_frames`)
+        """
+        fingerprint = self._get_fingerprint(log_file_path)
+        entry_dir = self._get_entry_dir(fingerprint, kind="logs")
+        if entry_dir is None:
+            logs_by_pattern, parsed_logs = get_parsed_logs(log_file_path=log_file_path, num_workers=num_workers)
+            # The entry just written is never evicted, so the frames can be loaded from it right away
+            entry_dir = self._write_entry(fingerprint, kind="logs", write_fn=lambda tmp_dir: self._write_parsed_logs(tmp_dir, logs_by_pattern, parsed_logs))
+
+        log_order = self._read_table(entry_dir, "_order").column("pattern").to_numpy()
+        log_dfs = {}
+        for code, pattern in enumerate(log_patterns):
+            log_dfs[pattern] = self._read_table(entry_dir, pattern).to_pandas()
+            log_dfs[pattern]["position"] = np.flatnonzero(log_order == code)
+
+        return log_dfs
+
+    def get_processed_metadata(self, meta_file_path: str):
+        """
+        Cached version of `get_processed_metadata`, returning the same (locations, vehicles, container orders) DataFrames
+        """
+        fingerprint = self._get_fingerprint(meta_file_path)
+        entry_dir = self._get_entry_dir(fingerprint, kind="metadata")
+        if entry_dir is None:
+            metadata_dfs = get_processed_metadata(meta_file_path=meta_file_path)
+            self._write_entry(fingerprint, kind="metadata", write_fn=lambda tmp_dir: self._write_metadata(tmp_dir, metadata_dfs))
+            return metadata_dfs
+
+        return tuple(self._read_table(entry_dir, frame_name).to_pandas() for frame_name in METADATA_FRAMES)
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """
+        Remove all cache entries of a source file, or the whole cache if no file is given
+        """
+        source_path = None if file_path is None else os.path.abspath(file_path)
+        for entry_dir, entry_meta in self._iter_entries():
+            if source_path is None or entry_meta["source_path"] == source_path:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def get_cache_size(self) -> int:
+        """
+        Total size of the cache entries in bytes
+        """
+        return sum(entry_meta["size_bytes"] for _, entry_meta in self._iter_entries())
+
+    def _get_fingerprint(self, file_path: str) -> dict:
+        source_path = os.path.abspath(file_path)
+        file_stat = os.stat(source_path)
+        fingerprint = {"source_path": source_path, "source_size": file_stat.st_size, "source_mtime_ns": file_stat.st_mtime_ns}
+
+        # Reuse the content hash of an entry of the same unchanged file instead of re-reading the whole file
+        content_hash = None
+        for _, entry_meta in self._iter_entries():
+            if all(entry_meta[key] == value for key, value in fingerprint.items()):
+                content_hash = entry_meta["content_hash"]
+                break
+        if content_hash is None:
+            content_hash = compute_file_hash(source_path)
+        fingerprint["content_hash"] = content_hash
+
+        return fingerprint
+
+    def _get_entry_key(self, fingerprint: dict, kind: str) -> str:
+        key_source = "|".join([kind, fingerprint["source_path"], str(fingerprint["source_size"]), str(fingerprint["source_mtime_ns"]), fingerprint["content_hash"]])
+        return hashlib.sha256(key_source.encode()).hexdigest()[:32]
+
+    def _get_entry_dir(self, fingerprint: dict, kind: str) -> Optional[str]:
+        """
+        Find the directory of the cache entry corresponding to the current state of a file (see `_get_fingerprint`). If there's a hit, the last access time of the entry is updated
+        """
+        entry_dir = os.path.join(self._cache_dir, self._get_entry_key(fingerprint, kind))
+        entry_meta = self._read_entry_meta(entry_dir)
+        if entry_meta is None:
+            return None
+
+        entry_meta["last_access"] = time.time()
+        try:
+            self._write_entry_meta(entry_dir, entry_meta)
+        except OSError:
+            # The entry was removed in the meantime, e.g. evicted by another process
+            return None
+        return entry_dir
+
+    def _write_entry(self, fingerprint: dict, kind: str, write_fn) -> str:
+        """
+        Write the cache entry of a file state (see `_get_fingerprint`), and evict other entries if the cache exceeds its size limit
+        :return: Directory of the written entry
+        """
+        entry_dir = os.path.join(self._cache_dir, self._get_entry_key(fingerprint, kind))
+
+        # Write into a temporary directory first, so that partially written entries are never picked up
+        tmp_dir = f"{entry_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        write_fn(tmp_dir)
+        size_bytes = sum(os.path.getsize(os.path.join(tmp_dir, file_name)) for file_name in os.listdir(tmp_dir))
+        self._write_entry_meta(tmp_dir, {**fingerprint, "kind": kind, "size_bytes": size_bytes, "last_access": time.time()})
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        self._evict(keep_entry_dir=entry_dir)
+        return entry_dir
+
+    def _evict(self, keep_entry_dir: Optional[str] = None):
+        """
+        Remove the least recently used entries until the cache fits into its size limit
+        :param keep_entry_dir: Entry which is never removed (e.g. the one just written), even if it alone exceeds the size limit
+        """
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[1]["last_access"])
+        cache_size = sum(entry_meta["size_bytes"] for _, entry_meta in entries)
+        for entry_dir, entry_meta in entries:
+            if cache_size <= self._max_size_bytes:
+                break
+            if entry_dir == keep_entry_dir:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            cache_size -= entry_meta["size_bytes"]
+
+    def _iter_entries(self):
+        for entry_name in os.listdir(self._cache_dir):
+            entry_dir = os.path.join(self._cache_dir, entry_name)
+            entry_meta = self._read_entry_meta(entry_dir)
+            if entry_meta is not None:
+                yield entry_dir, entry_meta
+
+    @staticmethod
+    def _read_entry_meta(entry_dir: str) -> Optional[dict]:
+        if entry_dir.endswith(".tmp"):
+            return None
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), "r") as meta_fp:
+                entry_meta = json.load(meta_fp)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+
+        # Entries with unreadable or incomplete metadata are treated as missing
+        if not isinstance(entry_meta, dict) or not all(key in entry_meta for key in ENTRY_META_KEYS):
+            return None
+        return entry_meta
+
+    @staticmethod
+    def _write_entry_meta(entry_dir: str, entry_meta: dict):
+        """
+        Write the metadata of an entry into a temporary file, which then replaces `meta.json` atomically
+        """
+        meta_fd, tmp_meta_path = tempfile.mkstemp(dir=entry_dir, prefix="meta.", suffix=".tmp")
+        try:
+            with os.fdopen(meta_fd, "w") as meta_fp:
+                json.dump(entry_meta, meta_fp)
+            os.replace(tmp_meta_path, os.path.join(entry_dir, "meta.json"))
+        except BaseException:
+            if os.path.exists(tmp_meta_path):
+                os.remove(tmp_meta_path)
+            raise
+
+    @staticmethod
+    def _write_parsed_logs(entry_dir: str, logs_by_pattern: dict[str, list[dict]], parsed_logs: list[tuple[str, dict]]):
+        for pattern, records in logs_by_pattern.items():
+            feather.write_feather(pa.Table.from_pylist(records), os.path.join(entry_dir, f"{pattern}.arrow"), compression="uncompressed")
+
+        # Keep the original order of logs across patterns as a sequence of pattern codes
+        pattern_codes = {pattern: code for code, pattern in enumerate(log_patterns)}
+        log_order = np.fromiter((pattern_codes[pattern] for pattern, _ in parsed_logs), dtype=np.uint8, count=len(parsed_logs))
+        feather.write_feather(pa.table({"pattern": log_order}), os.path.join(entry_dir, "_order.arrow"), compression="uncompressed")
+
+    def _read_parsed_logs(self, entry_dir: str):
+        logs_by_pattern = {pattern: self._read_table(entry_dir, pattern).to_pylist() for pattern in log_patterns}
+        # Nested lists are loaded as lists, whereas the parser extracts schedules as tuples
+        for record in logs_by_pattern["init_scheduling"]:
+            record["schedules"] = [tuple(schedule) for schedule in record["schedules"]]
+
+        pattern_names = list(log_patterns)
+        record_iters = {pattern: iter(records) for pattern, records in logs_by_pattern.items()}
+        log_order = self._read_table(entry_dir, "_order").column("pattern").to_numpy()
+        parsed_logs = []
+        for code in log_order.tolist():
+            pattern = pattern_names[code]
+            parsed_logs.append((pattern, next(record_iters[pattern])))
+
+        return logs_by_pattern, parsed_logs
+
+    @staticmethod
+    def _write_metadata(entry_dir: str, metadata_dfs: tuple[pd.DataFrame, ...]):
+        for frame_name, df in zip(METADATA_FRAMES, metadata_dfs):
+            feather.write_feather(df, os.path.join(entry_dir, f"{frame_name}.arrow"), compression="uncompressed")
+
+    @staticmethod
+    def _read_table(entry_dir: str, name: str) -> pa.Table:
+        return feather.read_table(os.path.join(entry_dir, f"{name}.arrow"), memory_map=True)
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 8 * 1024 ** 2) -> str:
+    """
+    Hash the content of a file by reading it in chunks
+    """
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as fp:
+        while chunk := fp.read(chunk_size):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
@@ -1,12 +1,87 @@
 from datetime import timedelta
+from typing import Iterator, Optional
+import numpy as np
 import pandas as pd
 import pm4py
 import re
 
+from .log_parser import follow_log_lines, parse_log_line
+from .profiling import get_active_profiler, profiled
 
-def get_processed_metadata(meta_file_path: str):
+# Columns of the events created for each log pattern, in the order they're added to the event records
+event_log_columns = {
+    "container_submission": ["to_id", "co_id", "action", "timestamp", "lifecycle"],
+    "travel_action_schedule": ["to_id", "co_id", "action", "timestamp", "lifecycle"],
+    "driving": ["to_id", "co_id", "vehicle_id", "action", "distance", "timestamp", "lifecycle"],
+    "action": ["to_id", "co_id", "vehicle_id", "location", "action", "timestamp", "lifecycle"]
+}
+# Fields of the parsed logs of each pattern that are required to create the events
+event_log_required_fields = {
+    "container_submission": ["log_time", "to_id"],
+    "travel_action_schedule": ["log_time", "to_id", "co_id", "action", "travel_start_time", "travel_end_time", "action_start_time", "action_end_time"],
+    "driving": ["log_time", "to_id", "co_id", "vehicle_id", "action", "duration_in_s", "distance_in_mm"],
+    "action": ["log_time", "to_id", "co_id", "vehicle_id", "action", "status", "location_name", "duration_in_s"]
+}
+
+# Compact dtypes applied by the builders on request (`optimize_dtypes=True`). Note that groupby on categorical columns should be done with `observed=True`
+event_log_dtypes = {
+    "to_id": "category",
+    "case_id": "category",
+    "activity": "category",
+    "lifecycle:transition": "category",
+    "org:resource": "category",
+    "location": "category",
+    "@@index": "int32",
+    "@@case_index": "int32"
+}
+log_dtypes = {
+    "log_level": "category",
+    "vehicle_id": "category",
+    "to_id": "category",
+    "co_id": "category",
+    "action": "category",
+    "location_name": "category",
+    "driving_time": "int32",
+    "distance_in_mm": "int32",
+    "waiting_time": "int32",
+    "processing_time": "int32"
+}
+metadata_dtypes = {
+    "location_name": "category",
+    "x": "int32",
+    "y": "int32",
+    "location_type": "category",
+    "id": "category",
+    "start_location": "category",
+    "to_id": "category",
+    "co_id": "category",
+    "container_name": "category",
+    "length": "int8",
+    "origin": "category",
+    "dest": "category"
+}
+
+
+def apply_dtype_schema(df: pd.DataFrame, dtype_schema: dict[str, str]) -> pd.DataFrame:
+    """
+    Convert the columns of a DataFrame to the dtypes of a schema (e.g. `event_log_dtypes`), where integer columns with missing values get the nullable dtype (e.g. Int32)
+    """
+    dtypes = {}
+    for column, dtype in dtype_schema.items():
+        if column not in df.columns:
+            continue
+        if pd.api.types.is_integer_dtype(dtype) and df[column].isna().any():
+            dtype = dtype.capitalize()
+        dtypes[column] = dtype
+
+    return df.astype(dtypes)
+
+
+@profiled("get_processed_metadata")
+def get_processed_metadata(meta_file_path: str, optimize_dtypes: bool = False):
     """
     Read and preprocess metadata to ensure consistency between all
+    :param optimize_dtypes: Whether to apply the compact dtypes of `metadata_dtypes`
     """
     locations_meta_df = pd.read_excel(meta_file_path, sheet_name="Locations")
     vehicles_meta_df = pd.read_excel(meta_file_path, sheet_name="Vehicles")
@@ -26,6 +101,9 @@ def get_processed_metadata(meta_file_path: str):
     locations_meta_df["capacity"] = locations_meta_df["capacity"].fillna(float('inf'))
     locations_meta_df["location_type"] = locations_meta_df["location_name"].apply(lambda loc: re.match(pattern=r"[A-Z]+", string=loc)[0])
 
+    if optimize_dtypes:
+        locations_meta_df, vehicles_meta_df, co_meta_df = (apply_dtype_schema(df, metadata_dtypes) for df in [locations_meta_df, vehicles_meta_df, co_meta_df])
+
     return locations_meta_df, vehicles_meta_df, co_meta_df
 
 
@@ -38,17 +116,267 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def create_event_log(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
+@profiled("create_event_log", count_items=len)
+def create_event_log(parsed_logs: list[tuple[str, dict]], columnar: bool = False, optimize_dtypes: bool = False) -> pd.DataFrame:
     """
     Given a list of parsed logs including their pattern and extracted data, create an event log compatible for Process Mining.
     The event log should ensure correct temporal ordering and causal dependencies.
 
     :param parsed_logs: A list of 2-element tuples, where the first element of each tuple represent the log pattern and the second element holds data for the corresponding log.
+    :param columnar: Whether to build the events with whole-DataFrame operations (see `create_event_log_columnar`) instead of iterating over the parsed logs, with the same result
+    :param optimize_dtypes: Whether to apply the compact dtypes of `event_log_dtypes`
     :return: An event log compatible for process mining
     """
+    if columnar:
+        return create_event_log_columnar(parsed_logs, optimize_dtypes=optimize_dtypes)
+
+    return format_event_log(pd.DataFrame(create_event_records(parsed_logs)), optimize_dtypes=optimize_dtypes)
+
+
+def create_event_records(parsed_logs: list[tuple[str, dict]]) -> list[dict]:
+    """
+    Iterate over the parsed logs and create the start and complete event records of each relevant log (see `create_event_log`)
+    """
     event_log = []
-    opt_schedules = {}
+    event_log_builder = VSEventLogBuilder()
     for pattern, log_data in parsed_logs:
+        event_log.extend(event_log_builder.create_events(pattern, log_data))
+
+    return event_log
+
+
+@profiled("create_event_log_columnar", count_items=len)
+def create_event_log_columnar(parsed_logs: list[tuple[str, dict]], optimize_dtypes: bool = False) -> pd.DataFrame:
+    """
+    Columnar version of `create_event_log`, creating the events of each pattern from one DataFrame of its parsed logs
+    """
+    return create_event_log_from_frames(create_log_frames(parsed_logs), optimize_dtypes=optimize_dtypes)
+
+
+def create_log_frames(parsed_logs: list[tuple[str, dict]]) -> dict[str, pd.DataFrame]:
+    """
+    Split parsed logs into one DataFrame per pattern relevant for the event log, holding the fields required for the events and the position of each log within the parsed logs
+    """
+    records_by_pattern = {pattern: [] for pattern in event_log_required_fields}
+    positions_by_pattern = {pattern: [] for pattern in event_log_required_fields}
+    for position, (pattern, log_data) in enumerate(parsed_logs):
+        if pattern in records_by_pattern:
+            records_by_pattern[pattern].append(log_data)
+            positions_by_pattern[pattern].append(position)
+
+    # Only extract the fields required for the events, column by column
+    log_dfs = {}
+    for pattern, records in records_by_pattern.items():
+        if not records:
+            continue
+        columns = {}
+        for field in event_log_required_fields[pattern]:
+            values = [record[field] for record in records]
+            columns[field] = pd.to_datetime(values) if field.endswith("_time") else values
+        columns["position"] = np.asarray(positions_by_pattern[pattern], dtype=np.int64)
+        log_dfs[pattern] = pd.DataFrame(columns)
+
+    return log_dfs
+
+
+@profiled("create_event_log_from_frames", count_items=len)
+def create_event_log_from_frames(log_dfs: dict[str, pd.DataFrame], optimize_dtypes: bool = False) -> pd.DataFrame:
+    """
+    Create an event log from DataFrames of parsed logs per pattern (as in `create_event_log`).
+    :param log_dfs: Parsed logs of each pattern, where the `position` column holds the position of each log within the whole log sequence. Missing patterns are treated as empty
+    :param optimize_dtypes: Whether to apply the compact dtypes of `event_log_dtypes`
+    :return: An event log compatible for process mining
+    """
+    event_dfs = {}
+    schedule_df = log_dfs.get("travel_action_schedule")
+
+    if (submission_df := log_dfs.get("container_submission")) is not None:
+        event_dfs["container_submission"] = pd.DataFrame({
+            "to_id": submission_df["to_id"],
+            "co_id": submission_df["to_id"].str.removeprefix("TO_"),
+            "action": "submit for scheduling",
+            "start_time": submission_df["log_time"],
+            "end_time": submission_df["log_time"],
+            "position": submission_df["position"]
+        })
+
+    if schedule_df is not None:
+        event_dfs["travel_action_schedule"] = pd.DataFrame({
+            "to_id": schedule_df["to_id"],
+            "co_id": schedule_df["co_id"],
+            "action": "schedule " + schedule_df["action"].str.lower() + " by optimizer",
+            "start_time": schedule_df["log_time"],
+            "end_time": schedule_df["log_time"],
+            "position": schedule_df["position"]
+        })
+
+    if (driving_df := log_dfs.get("driving")) is not None:
+        driving_df = join_latest_schedule(driving_df, schedule_df)
+        start_time = np.minimum(driving_df["log_time"], driving_df["travel_start_time"])
+        extracted_duration = (driving_df["travel_end_time"] - driving_df["travel_start_time"]).dt.total_seconds()
+        duration = np.minimum(extracted_duration, driving_df["duration_in_s"])
+        event_dfs["driving"] = pd.DataFrame({
+            "to_id": driving_df["to_id"],
+            "co_id": driving_df["co_id"],
+            "vehicle_id": driving_df["vehicle_id"],
+            "action": "dispatch vehicle to " + driving_df["action"].str.lower() + " container",
+            "distance": driving_df["distance_in_mm"],
+            "start_time": start_time,
+            "end_time": start_time + pd.to_timedelta(duration, unit="s"),
+            "position": driving_df["position"]
+        })
+
+    if (action_df := log_dfs.get("action")) is not None:
+        action_df = action_df[action_df["status"] != "finished"]
+        if not action_df["status"].isin(["working", "waited"]).all():
+            raise ValueError("Invalid status for action")
+
+        working_df = join_latest_schedule(action_df[action_df["status"] == "working"], schedule_df)
+        extracted_duration = (working_df["action_end_time"] - working_df["action_start_time"]).dt.total_seconds()
+        working_df = working_df.assign(
+            action=working_df["action"].str.lower() + " container",
+            start_time=working_df["log_time"],
+            end_time=working_df["log_time"] + pd.to_timedelta(np.minimum(extracted_duration, working_df["duration_in_s"]), unit="s")
+        )
+        waited_df = action_df[action_df["status"] == "waited"]
+        waited_df = waited_df.assign(
+            action="wait for free lane to " + waited_df["action"].str.lower(),
+            start_time=waited_df["log_time"] - pd.to_timedelta(waited_df["duration_in_s"], unit="s"),
+            end_time=waited_df["log_time"]
+        )
+        event_dfs["action"] = pd.concat([working_df, waited_df]).rename(columns={"location_name": "location"})
+
+    # Create one start and one complete event per log, and restore the order of the logs
+    event_df_list = []
+    for pattern, event_df in event_dfs.items():
+        columns = [column for column in event_log_columns[pattern] if column not in ["timestamp", "lifecycle"]]
+        for lifecycle_order, (lifecycle, time_column) in enumerate([("start", "start_time"), ("complete", "end_time")]):
+            event_df_list.append(
+                event_df[columns + ["position"]].assign(timestamp=event_df[time_column], lifecycle=lifecycle, lifecycle_order=lifecycle_order)
+            )
+    event_log_df = pd.concat(event_df_list, ignore_index=True)
+    event_log_df = event_log_df.sort_values(["position", "lifecycle_order"], kind="stable", ignore_index=True)
+
+    # Keep the columns in the order in which they first appear within the events
+    first_positions = {pattern: event_df["position"].min() for pattern, event_df in event_dfs.items() if len(event_df) > 0}
+    ordered_columns = []
+    for pattern in sorted(first_positions, key=first_positions.get):
+        ordered_columns.extend(column for column in event_log_columns[pattern] if column not in ordered_columns)
+    event_log_df = event_log_df[ordered_columns]
+
+    return format_event_log(event_log_df, optimize_dtypes=optimize_dtypes)
+
+
+def join_latest_schedule(log_df: pd.DataFrame, schedule_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join each log to the latest optimizer schedule (travel_action_schedule log) of the same container preceding it
+    """
+    schedule_columns = ["travel_start_time", "travel_end_time", "action_start_time", "action_end_time"]
+    if schedule_df is None:
+        # Keys of the same dtypes as the logs, since merge_asof rejects keys of mismatching dtypes
+        schedule_df = pd.DataFrame({
+            "co_id": pd.Series(dtype=log_df["co_id"].dtype),
+            "position": pd.Series(dtype=log_df["position"].dtype),
+            **{column: pd.Series(dtype="datetime64[ns]") for column in schedule_columns}
+        })
+
+    joined_df = pd.merge_asof(
+        log_df.sort_values("position"),
+        schedule_df[["co_id", "position", *schedule_columns]].rename(columns={"position": "schedule_position"}).sort_values("schedule_position"),
+        left_on="position",
+        right_on="schedule_position",
+        by="co_id",
+        direction="backward",
+        allow_exact_matches=False
+    )
+    unscheduled_co_ids = joined_df.loc[joined_df["schedule_position"].isna(), "co_id"].unique()
+    if len(unscheduled_co_ids) > 0:
+        raise KeyError(f"No preceding optimizer schedule for containers: {list(unscheduled_co_ids)}")
+
+    return joined_df
+
+
+def format_event_log(event_log_df: pd.DataFrame, optimize_dtypes: bool = False) -> pd.DataFrame:
+    """
+    Propagate vehicles to all events of each container, and format the event log to make it compatible for process mining
+    :param optimize_dtypes: Whether to apply the compact dtypes of `event_log_dtypes`
+    """
+    # Ensure correct vehicle resource is propagated for all events corresponding to one container (case)
+    event_log_df["vehicle_id"] = event_log_df.groupby("co_id")["vehicle_id"].bfill()
+    event_log_df["vehicle_id"] = event_log_df.groupby("co_id")["vehicle_id"].ffill()
+
+    # Format and rename the event log dataframe columns to make it compatible for process mining
+    event_log_df = event_log_df.rename(columns={"co_id": "case_id", "action": "activity", "vehicle_id": "org:resource", "lifecycle": "lifecycle:transition"})
+    event_log_df = pm4py.format_dataframe(event_log_df, case_id='case_id', activity_key='activity', timestamp_key='timestamp')
+    # Missing strings are left empty, whereas numeric columns (distance of the driving events) keep NaN
+    object_columns = event_log_df.select_dtypes("object").columns
+    event_log_df[object_columns] = event_log_df[object_columns].fillna("")
+    if optimize_dtypes:
+        event_log_df = apply_dtype_schema(event_log_df, event_log_dtypes)
+
+    return event_log_df
+
+
+class VSEventLogBuilder:
+    """
+    Incrementally create the events of the event log (see `create_event_log`) from parsed logs provided one at a time, e.g. while following the log file of a running simulation.
+    Events without a vehicle are held back until the next vehicle event of the same container
+    """
+    def __init__(self):
+        self._opt_schedules = {}
+        self._pending_events = {}
+        self._case_vehicles = {}
+
+    def add(self, pattern: str, log_data: dict) -> list[dict]:
+        """
+        Process a parsed log and return the events that are finished, i.e., whose vehicle is known
+        """
+        finished_events = []
+        events = self.create_events(pattern, log_data)
+        if events:
+            co_id = events[0]["co_id"]
+            vehicle_id = events[0].get("vehicle_id")
+            if vehicle_id is None:
+                self._pending_events.setdefault(co_id, []).extend(events)
+            else:
+                self._case_vehicles[co_id] = vehicle_id
+                finished_events.extend(self._release_pending_events(co_id))
+                finished_events.extend(events)
+
+        if pattern == "finish_schedule_element" and log_data["action"] == "DROP":
+            finished_events.extend(self._release_pending_events(log_data["co_id"]))
+            self._opt_schedules.pop(log_data["co_id"], None)
+            self._case_vehicles.pop(log_data["co_id"], None)
+
+        return finished_events
+
+    def flush(self) -> list[dict]:
+        """
+        Emit all events that are still held back, e.g. once the log is complete
+        """
+        finished_events = []
+        for co_id in list(self._pending_events):
+            finished_events.extend(self._release_pending_events(co_id))
+
+        return finished_events
+
+    def tail(self, log_file_path: str, poll_interval: float = 1.0, idle_timeout: Optional[float] = None) -> Iterator[dict]:
+        """
+        Follow a (growing) log file and yield its events as they become available. Stops once no new log has been appended for `idle_timeout` seconds, or never if it's None
+        """
+        profiler = get_active_profiler()
+        parse_counters = None if profiler is None else profiler.parse_counters
+        for log_line in follow_log_lines(log_file_path=log_file_path, poll_interval=poll_interval, idle_timeout=idle_timeout):
+            pattern, log_data = parse_log_line(log_line.strip(), parse_counters=parse_counters)
+            if pattern:
+                yield from self.add(pattern, log_data)
+
+        yield from self.flush()
+
+    def create_events(self, pattern: str, log_data: dict) -> list[dict]:
+        """
+        Create the start and complete events of a parsed log, without propagating vehicles. The latest optimizer schedule of each container is kept to estimate durations
+        """
         log_time = log_data["log_time"]
         # Submission of a container to the realm of the optimizer
         if pattern == "container_submission":
@@ -69,7 +397,7 @@ def create_event_log(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
                 "action": f"schedule {log_data['action'].lower()} by optimizer",
                 "timestamp": log_time
             }
-            opt_schedules[log_data["co_id"]] = log_data
+            self._opt_schedules[log_data["co_id"]] = log_data
             start_event = {**opt_scheduling, 'lifecycle': 'start'}
             end_event = {**opt_scheduling, 'lifecycle': 'complete'}
         # Actual driving log
@@ -79,9 +407,10 @@ def create_event_log(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
                 "co_id": log_data["co_id"],
                 "vehicle_id": log_data["vehicle_id"],
                 "action": f"dispatch vehicle to {log_data['action'].lower()} container",
+                "distance": log_data["distance_in_mm"]
             }
-            start_time = min(log_time, opt_schedules[log_data["co_id"]]["travel_start_time"])
-            extracted_duration = (opt_schedules[log_data["co_id"]]["travel_end_time"] - opt_schedules[log_data["co_id"]]["travel_start_time"]).total_seconds()
+            start_time = min(log_time, self._opt_schedules[log_data["co_id"]]["travel_start_time"])
+            extracted_duration = (self._opt_schedules[log_data["co_id"]]["travel_end_time"] - self._opt_schedules[log_data["co_id"]]["travel_start_time"]).total_seconds()
             reported_duration = log_data['duration_in_s']
             start_event = {**event, 'timestamp': start_time, 'lifecycle': 'start'}
             end_event = {**event, 'timestamp': start_time + timedelta(seconds=min(extracted_duration, reported_duration)), 'lifecycle': 'complete'}
@@ -96,7 +425,7 @@ def create_event_log(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
             if log_data["status"] == "working":
                 action = f"{log_data['action'].lower()} container"
                 start_time = log_time
-                extracted_duration = (opt_schedules[log_data["co_id"]]["action_end_time"] - opt_schedules[log_data["co_id"]]["action_start_time"]).total_seconds()
+                extracted_duration = (self._opt_schedules[log_data["co_id"]]["action_end_time"] - self._opt_schedules[log_data["co_id"]]["action_start_time"]).total_seconds()
                 reported_duration = log_data['duration_in_s']
                 end_time = log_time + timedelta(seconds=min(extracted_duration, reported_duration))
             elif log_data["status"] == "waited":
@@ -104,7 +433,7 @@ def create_event_log(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
                 start_time = log_time - timedelta(seconds=log_data['duration_in_s'])
                 end_time = log_time
             elif log_data["status"] == "finished":
-                continue
+                return []
             else:
                 raise ValueError("Invalid status for action")
 
@@ -112,49 +441,124 @@ def create_event_log(parsed_logs: list[tuple[str, dict]]) -> pd.DataFrame:
             start_event = {**event, 'timestamp': start_time, 'lifecycle': 'start'}
             end_event = {**event, 'timestamp': end_time, 'lifecycle': 'complete'}
         else:
-            continue
-        event_log.extend([start_event, end_event])
+            return []
 
-    event_log_df = pd.DataFrame(event_log)
-    # Ensure correct vehicle resource is propagated for all events corresponding to one container (case)
-    event_log_df["vehicle_id"] = event_log_df.groupby("co_id")["vehicle_id"].transform(lambda x: x.bfill().ffill())
+        return [start_event, end_event]
 
-    # Format and rename the event log dataframe columns to make it compatible for process mining
-    event_log_df = event_log_df.rename(columns={"co_id": "case_id", "action": "activity", "vehicle_id": "org:resource", "lifecycle": "lifecycle:transition"})
-    event_log_df = pm4py.format_dataframe(event_log_df, case_id='case_id', activity_key='activity', timestamp_key='timestamp')
-    #
-    event_log_df = event_log_df.fillna("")
+    def _release_pending_events(self, co_id: str) -> list[dict]:
+        vehicle_id = self._case_vehicles.get(co_id)
+        return [{**event, "vehicle_id": vehicle_id} for event in self._pending_events.pop(co_id, [])]
 
-    return event_log_df
+    @property
+    def num_running_cases(self) -> int:
+        return len(set(self._opt_schedules) | set(self._pending_events) | set(self._case_vehicles))
 
 
 def create_position_tracking_df(position_tracking_logs: list[dict], vehicles_meta_df: pd.DataFrame, locations_meta_df: pd.DataFrame):
-    # Merge vehicles and locations table to get the initial coordinates of vehicles
-    vehicle_location_df = vehicles_meta_df.merge(locations_meta_df, how="left", left_on="start_location", right_on="location_name")
+    """
+    Route of each vehicle as lists of x and y coordinates, starting at the start location of the vehicle followed by its tracked positions (see `create_vehicle_routes` for the array-based routes)
+    """
+    return create_vehicle_routes(position_tracking_logs, vehicles_meta_df=vehicles_meta_df, locations_meta_df=locations_meta_df).to_frame()
+
+
+@profiled("create_vehicle_routes", count_items=len)
+def create_vehicle_routes(position_tracking_logs, vehicles_meta_df: pd.DataFrame, locations_meta_df: pd.DataFrame) -> "VSVehicleRoutes":
+    """
+    Build the routes of all vehicles in one pass, each starting at the start location of the vehicle followed by its tracked positions
+    :param position_tracking_logs: Parsed position tracking logs, either as dictionaries or as a DataFrame
+    :param vehicles_meta_df: Vehicles metadata (see `get_processed_metadata`)
+    :param locations_meta_df: Locations metadata (see `get_processed_metadata`)
+    """
+    positions_df = pd.DataFrame(position_tracking_logs, columns=["vehicle_id", "x", "y"])
+    start_df = vehicles_meta_df[["id", "start_location"]].merge(locations_meta_df[["location_name", "x", "y"]], how="inner", left_on="start_location", right_on="location_name")
+    # Only vehicles with tracked positions have a route
+    start_df = start_df.rename(columns={"id": "vehicle_id"}).loc[lambda df: df["vehicle_id"].isin(positions_df["vehicle_id"]), ["vehicle_id", "x", "y"]]
+
+    route_points_df = pd.concat([start_df, positions_df], ignore_index=True)
+    is_tracked = np.concatenate([np.zeros(len(start_df), dtype=np.int8), np.ones(len(positions_df), dtype=np.int8)])
+    vehicle_codes, vehicle_ids = pd.factorize(route_points_df["vehicle_id"], sort=True)
+    # Stable sort by vehicle, with the start coordinates first and the tracked positions in their original order
+    point_order = np.lexsort((is_tracked, vehicle_codes))
+    num_points = np.bincount(vehicle_codes, minlength=len(vehicle_ids))
+
+    return VSVehicleRoutes(
+        vehicle_ids=np.asarray(vehicle_ids, dtype=object),
+        coordinates=route_points_df[["x", "y"]].to_numpy(dtype=np.int64)[point_order],
+        offsets=np.concatenate([[0], np.cumsum(num_points)]).astype(np.int64)
+    )
+
+
+class VSVehicleRoutes:
+    """
+    Routes of vehicles stored as one contiguous (n, 2) array of x/y coordinates, where the route of the i-th vehicle spans the rows offsets[i]:offsets[i + 1]
+    """
+    def __init__(self, vehicle_ids: np.ndarray, coordinates: np.ndarray, offsets: np.ndarray):
+        self._vehicle_ids = vehicle_ids
+        self._coordinates = coordinates
+        self._offsets = offsets
+        self._vehicle_index = {vehicle_id: idx for idx, vehicle_id in enumerate(vehicle_ids)}
+
+    def __len__(self):
+        return len(self._vehicle_ids)
+
+    def get_route(self, vehicle_id) -> np.ndarray:
+        vehicle_idx = self._vehicle_index[vehicle_id]
+        return self._coordinates[self._offsets[vehicle_idx]:self._offsets[vehicle_idx + 1]]
+
+    def get_route_stats(self) -> pd.DataFrame:
+        """
+        Number of route points, number of segments, and length (Manhattan distance in mm, as between locations) of the route of each vehicle
+        """
+        num_points = np.diff(self._offsets)
+        segment_lengths = np.abs(np.diff(self._coordinates, axis=0)).sum(axis=1)
+        # Segments between the last point of a vehicle and the first point of the next one don't belong to any route
+        point_vehicles = np.repeat(np.arange(len(self._vehicle_ids)), num_points)
+        is_route_segment = point_vehicles[1:] == point_vehicles[:-1]
+        route_lengths = np.bincount(point_vehicles[1:][is_route_segment], weights=segment_lengths[is_route_segment], minlength=len(self._vehicle_ids))
+
+        return pd.DataFrame({
+            "vehicle_id": self._vehicle_ids,
+            "num_points": num_points,
+            "num_segments": np.maximum(num_points - 1, 0),
+            "route_length": route_lengths
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Routes as lists of x and y coordinates per vehicle (e.g. for `visualize_terminal_map`)
+        """
+        routes = np.split(self._coordinates, self._offsets[1:-1])
+        return pd.DataFrame({
+            "vehicle_id": self._vehicle_ids,
+            "x": [route[:, 0].tolist() for route in routes],
+            "y": [route[:, 1].tolist() for route in routes]
+        })
 
-    def add_initial_location(row):
-        # Add the start location of vehicles to the position tracking list of vehicles
-        vehicle_rec = vehicle_location_df[vehicle_location_df["id"] == row["vehicle_id"]]
-        row["x"].insert(0, vehicle_rec["x"].iloc[0])
-        row["y"].insert(0, vehicle_rec["y"].iloc[0])
-        return row
+    @property
+    def vehicle_ids(self):
+        return self._vehicle_ids
 
-    position_tracking_df = pd.DataFrame(position_tracking_logs)
-    position_tracking_df = position_tracking_df.merge(locations_meta_df, how="left", on=["x", "y"])
-    position_tracking_df = position_tracking_df.groupby("vehicle_id", as_index=False).agg({"x": lambda x: list(x), "y": lambda y: list(y)})
-    position_tracking_df.apply(lambda row: add_initial_location(row), axis=1)
+    @property
+    def coordinates(self):
+        return self._coordinates
 
-    return position_tracking_df
+    @property
+    def offsets(self):
+        return self._offsets
 
 
-def create_travel_info_df(travel_info_logs: list[dict]):
+@profiled("create_travel_info_df", count_items=len)
+def create_travel_info_df(travel_info_logs: list[dict], optimize_dtypes: bool = False):
     driving_df = pd.DataFrame(travel_info_logs).rename(columns={"duration_in_s": "driving_time"})
     driving_df[["driving_time", "distance_in_mm"]] = driving_df[["driving_time", "distance_in_mm"]].astype(int)
     driving_df["speed"] = driving_df["distance_in_mm"] / driving_df["driving_time"]
+    if optimize_dtypes:
+        driving_df = apply_dtype_schema(driving_df, log_dtypes)
     return driving_df
 
 
-def create_action_df(action_logs: list[dict]):
+@profiled("create_action_df", count_items=len)
+def create_action_df(action_logs: list[dict], optimize_dtypes: bool = False):
     action_df = pd.DataFrame(action_logs)
     action_df['duration_in_s'] = action_df['duration_in_s'].fillna(0.0).astype(int)
 
@@ -164,10 +568,13 @@ def create_action_df(action_logs: list[dict]):
     merged_action_df = working_df.merge(waiting_df[["co_id", "action", "waiting_time"]], how="left", on=["co_id", "action"]).drop(columns=["status"])
     # Fill waiting time with 0 for records indicate processing/working
     merged_action_df["waiting_time"] = merged_action_df["waiting_time"].fillna(0.0)
+    if optimize_dtypes:
+        merged_action_df = apply_dtype_schema(merged_action_df, log_dtypes)
 
     return merged_action_df
 
 
+@profiled("create_optimizer_scheduling_df", count_items=len)
 def create_optimizer_scheduling_df(optimizer_scheduling_logs: list[dict]):
     travel_action_df = pd.DataFrame(optimizer_scheduling_logs)
     travel_action_df["expected_travel_duration"] = (travel_action_df["travel_end_time"] - travel_action_df["travel_start_time"]).dt.total_seconds()
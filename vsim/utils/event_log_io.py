@@ -0,0 +1,309 @@
+import gzip
+from typing import Iterable, Optional
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from .profiling import profiled
+
+# File formats of event logs by file extension
+event_log_formats = {
+    ".xes": "xes",
+    ".xes.gz": "xes",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather"
+}
+
+XES_HEADER = (
+    '<?xml version="1.0" encoding="utf-8" ?>\n'
+    '<log xes.version="1849-2016" xes.features="nested-attributes" xmlns="http://www.xes-standard.org/">\n'
+    '\t<extension name="Organizational" prefix="org" uri="http://www.xes-standard.org/org.xesext" />\n'
+    '\t<extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext" />\n'
+    '\t<extension name="Lifecycle" prefix="lifecycle" uri="http://www.xes-standard.org/lifecycle.xesext" />\n'
+    '\t<extension name="Time" prefix="time" uri="http://www.xes-standard.org/time.xesext" />\n'
+)
+XES_FOOTER = "</log>\n"
+
+
+def get_event_log_format(file_path: str) -> str:
+    for extension, file_format in event_log_formats.items():
+        if file_path.lower().endswith(extension):
+            return file_format
+
+    raise ValueError(f"Unknown event log format of {file_path}, expected one of the extensions {list(event_log_formats)}")
+
+
+def get_xes_attribute_type(column: pd.Series) -> str:
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return "date"
+    if pd.api.types.is_bool_dtype(column):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(column):
+        return "int"
+    if pd.api.types.is_float_dtype(column):
+        return "float"
+    return "string"
+
+
+def format_xes_value(value, attribute_type: str) -> str:
+    if attribute_type == "date":
+        timestamp = pd.Timestamp(value)
+        timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+        return timestamp.isoformat(timespec="milliseconds" if timestamp.microsecond else "seconds")
+    if attribute_type == "boolean":
+        return "true" if value else "false"
+    return str(value)
+
+
+def format_xes_attributes(column: pd.Series, key: str, indent: str) -> np.ndarray:
+    """
+    XML elements of an attribute for all values of a column (empty strings for missing values). Each distinct value is formatted once
+    """
+    attribute_type = get_xes_attribute_type(column)
+    codes, distinct_values = pd.factorize(column, use_na_sentinel=True)
+    quoted_key = escape(key, {'"': "&quot;"})
+    elements = [
+        f'{indent}<{attribute_type} key="{quoted_key}" value="{escape(format_xes_value(value, attribute_type), {chr(34): "&quot;"})}" />\n'
+        for value in distinct_values
+    ]
+    # Missing values (code -1) refer to the trailing empty element
+    return np.array(elements + [""], dtype=object)[codes]
+
+
+def convert_xes_values(values, attribute_type: str):
+    """
+    Convert the raw values of an XES attribute type (as strings) all at once
+    """
+    if attribute_type == "date":
+        return pd.to_datetime(pd.Series(values, dtype=object), utc=True, format="ISO8601").to_numpy()
+    if attribute_type in ["int", "float"]:
+        return pd.to_numeric(pd.Series(values, dtype=object)).astype(np.int64 if attribute_type == "int" else np.float64).to_numpy()
+    if attribute_type == "boolean":
+        return np.array(values, dtype=object) == "true"
+    return np.array(values, dtype=object)
+
+
+@profiled("write_xes", count_items=lambda num_events: num_events)
+def write_xes(event_log_df: pd.DataFrame, file_path: str, case_key: str = "case:concept:name", chunk_size: int = 50000) -> int:
+    """
+    Write an event log (e.g. from `create_event_log`) as XES in the same layout as `pm4py.write_xes`, streaming the events in chunks. Files ending with ".gz" are compressed
+    :param event_log_df: Event log
+    :param file_path: Path to the XES file
+    :param case_key: Column of the case IDs
+    :param chunk_size: Number of events formatted and written at once
+    :return: Number of written events
+    """
+    case_codes, _ = pd.factorize(event_log_df[case_key])
+    row_order = np.argsort(case_codes, kind="stable")
+    event_columns = [column for column in event_log_df.columns if not column.startswith("case:")]
+    trace_columns = [column for column in event_log_df.columns if column.startswith("case:")]
+
+    open_fn = gzip.open if file_path.lower().endswith(".gz") else open
+    with open_fn(file_path, "wt", encoding="utf-8") as xes_fp:
+        xes_fp.write(XES_HEADER)
+        previous_case_code = None
+        for chunk_start in range(0, len(row_order), chunk_size):
+            chunk_rows = row_order[chunk_start:chunk_start + chunk_size]
+            chunk_df = event_log_df.iloc[chunk_rows]
+            chunk_case_codes = case_codes[chunk_rows]
+            is_trace_start = np.concatenate([[chunk_case_codes[0] != previous_case_code], chunk_case_codes[1:] != chunk_case_codes[:-1]])
+            previous_case_code = chunk_case_codes[-1]
+
+            # Concatenate the elements of all attributes of each event (element-wise on object arrays)
+            event_elements = np.full(len(chunk_df), "\t\t<event>\n", dtype=object)
+            for column in event_columns:
+                event_elements = event_elements + format_xes_attributes(chunk_df[column], key=column, indent="\t\t\t")
+            event_elements = event_elements + "\t\t</event>\n"
+
+            trace_start_df = chunk_df[is_trace_start]
+            trace_elements = np.full(len(trace_start_df), "\t<trace>\n", dtype=object)
+            for column in trace_columns:
+                trace_elements = trace_elements + format_xes_attributes(trace_start_df[column], key=column.removeprefix("case:"), indent="\t\t")
+            # Close the previous trace before opening the next one (except for the first trace of the file)
+            trace_elements = np.array(["\t</trace>\n" + element for element in trace_elements], dtype=object)
+            if chunk_start == 0:
+                trace_elements[0] = trace_elements[0].removeprefix("\t</trace>\n")
+
+            chunk_elements = event_elements.copy()
+            chunk_elements[is_trace_start] = trace_elements + event_elements[is_trace_start]
+            xes_fp.write("".join(chunk_elements))
+            xes_fp.flush()
+
+        if len(row_order) > 0:
+            xes_fp.write("\t</trace>\n")
+        xes_fp.write(XES_FOOTER)
+
+    return len(row_order)
+
+
+@profiled("read_xes", count_items=len)
+def read_xes(file_path: str, columns: Optional[Iterable[str]] = None, start_time=None, end_time=None, time_key: str = "time:timestamp") -> pd.DataFrame:
+    """
+    Load an XES file (e.g. written by `write_xes` or `pm4py.write_xes`) incrementally into an event log with the same columns as `pm4py.read_xes`. Nested attributes are ignored
+    :param file_path: Path to the XES file (compressed if ending with ".gz")
+    :param columns: If given, only these columns are loaded
+    :param start_time: If given, only events at or after this point in time are kept
+    :param end_time: If given, only events before this point in time are kept
+    :param time_key: Column of the event timestamps used for the time range
+    """
+    selected_columns = None if columns is None else set(columns)
+    if selected_columns is not None and (start_time is not None or end_time is not None):
+        selected_columns.add(time_key)
+
+    # Raw values of each column along with the rows they belong to, since attributes can be missing for some events
+    column_values = {}
+    column_rows = {}
+    column_types = {}
+    # Event attributes in the order of their appearance within the events, where an attribute which first appears in a later event follows the preceding attribute of that event
+    event_columns = []
+    # Values of the trace attributes along with the first row and the number of events of their trace
+    trace_values = {}
+    num_events = 0
+    trace_start_row = 0
+
+    open_fn = gzip.open if file_path.lower().endswith(".gz") else open
+    with open_fn(file_path, "rb") as xes_fp:
+        for _, element in iterparse(xes_fp, events=("end",)):
+            tag = element.tag
+            if tag.endswith("event") and tag.rpartition("}")[2] == "event":
+                previous_key = None
+                for attribute in element:
+                    key = attribute.get("key")
+                    value = attribute.get("value")
+                    if key is None or value is None or selected_columns is not None and key not in selected_columns:
+                        continue
+
+                    if key not in column_values:
+                        column_values[key], column_rows[key], column_types[key] = [], [], attribute.tag.rpartition("}")[2]
+                        event_columns.insert(0 if previous_key is None else event_columns.index(previous_key) + 1, key)
+                    column_values[key].append(value)
+                    column_rows[key].append(num_events)
+                    previous_key = key
+                num_events += 1
+                element.clear()
+            elif tag.endswith("trace") and tag.rpartition("}")[2] == "trace":
+                # Attributes of the trace apply to all of its events (the events themselves are already cleared)
+                for attribute in element:
+                    key = attribute.get("key")
+                    value = attribute.get("value")
+                    column = f"case:{key}"
+                    if key is None or value is None or selected_columns is not None and column not in selected_columns:
+                        continue
+
+                    if column not in trace_values:
+                        trace_values[column] = ([], [], [])
+                        column_types[column] = attribute.tag.rpartition("}")[2]
+                    for values, trace_value in zip(trace_values[column], [value, trace_start_row, num_events - trace_start_row]):
+                        values.append(trace_value)
+                trace_start_row = num_events
+                element.clear()
+
+    for column, (values, start_rows, num_trace_events) in trace_values.items():
+        num_trace_events = np.array(num_trace_events, dtype=np.int64)
+        first_positions = np.repeat(np.cumsum(num_trace_events) - num_trace_events, num_trace_events)
+        column_values[column] = np.repeat(np.array(values, dtype=object), num_trace_events)
+        column_rows[column] = np.repeat(np.array(start_rows, dtype=np.int64), num_trace_events) + np.arange(num_trace_events.sum()) - first_positions
+
+    event_log_data = {}
+    for column, values in column_values.items():
+        values = pd.Series(convert_xes_values(values, column_types[column]), index=column_rows[column])
+        # Events without the attribute get missing values
+        event_log_data[column] = values if len(values) == num_events else values.reindex(range(num_events))
+
+    # Event attributes followed by the trace attributes (same as pm4py)
+    ordered_columns = event_columns + [column for column in event_log_data if column not in event_columns]
+    event_log_df = pd.DataFrame({column: event_log_data[column] for column in ordered_columns}, index=pd.RangeIndex(num_events))
+
+    event_log_df = filter_time_range(event_log_df, start_time=start_time, end_time=end_time, time_key=time_key)
+    if columns is not None:
+        event_log_df = event_log_df[[column for column in columns if column in event_log_df.columns]]
+    return event_log_df
+
+
+def filter_time_range(event_log_df: pd.DataFrame, start_time=None, end_time=None, time_key: str = "time:timestamp") -> pd.DataFrame:
+    """
+    Keep the events within [start_time, end_time). Naive points in time are taken as UTC
+    """
+    if start_time is None and end_time is None:
+        return event_log_df
+
+    in_range = np.ones(len(event_log_df), dtype=bool)
+    if start_time is not None:
+        in_range &= (event_log_df[time_key] >= to_utc_timestamp(start_time)).to_numpy()
+    if end_time is not None:
+        in_range &= (event_log_df[time_key] < to_utc_timestamp(end_time)).to_numpy()
+    return event_log_df[in_range].reset_index(drop=True)
+
+
+def to_utc_timestamp(value) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+
+@profiled("write_event_log", count_items=lambda num_events: num_events)
+def write_event_log(event_log_df: pd.DataFrame, file_path: str, file_format: Optional[str] = None, compression: Optional[str] = None, row_group_size: int = 100000) -> int:
+    """
+    Write an event log as XES (see `write_xes`), Parquet or Feather, where Parquet and Feather files keep the dtypes of the columns
+    :param event_log_df: Event log
+    :param file_path: Path to the file
+    :param file_format: "xes", "parquet" or "feather". Inferred from the file extension if not given (see `event_log_formats`)
+    :param compression: Compression of Parquet/Feather files (the default of pyarrow if not given)
+    :param row_group_size: Number of events per row group of Parquet files. Row groups outside the time range of a load are skipped
+    :return: Number of written events
+    """
+    file_format = get_event_log_format(file_path) if file_format is None else file_format
+    if file_format == "xes":
+        return write_xes(event_log_df, file_path)
+
+    table = pa.Table.from_pandas(event_log_df, preserve_index=False)
+    if file_format == "parquet":
+        pq.write_table(table, file_path, compression=compression or "snappy", row_group_size=row_group_size)
+    elif file_format == "feather":
+        feather.write_feather(table, file_path, compression=compression)
+    else:
+        raise ValueError(f"Unknown event log format: {file_format}")
+
+    return table.num_rows
+
+
+@profiled("read_event_log", count_items=len)
+def read_event_log(file_path: str, columns: Optional[Iterable[str]] = None, start_time=None, end_time=None, file_format: Optional[str] = None, time_key: str = "time:timestamp") -> pd.DataFrame:
+    """
+    Load an event log written by `write_event_log`, reading only the selected columns and time range of Parquet and Feather files
+    :param file_path: Path to the file
+    :param columns: If given, only these columns are loaded
+    :param start_time: If given, only events at or after this point in time are kept (naive points in time are taken as UTC)
+    :param end_time: If given, only events before this point in time are kept
+    :param file_format: "xes", "parquet" or "feather". Inferred from the file extension if not given
+    :param time_key: Column of the event timestamps used for the time range
+    """
+    file_format = get_event_log_format(file_path) if file_format is None else file_format
+    if file_format == "xes":
+        return read_xes(file_path, columns=columns, start_time=start_time, end_time=end_time, time_key=time_key)
+    if file_format not in ["parquet", "feather"]:
+        raise ValueError(f"Unknown event log format: {file_format}")
+
+    dataset = ds.dataset(file_path, format="parquet" if file_format == "parquet" else "ipc")
+    time_filter = None
+    if start_time is not None or end_time is not None:
+        time_type = dataset.schema.field(time_key).type
+        for bound, compare in [(start_time, pc.greater_equal), (end_time, pc.less)]:
+            if bound is not None:
+                bound_filter = compare(ds.field(time_key), pa.scalar(to_utc_timestamp(bound), type=time_type))
+                time_filter = bound_filter if time_filter is None else time_filter & bound_filter
+
+    columns = None if columns is None else list(columns)
+    table = dataset.to_table(columns=columns, filter=time_filter)
+    # The dataset scan drops the pandas metadata of the file which restores the dtypes of the columns
+    table = table.replace_schema_metadata(dataset.schema.metadata)
+    return table.to_pandas()
@@ -1,8 +1,174 @@
+import random
+
+
 def manhattan_distance(x1, y1, x2, y2):
     return abs(x1 - x2) + abs(y1 - y2)
 
 
+class VSOccupancyIndex:
+    """
+    Interval tree (treap) of the (start, end) intervals of the processes at a location, to count and find the processes active at a time t (start <= t <= end) in logarithmic time
+    """
+    def __init__(self, intervals=None):
+        self._root = None
+        self._start_root = None
+        self._num_intervals = 0
+        self._random = random.Random(0)
+
+        for start, end in intervals or []:
+            self.insert(start, end)
+
+    def __len__(self):
+        return self._num_intervals
+
+    def insert(self, start, end):
+        if end < start:
+            raise ValueError(f"Interval ends before it starts: ({start}, {end})")
+
+        self._root = _insert_node(self._root, _OccupancyNode(start, end, (end, self._num_intervals), self._random.random()))
+        self._start_root = _insert_node(self._start_root, _OccupancyNode(start, end, (start, self._num_intervals), self._random.random()))
+        self._num_intervals += 1
+
+    def count_active(self, t) -> int:
+        """
+        Number of intervals active at time t: intervals started by t minus intervals ended before t
+        """
+        return _count_starts_until(self._start_root, t) - _count_ends_before(self._root, t)
+
+    def get_active_intervals(self, t) -> list[tuple]:
+        """
+        Intervals active at time t, in the order of their end
+        """
+        active_intervals = []
+        _collect_active(self._root, t, active_intervals)
+        return active_intervals
+
+    def get_earliest_end(self, t):
+        """
+        Earliest end among the intervals active at time t, or None if there is no active interval
+        """
+        node = _find_earliest_active(self._root, t)
+        return None if node is None else node.end
+
+    def get_earliest_start_time(self, arrival_time, capacity):
+        """
+        Earliest time a process arriving at `arrival_time` can start: right away if less intervals than the capacity are active, otherwise once the first active interval ends
+        """
+        if self.count_active(arrival_time) < capacity:
+            return arrival_time
+
+        return self.get_earliest_end(arrival_time)
+
+
+class _OccupancyNode:
+    __slots__ = ("start", "end", "key", "priority", "left", "right", "size", "min_start")
+
+    def __init__(self, start, end, key, priority):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.size = 1
+        self.min_start = start
+
+
+def _update_node(node):
+    node.size = 1
+    node.min_start = node.start
+    for child in (node.left, node.right):
+        if child is not None:
+            node.size += child.size
+            if child.min_start < node.min_start:
+                node.min_start = child.min_start
+
+
+def _insert_node(root, node):
+    if root is None:
+        return node
+
+    if node.key < root.key:
+        root.left = _insert_node(root.left, node)
+        if root.left.priority > root.priority:
+            # Rotate right
+            child = root.left
+            root.left = child.right
+            _update_node(root)
+            child.right = root
+            root = child
+    else:
+        root.right = _insert_node(root.right, node)
+        if root.right.priority > root.priority:
+            # Rotate left
+            child = root.right
+            root.right = child.left
+            _update_node(root)
+            child.left = root
+            root = child
+
+    _update_node(root)
+    return root
+
+
+def _count_ends_before(node, t) -> int:
+    count = 0
+    while node is not None:
+        if node.end < t:
+            count += 1 + (node.left.size if node.left is not None else 0)
+            node = node.right
+        else:
+            node = node.left
+
+    return count
+
+
+def _count_starts_until(node, t) -> int:
+    count = 0
+    while node is not None:
+        if node.start <= t:
+            count += 1 + (node.left.size if node.left is not None else 0)
+            node = node.right
+        else:
+            node = node.left
+
+    return count
+
+
+def _find_earliest_active(node, t):
+    """
+    Leftmost node (earliest end) with end >= t and start <= t. Subtrees without any interval started by t are skipped
+    """
+    if node is None or node.min_start > t:
+        return None
+    if node.end < t:
+        return _find_earliest_active(node.right, t)
+
+    earliest_node = _find_earliest_active(node.left, t)
+    if earliest_node is not None:
+        return earliest_node
+    if node.start <= t:
+        return node
+    return _find_earliest_active(node.right, t)
+
+
+def _collect_active(node, t, active_intervals):
+    if node is None or node.min_start > t:
+        return
+    if node.end >= t:
+        _collect_active(node.left, t, active_intervals)
+        if node.start <= t:
+            active_intervals.append((node.start, node.end))
+    _collect_active(node.right, t, active_intervals)
+
+
 def get_overlapping_processes(process_arrival_time, prev_process_intervals):
+    """
+    Intervals of previous processes running at the arrival time of a process, from a list of (start, end) intervals or a `VSOccupancyIndex`
+    """
+    if isinstance(prev_process_intervals, VSOccupancyIndex):
+        return prev_process_intervals.get_active_intervals(process_arrival_time)
+
     overlapping_times = []
     for interval in prev_process_intervals:
         if interval[0] <= process_arrival_time <= interval[1]:
@@ -12,6 +178,12 @@ def get_overlapping_processes(process_arrival_time, prev_process_intervals):
 
 
 def estimate_start_time(process_arrival_time, overlapping_intervals, loc_capacity):
+    """
+    Start time of a process given the intervals running at its arrival time (see `get_overlapping_processes`), or the `VSOccupancyIndex` of the location
+    """
+    if isinstance(overlapping_intervals, VSOccupancyIndex):
+        return overlapping_intervals.get_earliest_start_time(process_arrival_time, capacity=loc_capacity)
+
     if len(overlapping_intervals) < loc_capacity:
         return process_arrival_time
 
@@ -1,6 +1,13 @@
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+from .profiling import VSProfiler, count_event, get_active_profiler, profile_pipeline, profile_stage, profiled
 
 # Define the regex patterns for common elements in the logs
 datetime_pattern = r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}"
@@ -88,6 +95,49 @@ log_patterns = {
 }
 
 
+# Literal token contained in every line of each pattern, checked before running the regex of the pattern (in the order of `log_patterns`)
+log_pattern_tokens = {
+    "container_submission": "adding TO",
+    "init_scheduling": "schedule",
+    "travel_action_schedule": "starting",
+    "driving": "driving to",
+    "lane_usage": "location",
+    "position_tracking": "now at position",
+    "action": "(TO:",
+    "finish_schedule_element": "finished expected schedule_element"
+}
+
+schedule_pattern = re.compile(rf"\d:(?P<to_id>{to_id_pattern})#(?P<co_id>{co_id_pattern})#(?P<action>{action_pattern})")
+
+
+@lru_cache(maxsize=65536)
+def to_naive_datetime(value: str) -> datetime:
+    """
+    Convert a (possibly timezone-aware) date-time string to a naive datetime object, keeping the local time
+    """
+    return datetime.fromisoformat(value[:19])
+
+
+# Fixed type conversion per field for each log pattern. Fields that are not listed are kept as strings
+log_pattern_schemas = {
+    "container_submission": {"log_time": to_naive_datetime, "submission_time": to_naive_datetime},
+    "init_scheduling": {"log_time": to_naive_datetime},
+    "travel_action_schedule": {
+        "log_time": to_naive_datetime,
+        "travel_start_time": to_naive_datetime,
+        "travel_end_time": to_naive_datetime,
+        "action_start_time": to_naive_datetime,
+        "action_end_time": to_naive_datetime
+    },
+    "driving": {"log_time": to_naive_datetime, "duration_in_s": int, "distance_in_mm": int},
+    "lane_usage": {"log_time": to_naive_datetime, "lane_number": int},
+    "position_tracking": {"log_time": to_naive_datetime, "x": int, "y": int},
+    "action": {"log_time": to_naive_datetime, "duration_in_s": int},
+    "finish_schedule_element": {"log_time": to_naive_datetime}
+}
+
+
+@profiled("read_log_file", count_items=len)
 def read_log_file(log_file_path: str) -> list[str]:
     with open(log_file_path, "r") as log_fp:
         log_lines = log_fp.readlines()
@@ -95,6 +145,41 @@ def read_log_file(log_file_path: str) -> list[str]:
     return log_lines
 
 
+def iter_log_lines(log_file_path: str, buffer_size: int = 1 << 20) -> Iterator[str]:
+    """
+    Lazily read the lines of a log file through a buffer of fixed size
+    """
+    with open(log_file_path, "r", buffering=buffer_size) as log_fp:
+        yield from log_fp
+
+
+def follow_log_lines(log_file_path: str, poll_interval: float = 1.0, idle_timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Follow a log file which is still being written (similar to `tail -f`), and yield its complete lines as they're appended. Lines which are not terminated yet are held back until they're complete.
+    :param log_file_path: Path to the log file
+    :param poll_interval: Seconds to wait before checking the file for new lines again
+    :param idle_timeout: Stop once no new line has been appended for this many seconds. If None, the file is followed forever
+    """
+    with open(log_file_path, "r") as log_fp:
+        partial_line = ""
+        last_update = time.monotonic()
+        while True:
+            log_line = log_fp.readline()
+            if log_line:
+                last_update = time.monotonic()
+                partial_line += log_line
+                if partial_line.endswith("\n"):
+                    yield partial_line
+                    partial_line = ""
+                continue
+
+            if idle_timeout is not None and time.monotonic() - last_update >= idle_timeout:
+                if partial_line:
+                    yield partial_line
+                return
+            time.sleep(poll_interval)
+
+
 def postprocess_parsed_log(raw_log_data: dict) -> dict:
     """
     Post-process extracted data from logs by adjusting data types
@@ -140,27 +225,162 @@ def parse_log(log: str) -> tuple[Optional[str], Optional[dict]]:
     return log_pattern, extracted_data
 
 
-def get_parsed_logs(log_file_path: str):
+def parse_log_line(log: str, parse_counters: Optional[dict] = None) -> tuple[Optional[str], Optional[dict]]:
+    """
+    Parse and post-process a log string in a single pass, with the same result as `parse_log` followed by `postprocess_parsed_log`
+    :param log: A log formatted as string (without surrounding whitespaces)
+    :param parse_counters: If given, lines matched and not matched by the regex of each candidate pattern are counted by (pattern, matched)
+    :return: (log_pattern, data) if the log matches an expected pattern. Otherwise, (None, None) will be returned.
+    """
+    for log_pattern_name, token in log_pattern_tokens.items():
+        if token not in log:
+            continue
+
+        match = log_patterns[log_pattern_name].match(log)
+        if parse_counters is not None:
+            parse_counters[log_pattern_name, match is not None] += 1
+        if match:
+            extracted_data = match.groupdict()
+            for key, converter in log_pattern_schemas[log_pattern_name].items():
+                value = extracted_data[key]
+                if value is not None:
+                    extracted_data[key] = converter(value)
+
+            if log_pattern_name == "init_scheduling":
+                extracted_data["schedules"] = schedule_pattern.findall(log)
+
+            return log_pattern_name, extracted_data
+
+    if parse_counters is not None:
+        parse_counters[None, False] += 1
+    return None, None
+
+
+def iter_parsed_logs(log_file_path: str, patterns: Optional[Iterable[str]] = None) -> Iterator[tuple[str, dict]]:
+    """
+    Stream the parsed logs of a log file one at a time, in the order of their appearance in the file
+    :param log_file_path: Path to the log file
+    :param patterns: If given, only the logs matching one of these patterns (keys of `log_patterns`) will be yielded
+    :return: An iterator over (log_pattern, data) tuples
+    """
+    pattern_filter = None
+    filter_tokens = None
+    if patterns is not None:
+        pattern_filter = set(patterns)
+        unknown_patterns = pattern_filter.difference(log_patterns)
+        if unknown_patterns:
+            raise ValueError(f"Unknown log patterns: {sorted(unknown_patterns)}")
+        filter_tokens = [log_pattern_tokens[pattern] for pattern in pattern_filter]
+
+    profiler = get_active_profiler()
+    parse_counters = None if profiler is None else profiler.parse_counters
+    # Lines are counted once the iteration ends (or is abandoned) rather than per line
+    num_lines = 0
+    try:
+        for log_line in iter_log_lines(log_file_path=log_file_path):
+            num_lines += 1
+            # Skip lines that cannot match any of the requested patterns without running a regex
+            if filter_tokens is not None and not any(token in log_line for token in filter_tokens):
+                continue
+
+            pattern, extracted_data = parse_log_line(log_line.strip(), parse_counters=parse_counters)
+            if pattern and (pattern_filter is None or pattern in pattern_filter):
+                yield pattern, extracted_data
+    finally:
+        count_event("log_lines", num_lines)
+
+
+def get_log_chunk_offsets(log_file_path: str, num_chunks: int) -> list[tuple[int, int]]:
+    """
+    Split a log file into (at most) `num_chunks` byte ranges of similar size, which start and end at line boundaries
+    :return: A list of (start_offset, end_offset) tuples in the order of the file
+    """
+    file_size = os.path.getsize(log_file_path)
+    offsets = [0]
+    with open(log_file_path, "rb") as log_fp:
+        for chunk_idx in range(1, num_chunks):
+            log_fp.seek(max(file_size * chunk_idx // num_chunks, offsets[-1]))
+            # Move to the beginning of the next line, so that no line is split between two chunks
+            log_fp.readline()
+            offsets.append(min(log_fp.tell(), file_size))
+    offsets.append(file_size)
+
+    return [(start, end) for start, end in zip(offsets[:-1], offsets[1:]) if start < end]
+
+
+def parse_log_chunk(log_file_path: str, start_offset: int, end_offset: int, profile: bool = False) -> tuple[list[tuple[str, dict]], Optional[VSProfiler]]:
+    """
+    Parse the lines of a log file within a byte range computed by `get_log_chunk_offsets`
+    :param profile: Whether to record the chunk into a new profiler, to be merged into the profiler of the calling process
+    :return: (parsed_logs, profiler), where profiler is None if `profile` is False
+    """
+    with profile_pipeline() if profile else nullcontext() as profiler:
+        with profile_stage("parse_log_chunk") as stage:
+            parse_counters = None if profiler is None else profiler.parse_counters
+            parsed_logs = []
+            num_lines = 0
+            with open(log_file_path, "rb") as log_fp:
+                log_fp.seek(start_offset)
+                offset = start_offset
+                while offset < end_offset:
+                    log_line = log_fp.readline()
+                    if not log_line:
+                        break
+                    offset += len(log_line)
+
+                    pattern, extracted_data = parse_log_line(log_line.decode().strip(), parse_counters=parse_counters)
+                    if pattern:
+                        parsed_logs.append((pattern, extracted_data))
+                    num_lines += 1
+            stage.add_items(num_lines)
+        count_event("log_lines", num_lines)
+
+    return parsed_logs, profiler
+
+
+@profiled("get_parsed_logs", count_items=lambda parsed: len(parsed[1]))
+def get_parsed_logs(log_file_path: str, num_workers: Optional[int] = 1):
+    """
+    Given a log file, parse and extract relevant information. Parsed logs are grouped by their pattern and also kept in their original order
+    :param log_file_path: Path to the log file
+    :param num_workers: Number of worker processes parsing chunks of the file in parallel (all CPU cores if None), with the same result as a single process
+    :return: (logs_by_pattern, parsed_logs)
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    if num_workers > 1:
+        # Use more chunks than workers to balance the load between workers
+        chunk_offsets = get_log_chunk_offsets(log_file_path=log_file_path, num_chunks=num_workers * 4)
+        profiler = get_active_profiler()
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            chunk_results = executor.map(
+                parse_log_chunk,
+                [log_file_path] * len(chunk_offsets),
+                [start for start, _ in chunk_offsets],
+                [end for _, end in chunk_offsets],
+                [profiler is not None] * len(chunk_offsets)
+            )
+            return group_parsed_logs(_merge_chunk_results(chunk_results, profiler))
+
+    return group_parsed_logs(iter_parsed_logs(log_file_path=log_file_path))
+
+
+def _merge_chunk_results(chunk_results: Iterable[tuple[list, Optional[VSProfiler]]], profiler: Optional[VSProfiler]) -> Iterator[tuple[str, dict]]:
+    for chunk_parsed_logs, chunk_profiler in chunk_results:
+        if profiler is not None and chunk_profiler is not None:
+            profiler.merge(chunk_profiler)
+        yield from chunk_parsed_logs
+
+
+def group_parsed_logs(parsed_log_iter: Iterable[tuple[str, dict]]):
     """
-    Given a list of log lines extracted from the log file, parse and extract relevant information
+    Collect parsed logs into lists grouped by pattern, as well as a list in their original order
     """
     logs_by_pattern = {log_pattern: [] for log_pattern in log_patterns}
     parsed_logs = []
-    log_lines = read_log_file(log_file_path=log_file_path)
-
-    for log_line in log_lines:
-        log_line = log_line.strip()
-        pattern, extracted_data = parse_log(log_line)
-        if pattern:
-            extracted_data = postprocess_parsed_log(extracted_data)
-            if pattern == "init_scheduling":
-                schedules = re.findall(rf"\d:(?P<to_id>{to_id_pattern})#(?P<co_id>{co_id_pattern})#(?P<action>{action_pattern})", log_line)
-                extracted_data = {
-                    **extracted_data,
-                    "schedules": schedules
-                }
-
-            logs_by_pattern[pattern].append(extracted_data)
-            parsed_logs.append((pattern, extracted_data))
+    for pattern, extracted_data in parsed_log_iter:
+        logs_by_pattern[pattern].append(extracted_data)
+        parsed_logs.append((pattern, extracted_data))
 
     return logs_by_pattern, parsed_logs
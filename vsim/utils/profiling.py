@@ -0,0 +1,268 @@
+import functools
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the peak RSS is not recorded
+    resource = None
+
+# Profiler which stages and counters are currently recorded by (None if profiling is disabled)
+_active_profiler = None
+
+
+def get_peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of the current process in bytes (None if not available on the platform)
+    """
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class VSStageStats:
+    """
+    Accumulated measurements of all calls of one named stage
+    """
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.items = 0
+        # Peak RSS of the process as of the end of the calls, and how much the calls grew it
+        self.process_peak_rss_bytes = None
+        self.peak_rss_growth_bytes = None
+
+    def add(self, wall_time: float, cpu_time: float, items: int, rss_before: Optional[int], rss_after: Optional[int]):
+        self.calls += 1
+        self.wall_time += wall_time
+        self.cpu_time += cpu_time
+        self.items += items
+        if rss_after is not None:
+            self.process_peak_rss_bytes = max(self.process_peak_rss_bytes or 0, rss_after)
+            self.peak_rss_growth_bytes = max(self.peak_rss_growth_bytes or 0, rss_after - rss_before)
+
+    def merge(self, other: "VSStageStats"):
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.items += other.items
+        if other.process_peak_rss_bytes is not None:
+            self.process_peak_rss_bytes = max(self.process_peak_rss_bytes or 0, other.process_peak_rss_bytes)
+            self.peak_rss_growth_bytes = max(self.peak_rss_growth_bytes or 0, other.peak_rss_growth_bytes)
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "cpu_utilization": self.cpu_time / self.wall_time if self.wall_time > 0 else None,
+            "items": self.items,
+            "items_per_second": self.items / self.wall_time if self.wall_time > 0 else None,
+            "process_peak_rss_bytes": self.process_peak_rss_bytes,
+            "peak_rss_growth_bytes": self.peak_rss_growth_bytes
+        }
+
+
+class VSStage:
+    """
+    Context manager measuring the wall time, CPU time, processed items (see `add_items`) and peak RSS of one call of a stage
+    """
+    def __init__(self, stats: VSStageStats, items: int = 0):
+        self._stats = stats
+        self._items = items
+        self._start_wall_time = None
+        self._start_cpu_time = None
+        self._start_rss = None
+
+    def __enter__(self):
+        self._start_rss = get_peak_rss_bytes()
+        self._start_cpu_time = time.process_time()
+        self._start_wall_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        wall_time = time.perf_counter() - self._start_wall_time
+        cpu_time = time.process_time() - self._start_cpu_time
+        self._stats.add(wall_time, cpu_time, self._items, self._start_rss, get_peak_rss_bytes())
+
+    def add_items(self, num_items: int = 1):
+        self._items += num_items
+
+
+class _NullStage:
+    """
+    Stage returned while profiling is disabled, which measures nothing
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def add_items(self, num_items: int = 1):
+        pass
+
+
+_null_stage = _NullStage()
+
+
+class VSProfiler:
+    """
+    Registry of the measurements of named pipeline stages (e.g. "create_event_log" or "solver.solve"), of generic counters, and of the lines matched and not matched by each log pattern
+    """
+    def __init__(self):
+        self._stages = {}
+        self._counters = Counter()
+        self._parse_counters = Counter()
+        self._start_time = time.time()
+
+    def stage(self, name: str, items: int = 0) -> VSStage:
+        stats = self._stages.get(name)
+        if stats is None:
+            stats = VSStageStats()
+            self._stages[name] = stats
+        return VSStage(stats, items=items)
+
+    def count(self, name: str, num: int = 1):
+        self._counters[name] += num
+
+    def merge(self, other: "VSProfiler"):
+        """
+        Add the stages and counters recorded by another profiler, e.g. in a worker process
+        """
+        for name, stats in other._stages.items():
+            self._stages.setdefault(name, VSStageStats()).merge(stats)
+        self._counters.update(other._counters)
+        self._parse_counters.update(other._parse_counters)
+
+    def reset(self):
+        self._stages = {}
+        self._counters = Counter()
+        self._parse_counters = Counter()
+        self._start_time = time.time()
+
+    def get_report(self) -> dict:
+        """
+        Report of all measurements as a JSON-serializable dictionary
+        """
+        parse_counters = {}
+        for (pattern, matched), num_lines in self._parse_counters.items():
+            pattern_counters = parse_counters.setdefault("_no_pattern" if pattern is None else pattern, {"matched": 0, "unmatched": 0})
+            pattern_counters["matched" if matched else "unmatched"] += num_lines
+
+        return {
+            "start_time": self._start_time,
+            "end_time": time.time(),
+            "pid": os.getpid(),
+            "cpu_count": os.cpu_count(),
+            "peak_rss_bytes": get_peak_rss_bytes(),
+            "stages": {name: stats.to_dict() for name, stats in self._stages.items()},
+            "counters": dict(self._counters),
+            "parse_counters": parse_counters
+        }
+
+    def export_json(self, file_path: str):
+        with open(file_path, "w") as report_fp:
+            json.dump(self.get_report(), report_fp, indent=2)
+
+    @property
+    def stages(self):
+        return self._stages
+
+    @property
+    def counters(self):
+        return self._counters
+
+    @property
+    def parse_counters(self):
+        """
+        Counter of parsed lines by (pattern, matched), updated in place by the log parser
+        """
+        return self._parse_counters
+
+
+def enable_profiling(profiler: Optional[VSProfiler] = None) -> VSProfiler:
+    """
+    Start recording stages and counters into a profiler (a new one if not given)
+    """
+    global _active_profiler
+    _active_profiler = VSProfiler() if profiler is None else profiler
+    return _active_profiler
+
+
+def disable_profiling() -> Optional[VSProfiler]:
+    """
+    Stop recording, and return the profiler recorded so far
+    """
+    global _active_profiler
+    profiler, _active_profiler = _active_profiler, None
+    return profiler
+
+
+def get_active_profiler() -> Optional[VSProfiler]:
+    return _active_profiler
+
+
+@contextmanager
+def profile_pipeline(profiler: Optional[VSProfiler] = None) -> Iterator[VSProfiler]:
+    """
+    Record stages and counters within a block, and restore the previously active profiler afterwards, e.g.
+        with profile_pipeline() as profiler:
+            ...
+        profiler.export_json("profile.json")
+    """
+    global _active_profiler
+    previous_profiler = _active_profiler
+    try:
+        yield enable_profiling(profiler)
+    finally:
+        _active_profiler = previous_profiler
+
+
+def profile_stage(name: str, items: int = 0):
+    """
+    Context manager measuring a block as a call of the named stage (a no-op while profiling is disabled)
+    """
+    if _active_profiler is None:
+        return _null_stage
+    return _active_profiler.stage(name, items=items)
+
+
+def count_event(name: str, num: int = 1):
+    if _active_profiler is not None:
+        _active_profiler.count(name, num)
+
+
+def profiled(name: Optional[str] = None, count_items: Optional[Callable] = None):
+    """
+    Decorator measuring each call of a function as a call of the named stage (the qualified name of the function by default)
+    :param name: Name of the stage
+    :param count_items: Function deriving the number of processed items from the result of a call, e.g. `len`
+    """
+    def decorator(func):
+        stage_name = func.__qualname__ if name is None else name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_profiler is None:
+                return func(*args, **kwargs)
+
+            with _active_profiler.stage(stage_name) as stage:
+                result = func(*args, **kwargs)
+                if count_items is not None:
+                    stage.add_items(count_items(result))
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,227 @@
+import sys
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .log_parser import iter_parsed_logs, log_pattern_schemas, log_patterns, schedule_pattern, to_naive_datetime
+from .profiling import profiled
+
+# Marker of missing integers (e.g. the optional duration of action logs) within the integer buffers
+MISSING_INT = np.iinfo(np.int64).min
+
+EPOCH = datetime(1970, 1, 1)
+
+# String table of each item of the schedule tuples extracted by `schedule_pattern` (unnamed groups share a generic table)
+schedule_group_names = {group_idx: name for name, group_idx in schedule_pattern.groupindex.items()}
+schedule_fields = [schedule_group_names.get(group_idx, "schedule_item") for group_idx in range(1, schedule_pattern.groups + 1)]
+
+
+@lru_cache(maxsize=65536)
+def to_epoch_seconds(value: datetime) -> int:
+    """
+    Seconds since the epoch of a naive datetime. Cached, since consecutive logs mostly share the same timestamps
+    """
+    return int((value - EPOCH).total_seconds())
+
+
+def get_log_pattern_fields(pattern: str) -> dict[str, str]:
+    """
+    Kind of each field extracted for a log pattern ("datetime", "int", "str" or "schedules"), in the order of extraction
+    """
+    field_kinds = {}
+    for field in log_patterns[pattern].groupindex:
+        converter = log_pattern_schemas[pattern].get(field)
+        field_kinds[field] = "datetime" if converter is to_naive_datetime else "int" if converter is int else "str"
+    if pattern == "init_scheduling":
+        field_kinds["schedules"] = "schedules"
+
+    return field_kinds
+
+
+class VSStringTable:
+    """
+    Interned table of repeated strings (e.g. vehicle, location, container or action IDs), where each distinct string is stored once and referenced by its integer code
+    """
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def get_code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._codes) + sys.getsizeof(self._values) + sum(sys.getsizeof(value) for value in self._values)
+
+
+class VSLogRecordBuffer:
+    """
+    Struct-of-arrays buffer of the parsed logs of one pattern, with timestamps as epoch seconds, integers as int64 and strings as codes into shared string tables
+    """
+    def __init__(self, pattern: str, string_tables: Optional[dict[str, VSStringTable]] = None):
+        self._pattern = pattern
+        self._field_kinds = get_log_pattern_fields(pattern)
+        self._string_tables = {} if string_tables is None else string_tables
+        self._columns = {}
+        for field, kind in self._field_kinds.items():
+            if kind == "str":
+                self._string_tables.setdefault(field, VSStringTable())
+                self._columns[field] = array("i")
+            elif kind == "schedules":
+                for item_idx, schedule_field in enumerate(schedule_fields):
+                    self._string_tables.setdefault(schedule_field, VSStringTable())
+                    self._columns[f"schedules.{item_idx}"] = array("i")
+                self._columns["schedules.offset"] = array("q", [0])
+            else:
+                self._columns[field] = array("q")
+        self._positions = array("q")
+
+    def __len__(self):
+        return len(self._positions)
+
+    def append(self, log_data: dict, position: int = -1):
+        """
+        Add a parsed log (as returned by `parse_log_line`), along with its position within the whole sequence of parsed logs
+        """
+        for field, kind in self._field_kinds.items():
+            value = log_data[field]
+            if kind == "str":
+                self._columns[field].append(self._string_tables[field].get_code(value))
+            elif kind == "datetime":
+                self._columns[field].append(MISSING_INT if value is None else to_epoch_seconds(value))
+            elif kind == "int":
+                self._columns[field].append(MISSING_INT if value is None else value)
+            else:
+                for schedule in value:
+                    for item_idx, (schedule_field, item) in enumerate(zip(schedule_fields, schedule)):
+                        self._columns[f"schedules.{item_idx}"].append(self._string_tables[schedule_field].get_code(item))
+                self._columns["schedules.offset"].append(self._columns["schedules.offset"][-1] + len(value))
+        self._positions.append(position)
+
+    def to_frame(self, categorical: bool = False, include_position: bool = False) -> pd.DataFrame:
+        """
+        Convert the buffer into a DataFrame with the same columns and dtypes as a DataFrame of the parsed logs as dictionaries
+        :param categorical: Keep strings as categorical columns (sharing the string tables) instead of object columns
+        :param include_position: Add the position of each log within the whole sequence of parsed logs (see `create_event_log_from_frames`)
+        """
+        frame_columns = {}
+        for field, kind in self._field_kinds.items():
+            if kind == "str":
+                frame_columns[field] = self._get_string_column(field, np.frombuffer(self._columns[field], dtype=np.int32), categorical=categorical)
+            elif kind == "datetime":
+                # The missing marker is the representation of NaT
+                frame_columns[field] = np.frombuffer(self._columns[field], dtype=np.int64).astype("datetime64[s]").astype("datetime64[ns]")
+            elif kind == "int":
+                values = np.frombuffer(self._columns[field], dtype=np.int64)
+                missing = values == MISSING_INT
+                # Same as the type inference of pandas on dictionaries: missing integers turn the column into floats
+                frame_columns[field] = np.where(missing, np.nan, values) if missing.any() else values.copy()
+            else:
+                frame_columns[field] = self._get_schedules()
+
+        frame = pd.DataFrame(frame_columns, index=pd.RangeIndex(len(self)))
+        if include_position:
+            frame["position"] = np.frombuffer(self._positions, dtype=np.int64).copy()
+        return frame
+
+    def _get_string_column(self, field: str, codes: np.ndarray, categorical: bool):
+        string_table = self._string_tables[field]
+        if categorical:
+            return pd.Categorical.from_codes(codes, categories=string_table.values)
+
+        values = np.array(string_table.values + [None], dtype=object)
+        # Missing strings (code -1) refer to the trailing None
+        return values[codes]
+
+    def _get_schedules(self) -> list[list[tuple]]:
+        schedule_values = [
+            np.array(self._string_tables[schedule_field].values, dtype=object)[np.frombuffer(self._columns[f"schedules.{item_idx}"], dtype=np.int32)].tolist()
+            for item_idx, schedule_field in enumerate(schedule_fields)
+        ]
+        schedules = list(zip(*schedule_values))
+        offsets = self._columns["schedules.offset"]
+        return [schedules[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def pattern(self):
+        return self._pattern
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of the buffers in bytes (excluding the shared string tables)
+        """
+        return sum(column.itemsize * len(column) for column in self._columns.values()) + self._positions.itemsize * len(self._positions)
+
+
+class VSLogRecords:
+    """
+    Compact representation of parsed logs: one `VSLogRecordBuffer` per log pattern, all sharing the same interned string tables, e.g. the codes of vehicle IDs are the same across patterns
+    """
+    def __init__(self):
+        self._string_tables = {}
+        self._buffers = {pattern: VSLogRecordBuffer(pattern, string_tables=self._string_tables) for pattern in log_patterns}
+        self._num_records = 0
+
+    def __len__(self):
+        return self._num_records
+
+    def __getitem__(self, pattern: str) -> VSLogRecordBuffer:
+        return self._buffers[pattern]
+
+    def append(self, pattern: str, log_data: dict):
+        self._buffers[pattern].append(log_data, position=self._num_records)
+        self._num_records += 1
+
+    def extend(self, parsed_logs: Iterable[tuple[str, dict]]):
+        for pattern, log_data in parsed_logs:
+            self.append(pattern, log_data)
+
+    def to_frame(self, pattern: str, categorical: bool = False, include_position: bool = False) -> pd.DataFrame:
+        return self._buffers[pattern].to_frame(categorical=categorical, include_position=include_position)
+
+    def to_frames(self, categorical: bool = False, include_position: bool = True) -> dict[str, pd.DataFrame]:
+        """
+        DataFrames of all patterns, by default along with the position of each log as expected by `create_event_log_from_frames`
+        """
+        return {pattern: buffer.to_frame(categorical=categorical, include_position=include_position) for pattern, buffer in self._buffers.items()}
+
+    @property
+    def string_tables(self):
+        return self._string_tables
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of all buffers and string tables in bytes
+        """
+        return sum(buffer.nbytes for buffer in self._buffers.values()) + sum(string_table.nbytes for string_table in self._string_tables.values())
+
+
+@profiled("parse_log_records", count_items=len)
+def parse_log_records(log_file_path: str, patterns: Optional[Iterable[str]] = None) -> VSLogRecords:
+    """
+    Parse a log file into compact records (see `VSLogRecords`). Logs are streamed from the file, so that no dictionary outlives the parsing of its line
+    """
+    log_records = VSLogRecords()
+    log_records.extend(iter_parsed_logs(log_file_path=log_file_path, patterns=patterns))
+    return log_records